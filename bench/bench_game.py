@@ -0,0 +1,346 @@
+# run python bench/bench_game.py to benchmark the game hot paths against synthetic boards
+#
+#   python bench/bench_game.py --output bench/results.json
+#   python bench/bench_game.py --baseline bench/results.json
+#
+# results are written as JSON (one entry per benchmark and shot density). when a baseline
+# file is given, every benchmark is compared against it and the script exits non-zero if
+# anything got slower than the allowed threshold.
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import config  # noqa: E402
+from utils import game, serializers  # noqa: E402
+
+SHIP_LENGTHS = {
+    "carrier": 5,
+    "battleship": 4,
+    "cruiser": 3,
+    "submarine": 3,
+    "destroyer": 2,
+}
+
+# fixed fleet layout so every density uses the same ships
+FLEET = [
+    ("carrier", "h", "A1"),
+    ("battleship", "v", "C3"),
+    ("cruiser", "h", "H5"),
+    ("submarine", "v", "E9"),
+    ("destroyer", "h", "J1"),
+]
+
+DEFAULT_DENSITIES = [0.0, 0.25, 0.5, 0.9]
+
+
+class FakeBot:
+    """Just enough of a bot for announce_to_spectators: no channels, so nothing is sent."""
+
+    def get_channel(self, channel_id):
+        return None
+
+
+def synthetic_catalog(size=120):
+    return {
+        "tiles": [
+            {
+                "name": f"Synthetic Tile {i}",
+                "count": 1 + i % 5,
+                "details": f"Collect {1 + i % 5} drops from synthetic boss {i}.",
+            }
+            for i in range(size)
+        ]
+    }
+
+
+def synthetic_ship_definitions():
+    return {
+        ship: [
+            {"name": f"{ship.title()} Tile {i + 1}", "count": 1, "details": f"Piece {i + 1} of the {ship}."}
+            for i in range(length)
+        ]
+        for ship, length in SHIP_LENGTHS.items()
+    }
+
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def make_board(density, shooter, ship_definitions, rng, locked=True):
+    board = game.generate_board()
+    for ship_type, orientation, start in FLEET:
+        game.place_ship(board, ship_type, orientation, start, ship_definitions)
+    board["locked"] = locked
+
+    coords = sorted(board["tiles"].keys())
+    rng.shuffle(coords)
+    start_ts = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    shots = {}
+    for i, coord in enumerate(coords[: int(len(coords) * density)]):
+        shots[coord] = {
+            "by": shooter,
+            "hit": "ship" in board["tiles"][coord],
+            "timestamp": (start_ts + timedelta(minutes=10 * i)).isoformat(),
+        }
+    board["shots"] = shots
+    return board
+
+
+def unshot(board, ship=None):
+    """Unshot coords that are water (ship=None) or part of the given ship."""
+    shots = board.get("shots", {})
+    if ship is None:
+        return [c for c, t in board["tiles"].items() if "ship" not in t and c not in shots]
+    return [c for c in board["ships"][ship] if c not in shots]
+
+
+def prepare_sinking_shot(board, shooter):
+    """Shoot every destroyer cell but the last, returning the coord that sinks it."""
+    remaining = unshot(board, "destroyer")
+    if not remaining:
+        return None
+    for coord in remaining[:-1]:
+        board.setdefault("shots", {})[coord] = {
+            "by": shooter,
+            "hit": True,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+    return remaining[-1]
+
+
+def time_runs(fn, setup=None, runs=200):
+    """Times fn over several runs, calling setup (untimed) before each one."""
+    samples = []
+    for _ in range(runs):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def time_runs_async(fn, setup=None, runs=200):
+    # handle_tile_selection schedules spectator announcements with create_task, so it
+    # needs a running loop; the tasks are drained between runs outside of the timing
+    samples = []
+    for _ in range(runs):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+    return summarize(samples)
+
+
+def summarize(samples):
+    samples_us = sorted(s * 1e6 for s in samples)
+    return {
+        "runs": len(samples_us),
+        "median_us": statistics.median(samples_us),
+        "mean_us": statistics.fmean(samples_us),
+        "min_us": samples_us[0],
+        "p95_us": samples_us[min(len(samples_us) - 1, int(len(samples_us) * 0.95))],
+    }
+
+
+async def bench_density(density, runs, ship_definitions, seed):
+    team = config.TEAMS_LIST[0]
+    opponent = config.TEAM_PAIRS[team]
+    rng = random.Random(seed)
+    bot = FakeBot()
+    # fake channel ids: the bench mustn't depend on the channels set up in config.py
+    channels = {team: 1001, opponent: 1002}
+
+    target = make_board(density, team, ship_definitions, rng)
+    own = make_board(density, opponent, ship_definitions, rng)
+    results = {}
+
+    def selection_setup(pick, skip=False):
+        def setup():
+            game.last_shot_time.clear()
+            board = copy.deepcopy(target)
+            coord = pick(board)
+            if skip:
+                game.save_skip_tokens({team: 5, opponent: 0})
+                game.save_active_skips({team: True, opponent: False})
+            return {team: copy.deepcopy(own), opponent: board}, coord
+        return setup
+
+    def select(arg):
+        boards, coord = arg
+        result = game.handle_tile_selection(bot, team, coord, boards, channels)
+        assert "error" not in result, result.get("error")
+
+    def pick_water(board):
+        return unshot(board)[0]
+
+    def pick_hit(board):
+        for ship in ("carrier", "battleship", "cruiser", "submarine"):
+            remaining = unshot(board, ship)
+            if len(remaining) > 1:
+                return remaining[0]
+        raise RuntimeError("no unsunk ship cell left to hit")
+
+    def pick_sinking(board):
+        return prepare_sinking_shot(board, team)
+
+    game.save_skip_tokens({team: 0, opponent: 0})
+    game.save_active_skips({team: False, opponent: False})
+    if unshot(target):
+        results["handle_tile_selection.miss"] = await time_runs_async(select, selection_setup(pick_water), runs)
+        results["handle_tile_selection.skip"] = await time_runs_async(select, selection_setup(pick_water, skip=True), runs)
+        game.save_skip_tokens({team: 0, opponent: 0})
+        game.save_active_skips({team: False, opponent: False})
+    if any(len(unshot(target, s)) > 1 for s in ("carrier", "battleship", "cruiser", "submarine")):
+        results["handle_tile_selection.hit"] = await time_runs_async(select, selection_setup(pick_hit), runs)
+    if unshot(target, "destroyer"):
+        results["handle_tile_selection.sunk"] = await time_runs_async(select, selection_setup(pick_sinking), runs)
+
+    results["render_board_with_shots.hidden"] = time_runs(
+        lambda _: game.render_board_with_shots(target, reveal_ships=False), runs=runs
+    )
+    results["render_board_with_shots.revealed"] = time_runs(
+        lambda _: game.render_board_with_shots(target, reveal_ships=True), runs=runs
+    )
+    results["render_board_preview"] = time_runs(
+        lambda _: game.render_board_preview(target, list(SHIP_LENGTHS)), runs=runs
+    )
+
+    unlocked = copy.deepcopy(target)
+    unlocked["locked"] = False
+    game.remove_ship(unlocked, "destroyer")
+    results["place_ship"] = time_runs(
+        lambda board: game.place_ship(board, "destroyer", "h", "J1", ship_definitions),
+        setup=lambda: copy.deepcopy(unlocked),
+        runs=runs,
+    )
+    placed = copy.deepcopy(target)
+    placed["locked"] = False
+    results["remove_ship"] = time_runs(
+        lambda board: game.remove_ship(board, "destroyer"),
+        setup=lambda: copy.deepcopy(placed),
+        runs=runs,
+    )
+
+    results["generate_board"] = time_runs(lambda _: game.generate_board(), runs=runs)
+    serializers.write_board(game.board_path(opponent), target)
+    serializers.write_board(game.board_path(team), own)
+    results["generate_match_summary"] = time_runs(lambda _: game.generate_match_summary([team, opponent]), runs=runs)
+    results["get_last_shot"] = time_runs(lambda _: game.get_last_shot(team), runs=runs)
+
+    def round_trip(_):
+        serializers.write_board(game.board_path(opponent), target)
+        game.load_board(opponent)
+
+    results["board_round_trip"] = time_runs(round_trip, runs=runs)
+
+    for name, serializer in serializers.SERIALIZERS.items():
+        raw = serializer.dumps(target)
+        results[f"board_dumps.{name}"] = time_runs(lambda _: serializer.dumps(target), runs=runs)
+        results[f"board_loads.{name}"] = time_runs(lambda _: serializer.loads(raw), runs=runs)
+
+    return {f"{name}[density={density}]": stats for name, stats in results.items()}
+
+
+async def run_all(densities, runs, seed):
+    ship_definitions = synthetic_ship_definitions()
+    results = {}
+    for density in densities:
+        results.update(await bench_density(density, runs, ship_definitions, seed))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints a comparison table and returns the benchmarks that regressed."""
+    regressions = []
+    base_results = baseline.get("results", {})
+    print(f"\n{'benchmark':<58} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, stats in sorted(results.items()):
+        base = base_results.get(name)
+        if not base:
+            print(f"{name:<58} {'-':>10} {stats['median_us']:>9.1f}u {'new':>7}")
+            continue
+        ratio = stats["median_us"] / base["median_us"] if base["median_us"] else float("inf")
+        flag = " ⚠️" if ratio > threshold else ""
+        print(f"{name:<58} {base['median_us']:>9.1f}u {stats['median_us']:>9.1f}u {ratio:>6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append({"benchmark": name, "baseline_us": base["median_us"], "current_us": stats["median_us"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the battleship game hot paths.")
+    parser.add_argument("--runs", type=int, default=200, help="timed runs per benchmark")
+    parser.add_argument("--densities", default=",".join(str(d) for d in DEFAULT_DENSITIES),
+                        help="comma separated shot densities (0-1) for the synthetic boards")
+    parser.add_argument("--seed", type=int, default=1234, help="seed for the synthetic boards")
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="fail when a median is this many times slower than the baseline")
+    args = parser.parse_args(argv)
+
+    densities = [float(d) for d in args.densities.split(",") if d.strip()]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    output = os.path.abspath(args.output) if args.output else None
+
+    # the game functions read and write relative to ./data, so run inside a scratch dir
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.makedirs("data")
+            write_json(game.DATA_DIR / "base_tiles.json", synthetic_catalog())
+            results = asyncio.run(run_all(densities, args.runs, args.seed))
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "densities": densities,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Wrote benchmark results to {output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {args.threshold:.2f}x")
+            return 1
+        print("\n✅ No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+# run python bench/loadtest.py to drive the real bot.py command handlers under load
+#
+#   python bench/loadtest.py --teams 8 --players 15 --duration 30
+#
+# the discord gateway is replaced by a small local fake (contexts, channels, guild roles and
+# bot.get_channel), so nothing ever connects to discord. every simulated player fires commands
+# as a poisson process, refs broadcast on their own schedule, and at the end we report command
+# latency percentiles, event loop lag and how many messages the bot tried to send.
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import config  # noqa: E402
+from bench_game import FLEET, synthetic_catalog, synthetic_ship_definitions, write_json  # noqa: E402
+
+PLAYER_COMMANDS = {
+    "select": 1,
+    "view_enemy_board": 3,
+    "current_task": 2,
+}
+
+REF_COMMANDS = ["taskrules", "matchsummary", "team_progress"]
+
+COLUMNS = "ABCDEFGHIJ"
+
+
+class FakeRole:
+    def __init__(self, name):
+        self.name = name
+        self.mention = f"<@&{name}>"
+
+
+class FakeGuild:
+    def __init__(self, roles):
+        self.roles = roles
+
+
+class FakeAuthor:
+    def __init__(self, name, roles):
+        self.id = name
+        self.name = name
+        self.display_name = name
+        self.roles = roles
+        self.mention = f"<@{name}>"
+
+
+class FakeMessage:
+    def __init__(self, channel, content):
+        self.channel = channel
+        self.content = content
+
+    async def add_reaction(self, emoji):
+        await self.channel.gateway.round_trip(self.channel, "reaction")
+
+
+class FakeChannel:
+    def __init__(self, gateway, channel_id, name, kind):
+        self.gateway = gateway
+        self.id = channel_id
+        self.name = name
+        self.kind = kind
+
+    async def send(self, content=None, embed=None, file=None, **kwargs):
+        await self.gateway.round_trip(self, "message")
+        return FakeMessage(self, content)
+
+
+class FakeGateway:
+    """Stands in for discord: resolves channel IDs and counts everything sent through it."""
+
+    def __init__(self, send_latency):
+        self.send_latency = send_latency
+        self.channels = {}
+        self.sent = Counter()
+        self.sent_by_kind = Counter()
+
+    def add_channel(self, channel_id, name, kind):
+        self.channels[channel_id] = FakeChannel(self, channel_id, name, kind)
+        return self.channels[channel_id]
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def round_trip(self, channel, what):
+        self.sent[channel.name] += 1
+        self.sent_by_kind[f"{channel.kind}.{what}"] += 1
+        if self.send_latency:
+            # pretend to be the discord REST api
+            await asyncio.sleep(random.expovariate(1 / self.send_latency))
+
+
+class FakeContext:
+    def __init__(self, bot, channel, author, guild, message=None):
+        self.bot = bot
+        self.channel = channel
+        self.author = author
+        self.guild = guild
+        self.message = message or FakeMessage(channel, None)
+        self.command = None
+        self.args = []
+        self.command_failed = False
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+def configure_teams(team_count, gateway):
+    """Swap the configured teams for synthetic ones wired to fake channels."""
+    teams = [f"team{i}" for i in range(team_count)]
+    config.TEAMS_LIST = teams
+    config.TEAM_PAIRS = {}
+    for a, b in zip(teams[0::2], teams[1::2]):
+        config.TEAM_PAIRS[a] = b
+        config.TEAM_PAIRS[b] = a
+    config.TEAM_DISPLAY = {team: f"Crew {team}" for team in teams}
+    config.TEAM_COLORS = {team: 0x1ABC9C for team in teams}
+    config.TEAM_CHANNELS = {}
+    for i, team in enumerate(teams):
+        channel = gateway.add_channel(1000 + i, f"#{team}", "team")
+        config.TEAM_CHANNELS[team] = channel.id
+    config.SPECTATOR_CHANNEL_ID = gateway.add_channel(999, "#spectators", "spectator").id
+    gateway.add_channel(998, "#refs", "refs")
+    return teams
+
+
+def prepare_boards(bot_module, teams):
+    from utils import game
+
+    for team in teams:
+        board = bot_module.load_or_generate_board(team)
+        for ship_type, orientation, start in FLEET:
+            game.place_ship(board, ship_type, orientation, start, bot_module.SHIP_DEFINITIONS)
+        board["locked"] = True
+        bot_module.save_board(team, board)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class LoadTest:
+    def __init__(self, bot_module, gateway, args):
+        self.bot_module = bot_module
+        self.gateway = gateway
+        self.args = args
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.loop_lag = []
+        self.rng = random.Random(args.seed)
+        self.refs_role = FakeRole("refs")
+        self.guild = FakeGuild([self.refs_role])
+
+    async def invoke(self, name, ctx, *args):
+        command = self.bot_module.bot.get_command(name)
+        ctx.command = command
+        ctx.args = [ctx, *args]
+        start = time.perf_counter()
+        # run the bot's own before/after hooks so metrics and tracing see the load too
+        await self.bot_module.start_command_timer(ctx)
+        try:
+            await command.callback(ctx, *args)
+        except Exception as e:
+            ctx.command_failed = True
+            self.errors[f"{name}: {type(e).__name__}"] += 1
+        await self.bot_module.record_command_latency(ctx)
+        self.latencies[name].append(time.perf_counter() - start)
+
+    async def player(self, team, index, deadline):
+        channel = self.gateway.get_channel(config.TEAM_CHANNELS[team])
+        author = FakeAuthor(f"{team}-player{index}", [])
+        names = list(PLAYER_COMMANDS)
+        weights = [PLAYER_COMMANDS[n] for n in names]
+        while True:
+            await asyncio.sleep(self.rng.expovariate(self.args.player_rate))
+            if time.perf_counter() >= deadline:
+                return
+            ctx = FakeContext(self.bot_module.bot, channel, author, self.guild)
+            name = self.rng.choices(names, weights)[0]
+            if name == "select":
+                coord = f"{self.rng.choice(COLUMNS)}{self.rng.randint(1, 10)}"
+                await self.invoke(name, ctx, coord)
+            else:
+                await self.invoke(name, ctx)
+
+    async def ref(self, deadline):
+        channel = self.gateway.get_channel(998)
+        author = FakeAuthor("ref", [self.refs_role])
+        while True:
+            await asyncio.sleep(self.rng.expovariate(self.args.ref_rate))
+            if time.perf_counter() >= deadline:
+                return
+            ctx = FakeContext(self.bot_module.bot, channel, author, self.guild)
+            await self.invoke(self.rng.choice(self.args.ref_commands), ctx)
+
+    async def monitor_loop(self, deadline, interval=0.01):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag.append(max(0.0, time.perf_counter() - start - interval))
+
+    async def run(self):
+        deadline = time.perf_counter() + self.args.duration
+        tasks = [asyncio.create_task(self.monitor_loop(deadline))]
+        for team in config.TEAMS_LIST:
+            for i in range(self.args.players):
+                tasks.append(asyncio.create_task(self.player(team, i, deadline)))
+        if self.args.ref_rate > 0:
+            tasks.append(asyncio.create_task(self.ref(deadline)))
+        await asyncio.gather(*tasks)
+        # let fire-and-forget spectator announcements finish
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if pending:
+            await asyncio.wait(pending, timeout=5)
+
+    def report(self):
+        ms = lambda s: round(s * 1000, 3)  # noqa: E731
+        commands = {}
+        for name, values in sorted(self.latencies.items()):
+            commands[name] = {
+                "count": len(values),
+                "p50_ms": ms(percentile(values, 50)),
+                "p95_ms": ms(percentile(values, 95)),
+                "p99_ms": ms(percentile(values, 99)),
+                "max_ms": ms(max(values)),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "config": {
+                "teams": len(config.TEAMS_LIST),
+                "players_per_team": self.args.players,
+                "player_rate": self.args.player_rate,
+                "ref_rate": self.args.ref_rate,
+                "duration_s": self.args.duration,
+                "send_latency_s": self.args.send_latency,
+            },
+            "throughput_cmds_per_s": round(total / self.args.duration, 2),
+            "commands": commands,
+            "loop_lag": {
+                "p50_ms": ms(percentile(self.loop_lag, 50)),
+                "p95_ms": ms(percentile(self.loop_lag, 95)),
+                "p99_ms": ms(percentile(self.loop_lag, 99)),
+                "max_ms": ms(max(self.loop_lag, default=0.0)),
+            },
+            "outbound": {
+                "total": sum(self.gateway.sent.values()),
+                "by_kind": dict(self.gateway.sent_by_kind),
+                "by_channel": dict(self.gateway.sent.most_common()),
+            },
+            "errors": dict(self.errors),
+        }
+
+
+def print_report(report):
+    cfg = report["config"]
+    print(
+        f"\n⚓ {cfg['teams']} teams x {cfg['players_per_team']} players for {cfg['duration_s']}s "
+        f"({report['throughput_cmds_per_s']} commands/s)\n"
+    )
+    print(f"{'command':<20} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, stats in report["commands"].items():
+        print(
+            f"{name:<20} {stats['count']:>7} {stats['p50_ms']:>7.2f}ms {stats['p95_ms']:>7.2f}ms "
+            f"{stats['p99_ms']:>7.2f}ms {stats['max_ms']:>7.2f}ms"
+        )
+    lag = report["loop_lag"]
+    print(f"\nevent loop lag: p50 {lag['p50_ms']:.2f}ms | p95 {lag['p95_ms']:.2f}ms | p99 {lag['p99_ms']:.2f}ms | max {lag['max_ms']:.2f}ms")
+    print(f"outbound messages: {report['outbound']['total']} {report['outbound']['by_kind']}")
+    if report["errors"]:
+        print(f"errors: {report['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the bot commands against a fake Discord gateway.")
+    parser.add_argument("--teams", type=int, default=4, help="number of teams (paired up, so use an even number)")
+    parser.add_argument("--players", type=int, default=10, help="players per team")
+    parser.add_argument("--player-rate", type=float, default=0.5, help="commands per second per player")
+    parser.add_argument("--ref-rate", type=float, default=0.05, help="ref broadcasts per second")
+    parser.add_argument("--ref-commands", default=",".join(REF_COMMANDS), help="comma separated ref commands to broadcast")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to run")
+    parser.add_argument("--send-latency", type=float, default=0.05, help="mean simulated discord send latency in seconds")
+    parser.add_argument("--no-cooldown", action="store_true", help="disable the shot cooldown so every !select fires")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+    args.ref_commands = [c for c in args.ref_commands.split(",") if c]
+    if args.teams < 2 or args.teams % 2:
+        parser.error("--teams must be an even number of at least 2")
+
+    output = os.path.abspath(args.output) if args.output else None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.makedirs("data")
+            write_json("data/base_tiles.json", synthetic_catalog())
+            write_json("data/ship_tiles.json", synthetic_ship_definitions())
+
+            gateway = FakeGateway(args.send_latency)
+            teams = configure_teams(args.teams, gateway)
+            # bot.py loads its ship definitions from ./data on import
+            bot_module = importlib.import_module("bot")
+            bot_module.bot.get_channel = gateway.get_channel
+            if args.no_cooldown:
+                importlib.import_module("utils.game").COOLDOWN_DISABLED = True
+            prepare_boards(bot_module, teams)
+
+            test = LoadTest(bot_module, gateway, args)
+            asyncio.run(test.run())
+            report = test.report()
+        finally:
+            os.chdir(cwd)
+
+    print_report(report)
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Wrote load test report to {output}")
+
+
+if __name__ == "__main__":
+    main()
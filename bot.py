@@ -1,13 +1,19 @@
 import discord # type: ignore
 import config
-import os
+import asyncio
+import io
 import json
+import os
+import time
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from discord.ext import commands # type: ignore
 from utils.game import (
-    announce_to_spectators, apply_event_to_board, generate_board, generate_match_summary, get_last_shot, handle_tile_selection, current_task_command, load_active_skips, load_skip_tokens, render_board_preview,
-    board_path, place_ship_to_file, last_shot_time, remove_ship_from_file, load_board, render_board_with_shots, resolve_event_on_board, save_active_skips, save_skip_tokens
+    active_events, announce_to_spectators, apply_event_to_boards, board_stats, generate_board, begin_shot, end_shot, generate_match_summary, get_last_shot, handle_tile_selection, precheck_selection, current_task_command, load_skip_tokens, render_board_preview,
+    board_path, place_ship_to_file, team_seed, last_shot_time, remove_ship_from_file, load_board, render_board_with_shots, resolve_event_on_board, save_skip_tokens,
+    save_board, load_boards, BoardBatch, read_json, match_id, autoplace_fleet, parse_fleet, fleet_from_json, place_fleet, restore_version
 )
+from utils import archive, coalesce, heatmap, history, match_config, match_log, metrics, profiler, startup, storage, tracing, web
 
 
 required_ships = ["carrier", "battleship", "cruiser", "submarine", "destroyer"]
@@ -28,39 +34,37 @@ SHIP_EMOJIS = {
     "destroyer": "⬛"     # black square
 }
 
+# match setup from data/match_config.json, when there is one
+match_config.load_initial()
+
 # Bot Initialization
 bot = commands.Bot(command_prefix='!', intents=config.intents, case_insensitive=True)
 
 # Utility Functions
 def board_exists(team):
     filename = board_path(team)
-    return os.path.isfile(filename)
+    return storage.exists(filename)
 
 def get_team_from_channel(channel_id):
-    for team, cid in config.TEAM_CHANNELS.items():
-        if cid == channel_id:
-            return team
-    return None
+    return match_config.team_for_channel(channel_id)
 
 def load_or_generate_board(team):
     filename = board_path(team)
 
-    if os.path.isfile(filename):
-        with open(filename) as f:
-            board = json.load(f)
+    if storage.exists(filename):
+        board = load_board(team)
         print(f"Loaded existing board for {team}")
     else:
-        board = generate_board()
-        with open(filename, "w") as f:
-            json.dump(board, f, indent=2)
+        seed = team_seed(config.BOARD_SEED, team) if config.BOARD_SEED is not None else None
+        board = generate_board(seed)
+        save_board(team, board, "generated", event={"type": "board_generated"})
         print(f"Generated and saved new board for {team}")
 
     return board
 
-def save_board(team, board):
-    filename = board_path(team)
-    with open(filename, "w") as f:
-        json.dump(board, f, indent=2)
+def add_teams(teams):
+    """Boards and starting versions for teams a reloaded match setup added."""
+    startup.add_teams(teams, load_or_generate_board)
 
 def is_valid_coordinate(coord):
     if len(coord) < 2:
@@ -105,6 +109,50 @@ async def announce_to_spectators(bot, message):
     if channel:
         await channel.send(message)
 
+# Metrics and Tracing Hooks
+# commands that change game state get a trace (when sampled, see TRACE_SAMPLE_RATE)
+TRACED_COMMANDS = {
+    "select", "place", "placefleet", "remove", "autoplace", "autofill", "lockboard", "unlockboard",
+    "use_skip", "eventstart", "eventend", "undo", "rollback",
+}
+
+class WarmingUp(commands.CheckFailure):
+    pass
+
+@bot.check
+async def warmed_up(ctx):
+    # commands wait until on_ready has every board loaded (see utils/startup.py)
+    if not startup.is_ready():
+        raise WarmingUp()
+    return True
+
+@bot.event
+async def on_command_error(ctx, error):
+    if isinstance(error, WarmingUp):
+        await ctx.send("⏳ The bot is still warming up — try again in a moment, Captain!")
+        return
+    await commands.Bot.on_command_error(bot, ctx, error)
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.metrics_started = time.perf_counter()
+    if ctx.command.qualified_name in TRACED_COMMANDS:
+        ctx.trace = tracing.begin(ctx.command.qualified_name, channel=ctx.channel.id, args=[str(a) for a in ctx.args[1:]])
+
+@bot.after_invoke
+async def record_command_latency(ctx):
+    started = getattr(ctx, "metrics_started", None)
+    if started is not None:
+        metrics.observe_command(ctx.command.qualified_name, time.perf_counter() - started, ctx.command_failed)
+    tracing.finish(getattr(ctx, "trace", None))
+    # commands queue their writes without waiting; if the writer falls behind, wait here
+    await storage.backpressure()
+
+@bot.listen("on_message")
+async def count_outbound_message(message):
+    if bot.user and message.author.id == bot.user.id:
+        metrics.count_message(getattr(message.channel, "name", None) or str(message.channel.id))
+
 # Commands
 @bot.command(name="shiptypes")
 async def show_ship_types(ctx):
@@ -134,6 +182,7 @@ async def preview_board(ctx):
     await ctx.send(preview)
 
 @bot.command()
+@coalesce.read_command
 async def skips(ctx):
     team = get_team_from_channel(ctx.channel.id)
     if not team:
@@ -146,6 +195,7 @@ async def skips(ctx):
     await ctx.send(f"🪙 **{config.TEAM_DISPLAY[team]}** has **{count}** skip token(s) remaining.")
 
 @bot.command(name="view_enemy_board")
+@coalesce.read_command
 async def view_enemy_board(ctx):
     team = get_team_from_channel(ctx.channel.id)
     if not team:
@@ -166,6 +216,25 @@ async def view_enemy_board(ctx):
     await ctx.send(f"⚓ Behold the enemy waters of **{opponent_display}**! Prepare to chart your course and strike true!")
     await ctx.send(preview)
 
+@bot.command(name="heatmap")
+@coalesce.read_command
+async def heatmap_command(ctx, team: str = None):
+    # from a team channel this shows the enemy waters; anywhere else, name the board
+    if not team:
+        own_team = get_team_from_channel(ctx.channel.id)
+        team = config.TEAM_PAIRS.get(own_team) if own_team else None
+    if team not in config.TEAMS_LIST:
+        await ctx.send(f"⚠️ Usage: `!heatmap <team>` with one of: {', '.join(config.TEAMS_LIST)}.")
+        return
+
+    if not board_exists(team):
+        await ctx.send(f"❌ No board found for team '{team}'.")
+        return
+
+    board = load_board(team)
+    preview = heatmap.render_heatmap(board, cache_key=team)
+    await ctx.send(f"🔥 **Targeting heatmap for {config.TEAM_DISPLAY.get(team, team)}'s waters**\n{preview}")
+
 @bot.command()
 async def team(ctx):
     team = get_team_from_channel(ctx.channel.id)
@@ -196,11 +265,58 @@ async def place_command(ctx, ship_type: str, orientation: str, start_coord: str)
         await ctx.send("❌ Invalid starting coordinate. Use format like A3.")
         return
 
+    tracing.annotate(team=team, match=match_id(team))
     result = place_ship_to_file(team, ship_type, orientation, start_coord, SHIP_DEFINITIONS)
-    updated_board = load_board(team)
-    preview = render_board_preview(updated_board, required_ships)
+    with tracing.span("render"):
+        updated_board = load_board(team)
+        preview = render_board_preview(updated_board, required_ships)
 
-    await ctx.send(f"{result}\n{preview}")
+    with tracing.span("send"):
+        await ctx.send(f"{result}\n{preview}")
+
+@bot.command(name="placefleet")
+async def place_fleet_command(ctx, *, spec: str = ""):
+    team = get_team_from_channel(ctx.channel.id)
+    if not team:
+        await ctx.send("Could not detect your team.")
+        return
+    tracing.annotate(team=team, match=match_id(team))
+
+    with tracing.span("parse"):
+        errors = []
+        attachments = getattr(ctx.message, "attachments", None) or []
+        if attachments:
+            try:
+                placements = fleet_from_json(json.loads(await attachments[0].read()))
+            except (ValueError, AttributeError) as e:
+                await ctx.send(f"❌ Couldn't read the attached fleet JSON: {e}")
+                return
+        else:
+            placements, errors = parse_fleet(spec)
+
+    if errors or not placements:
+        await ctx.send("\n".join(errors) or "⚠️ Usage: `!placefleet carrier h A1; battleship v C3; ...` (or attach a JSON file)")
+        return
+
+    if not board_exists(team):
+        await ctx.send(f"❌ Board file for team '{team}' not found.")
+        return
+
+    with tracing.span("load"):
+        board = load_board(team)
+    with tracing.span("mutate"):
+        ok, messages = place_fleet(board, placements, SHIP_DEFINITIONS)
+    if ok:
+        with tracing.span("persist"):
+            save_board(team, board, "placed fleet", event={"type": "fleet_placed"})
+    else:
+        messages = [m for m in messages if not m.startswith("✅")]
+        messages.append("⚠️ No ships were placed — fix the above and send the whole fleet again.")
+
+    with tracing.span("render"):
+        preview = render_board_preview(board, required_ships)
+    with tracing.span("send"):
+        await ctx.send("\n".join(messages) + f"\n{preview}")
 
 @bot.command(name="remove")
 async def remove_command(ctx, ship_type: str):
@@ -211,12 +327,103 @@ async def remove_command(ctx, ship_type: str):
         await ctx.send(f"❌ Invalid ship type: `{ship_type}`.")
         return
 
+    tracing.annotate(team=team, match=match_id(team))
     result = remove_ship_from_file(team, ship_type)
-    updated_board = load_board(team)
-    preview = render_board_preview(updated_board, required_ships)
+    with tracing.span("render"):
+        updated_board = load_board(team)
+        preview = render_board_preview(updated_board, required_ships)
+
+    with tracing.span("send"):
+        await ctx.send(f"{result}\n{preview}")
+
+def parse_autoplace_options(options):
+    options = [o.lower() for o in options]
+    no_touch = "notouch" in options
+    if "edge" in options:
+        edge_bias = 1.5
+    elif "center" in options:
+        edge_bias = -0.6
+    else:
+        edge_bias = 0.0
+    return no_touch, edge_bias
+
+@bot.command(name="autoplace")
+async def autoplace_command(ctx, *options):
+    team = get_team_from_channel(ctx.channel.id)
+    if not team:
+        await ctx.send("Could not detect your team.")
+        return
+    tracing.annotate(team=team, match=match_id(team))
+
+    if not board_exists(team):
+        await ctx.send(f"❌ Board file for team '{team}' not found.")
+        return
+
+    no_touch, edge_bias = parse_autoplace_options(options)
+    with tracing.span("load"):
+        board = load_board(team)
+    with tracing.span("mutate"):
+        result = autoplace_fleet(board, SHIP_DEFINITIONS, no_touch=no_touch, edge_bias=edge_bias)
+    if result.startswith("✅"):
+        with tracing.span("persist"):
+            save_board(team, board, "autoplaced fleet", event={"type": "fleet_placed"})
+    with tracing.span("render"):
+        preview = render_board_preview(board, required_ships)
 
     await ctx.send(f"{result}\n{preview}")
 
+@bot.command(name="autofill")
+async def autofill(ctx, target: str = None, *options):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    # `!autofill lock` / `!autofill notouch` with no team means "this channel's team"
+    if target and target.lower() in ("lock", "notouch", "edge", "center"):
+        options = (target, *options)
+        target = None
+
+    if target and target.lower() == "all":
+        teams = list(config.TEAMS_LIST)
+    else:
+        team = target or get_team_from_channel(ctx.channel.id)
+        if not team:
+            await ctx.send("❌ Could not determine team from this channel. Specify a team name or `all`.")
+            return
+        teams = [team]
+
+    no_touch, edge_bias = parse_autoplace_options(options)
+    lock = "lock" in [o.lower() for o in options]
+    lines = []
+    # every board is filled (and locked) together: one saved batch, or nothing on error
+    with BoardBatch(teams) as batch:
+        for team in teams:
+            board = batch.boards.get(team)
+            if board is None:
+                lines.append(f"**{team}**: ❌ No board found.")
+                continue
+
+            changed = False
+            if not board.get("locked", False):
+                missing = [ship for ship in required_ships if ship not in board.get("ships", {})]
+                if missing:
+                    msg = autoplace_fleet(board, SHIP_DEFINITIONS, no_touch=no_touch, edge_bias=edge_bias)
+                    changed = msg.startswith("✅")
+                    lines.append(f"**{team}**: {msg}")
+                else:
+                    lines.append(f"**{team}**: ⚓ Fleet already complete.")
+                if lock:
+                    msg = lock_board(board, required_ships)
+                    changed = changed or msg.startswith("✅")
+                    lines.append(f"**{team}**: {msg}")
+            else:
+                lines.append(f"**{team}**: 🔒 Already locked.")
+
+            if changed:
+                batch.changed(team, "autofill", {"type": "autofill", "locked": lock})
+
+    await ctx.send("🛠️ **Autofill**\n" + "\n".join(lines))
+
 @bot.command(name="lockboard")
 async def lockboard(ctx, team: str = None):
     if not user_has_refs_role(ctx):
@@ -232,10 +439,14 @@ async def lockboard(ctx, team: str = None):
         await ctx.send(f"❌ No board found for team '{team}'.")
         return
 
-    board = load_board(team)
-    msg = lock_board(board, required_ships)
+    tracing.annotate(team=team, match=match_id(team))
+    with tracing.span("load"):
+        board = load_board(team)
+    with tracing.span("mutate"):
+        msg = lock_board(board, required_ships)
     if msg.startswith("✅"):
-        save_board(team, board)
+        with tracing.span("persist"):
+            save_board(team, board, "locked", event={"type": "locked"})
     await ctx.send(msg)
 
 @bot.command(name="unlockboard")
@@ -253,12 +464,143 @@ async def unlockboard(ctx, team: str = None):
         await ctx.send(f"❌ No board found for team '{team}'.")
         return
 
-    board = load_board(team)
-    msg = unlock_board(board)
+    tracing.annotate(team=team, match=match_id(team))
+    with tracing.span("load"):
+        board = load_board(team)
+    with tracing.span("mutate"):
+        msg = unlock_board(board)
     if msg.startswith("✅"):
-        save_board(team, board)
+        with tracing.span("persist"):
+            save_board(team, board, "unlocked", event={"type": "unlocked"})
     await ctx.send(msg)
 
+def resolve_ref_team(ctx, team):
+    team = team or get_team_from_channel(ctx.channel.id)
+    if team not in config.TEAMS_LIST:
+        return None
+    return team
+
+@bot.command(name="history")
+async def board_history(ctx, team: str = None):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    team = resolve_ref_team(ctx, team)
+    if not team:
+        await ctx.send(f"❌ Specify a team: {', '.join(config.TEAMS_LIST)}.")
+        return
+
+    versions = history.versions(team)
+    if not versions:
+        await ctx.send(f"📜 No versions recorded for `{team}` yet.")
+        return
+
+    lines = [history.describe(v) for v in reversed(versions[-15:])]
+    await ctx.send(
+        f"📜 **Board history for {config.TEAM_DISPLAY.get(team, team)}** (newest first, {len(versions)} kept)\n"
+        + "\n".join(lines)
+        + "\n\nUse `!undo` or `!rollback <version>` to restore one."
+    )
+
+@bot.command(name="undo")
+async def undo(ctx, team: str = None):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    team = resolve_ref_team(ctx, team)
+    if not team:
+        await ctx.send(f"❌ Specify a team: {', '.join(config.TEAMS_LIST)}.")
+        return
+    tracing.annotate(team=team, match=match_id(team))
+
+    target = history.undo_target(team)
+    if not target:
+        await ctx.send(f"⚠️ Nothing older to undo to for `{team}`.")
+        return
+
+    latest = history.versions(team)[-1]
+    restore_version(team, target.number)
+    await ctx.send(f"↩️ Undid **{latest.reason}** on `{team}` — board, skip tokens and cooldowns are back to `v{target.number}` ({target.reason}).")
+
+@bot.command(name="rollback")
+async def rollback(ctx, version: str, team: str = None):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    team = resolve_ref_team(ctx, team)
+    if not team:
+        await ctx.send(f"❌ Specify a team: {', '.join(config.TEAMS_LIST)}.")
+        return
+    tracing.annotate(team=team, match=match_id(team))
+
+    try:
+        number = int(version.lower().lstrip("v"))
+    except ValueError:
+        await ctx.send("⚠️ Usage: `!rollback <version> [team]`, e.g. `!rollback v12`.")
+        return
+
+    target = history.get_version(team, number)
+    if not target:
+        await ctx.send(f"❌ Version `v{number}` isn't in the retained history for `{team}`. See `!history`.")
+        return
+
+    restore_version(team, number)
+    await ctx.send(f"⏪ Rolled `{team}` back to `v{number}` ({target.reason}). Board, skip tokens and cooldowns restored.")
+
+@bot.command(name="replay")
+async def replay(ctx, point: str, team: str = None):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    team = resolve_ref_team(ctx, team)
+    if not team:
+        await ctx.send(f"❌ Specify a team: {', '.join(config.TEAMS_LIST)}.")
+        return
+
+    # an event number from !recap / the export, or a UTC timestamp like 2025-06-01T20:15
+    seq, when = None, None
+    if point.isdigit():
+        seq = int(point)
+    else:
+        try:
+            when = datetime.fromisoformat(point)
+        except ValueError:
+            await ctx.send("⚠️ Usage: `!replay <event number|timestamp> [team]`, e.g. `!replay 120` or `!replay 2025-06-01T20:15`.")
+            return
+
+    match = match_id(team)
+    loop = asyncio.get_running_loop()
+    boards = await loop.run_in_executor(None, lambda: match_log.Replay(match).boards_at(seq, when))
+    board = boards.get(team)
+    if not board:
+        await ctx.send(f"⚠️ `{team}` had no board yet at that point of `{match}`.")
+        return
+
+    shots = board.get("shots", {})
+    hits = sum(1 for s in shots.values() if s.get("hit"))
+    await ctx.send(
+        f"⏮️ **{config.TEAM_DISPLAY.get(team, team)}** at {f'event {seq}' if seq is not None else point} "
+        f"— {len(shots)} shots taken, {hits} hits\n{render_board_with_shots(board, reveal_ships=True)}"
+    )
+
+@bot.command(name="recap")
+async def recap(ctx, team: str = None):
+    team = team or get_team_from_channel(ctx.channel.id)
+    if team not in config.TEAMS_LIST:
+        await ctx.send(f"❌ Specify a team: {', '.join(config.TEAMS_LIST)}.")
+        return
+
+    match = match_id(team)
+    lines = await asyncio.get_running_loop().run_in_executor(None, match_log.recap, match, None, 20)
+    if not lines:
+        await ctx.send(f"📜 Nothing has happened in `{match}` yet.")
+        return
+    await ctx.send(f"📜 **Recap of {match}** (last {len(lines)} moves)\n" + "\n".join(lines))
+
 @bot.command(name="board_status")
 async def board_status(ctx, team: str):
     if not user_has_refs_role(ctx):
@@ -271,20 +613,20 @@ async def board_status(ctx, team: str):
         await ctx.send(f"❌ Invalid team. Use one of: {', '.join(valid_teams)}.")
         return
 
-    board = load_board(team) 
-    if not board:
+    received = board_stats(team)
+    if not received:
         await ctx.send(f"❌ No board found for team '{team}'.")
         return
-    shots = board.get("shots", {})
-    total_shots = len(shots)
-    hits = sum(1 for s in shots.values() if s.get("hit"))
+    total_shots = received.shots_taken
+    hits = received.hits_taken
     misses = total_shots - hits
 
     await ctx.send(
         f"📊 **{team.upper()} Board Status**\n"
         f"> 🔫 Total shots: `{total_shots}`\n"
         f"> 🎯 Hits: `{hits}`\n"
-        f"> 💨 Misses: `{misses}`"
+        f"> 💨 Misses: `{misses}`\n"
+        f"> ⚓ Ships lost: `{len(received.ships_lost)}`"
     )
 
 @bot.command(name="team_progress")
@@ -300,28 +642,94 @@ async def team_progress(ctx):
             progress_msgs.append(f"**{team.upper()}**\n> 🚫 No opponent defined.")
             continue
 
-        opponent_board = load_board(opponent)
-        if not opponent_board:
+        fired = board_stats(opponent)
+        if not fired:
             progress_msgs.append(f"**{team.upper()}**\n> 🚫 No board found for opponent `{opponent}`.")
             continue
 
         # shots MADE BY this team are stored on opponent's board
-        shots = opponent_board.get("shots", {})
-        team_shots = {coord: data for coord, data in shots.items() if data.get("by") == team}
-
-        total_shots = len(team_shots)
-        hits = sum(1 for s in team_shots.values() if s.get("hit"))
-        misses = total_shots - hits
-        accuracy = (hits / total_shots) * 100 if total_shots else 0
-
+        shooter = fired.shooter(team)
         progress_msgs.append(
             f"**{team.upper()}** (shots on `{opponent}`)\n"
-            f"> 🔫 Shots: `{total_shots}` | 🎯 Hits: `{hits}` | 💨 Misses: `{misses}`\n"
-            f"> 🎯 Accuracy: `{accuracy:.1f}%`"
+            f"> 🔫 Shots: `{shooter.shots}` | 🎯 Hits: `{shooter.hits}` | 💨 Misses: `{shooter.misses}`\n"
+            f"> 🎯 Accuracy: `{shooter.accuracy:.1f}%` | 🔥 Streak: `{shooter.streak}` (best `{shooter.best_streak}`) | 🚢 Sunk: `{len(shooter.sunk)}`"
         )
 
     await ctx.send("📈 **Team Progress Report**\n" + "\n\n".join(progress_msgs))
 
+@bot.command(name="scoreboard")
+@coalesce.read_command
+async def scoreboard(ctx):
+    lines = []
+    seen = set()
+    for team in config.TEAMS_LIST:
+        opponent = config.TEAM_PAIRS.get(team)
+        if not opponent or team in seen:
+            continue
+        seen.update((team, opponent))
+        sides = []
+        for shooter_team, target in ((team, opponent), (opponent, team)):
+            fired = board_stats(target)
+            shooter = fired.shooter(shooter_team) if fired else None
+            if shooter is None:
+                sides.append(f"**{config.TEAM_DISPLAY.get(shooter_team, shooter_team)}** –")
+                continue
+            sides.append(
+                f"**{config.TEAM_DISPLAY.get(shooter_team, shooter_team)}** 🚢 `{len(shooter.sunk)}` sunk · "
+                f"🎯 `{shooter.hits}/{shooter.shots}` · 🔥 `{shooter.streak}`"
+            )
+        lines.append(" ⚔️ ".join(sides))
+
+    if not lines:
+        await ctx.send("⚠️ No matches are set up.")
+        return
+    await ctx.send("🏆 **Scoreboard**\n" + "\n".join(lines))
+
+@bot.command(name="leaderboard")
+async def leaderboard(ctx, season: str = None):
+    teams, players = await asyncio.wrap_future(archive.run(archive.leaderboard, season))
+    season = season or archive.SEASON
+    if not teams:
+        await ctx.send(f"🏆 No archived matches for season `{season}` yet.")
+        return
+
+    lines = [f"🏆 **Leaderboard — season {season}**", "", "**Crews**"]
+    for rank, row in enumerate(teams, 1):
+        accuracy = row["hits"] / row["shots"] * 100 if row["shots"] else 0
+        lines.append(
+            f"`{rank}.` **{config.TEAM_DISPLAY.get(row['team'], row['team'])}** — {row['wins']}/{row['matches']} won · "
+            f"🚢 {row['sunk']} sunk · 🎯 {accuracy:.1f}%"
+        )
+    if players:
+        lines += ["", "**Sharpshooters**"]
+        for rank, row in enumerate(players, 1):
+            lines.append(f"`{rank}.` {row['player']} ({row['team']}) — 🎯 {row['hits']}/{row['shots']} · 🚢 {row['sunk']} sunk")
+    await ctx.send("\n".join(lines))
+
+@bot.command(name="matchhistory")
+async def matchhistory(ctx, team: str = None):
+    team = team or get_team_from_channel(ctx.channel.id)
+    if not team:
+        await ctx.send("⚠️ Usage: `!matchhistory <team>`.")
+        return
+
+    matches = await asyncio.wrap_future(archive.run(archive.team_history, team))
+    if not matches:
+        await ctx.send(f"📜 No archived matches for `{team}`.")
+        return
+
+    lines = [f"📜 **Match history for {config.TEAM_DISPLAY.get(team, team)}** (newest first)"]
+    for row in matches:
+        if row["ended_at"] is None:
+            result = "⚔️ in progress"
+        else:
+            result = "🏆 won" if row["won"] else "💀 lost"
+        lines.append(
+            f"`{row['started_at'][:10]}` {row['match']} ({row['season']}) — {result} · "
+            f"🎯 {row['hits']}/{row['shots']} · 🚢 {row['sunk']} sunk"
+        )
+    await ctx.send("\n".join(lines))
+
 @bot.command()
 async def use_skip(ctx):
     global last_shot_time 
@@ -330,8 +738,10 @@ async def use_skip(ctx):
     if not team:
             await ctx.send("⚠️ Could not determine team from this channel.")
             return
+    tracing.annotate(team=team, match=match_id(team))
     
-    last = get_last_shot(team)
+    with tracing.span("load"):
+        last = get_last_shot(team)
     if not last:
         await ctx.send(f"⚠️ No shot history found for {config.TEAM_DISPLAY[team]}.")
         return
@@ -346,7 +756,9 @@ async def use_skip(ctx):
         return
 
     tokens[team] -= 1
-    save_skip_tokens(tokens)
+    with tracing.span("persist"):
+        save_skip_tokens(tokens)
+        match_log.note(match_id(team), team, {"type": "skip_used", "coord": last["coord"]})
 
     # clear cooldown
     if team in last_shot_time:
@@ -359,34 +771,52 @@ async def use_skip(ctx):
     )
 
 @bot.command(name="current_task")
+@coalesce.read_command
 async def current_task(ctx):
     team = get_team_from_channel(ctx.channel.id)
     if not team:
         await ctx.send("Could not detect your team.")
         return
 
-    boards = {}
-    for t in config.TEAMS_LIST:
-        if board_exists(t):
-            boards[t] = load_board(t)
+    boards = load_boards(config.TEAMS_LIST)
 
     await current_task_command(team, boards, ctx)
 
 @bot.command()
 async def select(ctx, coord: str):
-    team = get_team_from_channel(ctx.channel.id)
+    with tracing.span("resolve_context"):
+        team = get_team_from_channel(ctx.channel.id)
     if not team:
         await ctx.send("You're not on a team.")
         return
-
-    boards = {}
-    for t in config.TEAMS_LIST:
-        if board_exists(t):
-            boards[t] = load_board(t)
+    tracing.annotate(team=team, match=match_id(team))
 
     # normalize coordinate format
-    coord = coord.upper().replace(",", "")
-    result = handle_tile_selection(ctx.bot, team, coord, boards, config.TEAM_CHANNELS)
+    with tracing.span("parse"):
+        coord = coord.upper().replace(",", "")
+
+    # bad coordinates, cooldowns and repeat clicks are turned away from memory, before any
+    # board is read, and only one !select per team is ever past this point
+    with tracing.span("precheck"):
+        error = precheck_selection(team, coord)
+    if error:
+        await ctx.send(error)
+        return
+    if not begin_shot(team):
+        await ctx.send("⏳ Steady, Captain! Your crew already has a shot on its way.")
+        return
+
+    try:
+        await _fire(ctx, team, coord)
+    finally:
+        end_shot(team)
+
+async def _fire(ctx, team, coord):
+    with tracing.span("load"):
+        boards = load_boards([config.TEAM_PAIRS.get(team)])
+
+    with tracing.span("handle_tile_selection", coord=coord):
+        result = handle_tile_selection(ctx.bot, team, coord, boards, config.TEAM_CHANNELS, player=ctx.author)
 
     if "error" in result:
         await ctx.send(result["error"])
@@ -404,23 +834,28 @@ async def select(ctx, coord: str):
         role_mention = "@refs"  # fallback in case role not found
 
     # aaaand now send messages
-    if result["team_img"]:
+    if result.get("team_img"):
         try:
-            with open(result["team_img"], "rb") as f:
-                picture = discord.File(f)
+            with tracing.span("send", what="team_img"):
+                image = await storage.read_asset(result["team_img"])
+                picture = discord.File(io.BytesIO(image), filename=os.path.basename(result["team_img"]))
                 await team_channel.send(file=picture)
         except FileNotFoundError:
             print("no image associated with this message")
-    await team_channel.send(result["team_msg"] + f"\n\n ||{role_mention}||")
+    with tracing.span("send", what="team_msg"):
+        await team_channel.send(result["team_msg"] + f"\n\n ||{role_mention}||")
 
-    if result["opponent_img"]:
+    if result.get("opponent_img"):
         try:
-            with open(result["opponent_img"], "rb") as f:
-                picture = discord.File(f)
+            with tracing.span("send", what="opponent_img"):
+                image = await storage.read_asset(result["opponent_img"])
+                picture = discord.File(io.BytesIO(image), filename=os.path.basename(result["opponent_img"]))
                 await team_channel.send(file=picture)
         except FileNotFoundError:
             print("no image associated with this message")    
-    await opponent_channel.send(result["opponent_msg"])
+    if opponent_channel and result["opponent_msg"]:
+        with tracing.span("send", what="opponent_msg"):
+            await opponent_channel.send(result["opponent_msg"])
 
 @bot.command(name="refsguide")
 async def refs_guide(ctx):
@@ -464,7 +899,7 @@ async def refs_guide(ctx):
     msg6 = (
         "### 5️⃣ **Random Events (Optional)**\n"
         "• Use `!eventstart [eventtype]` to trigger events for all teams.\n"
-        "• When an event concludes, run `!eventend [eventtype] complete|fail` in that team's channel to resolve it.\n\n"
+        "• When an event concludes, run `!eventend [eventtype|eventid] complete|fail` in that team's channel to resolve it.\n\n"
         "*Skip Reward:* Occurs on ocean tiles — success grants a skip token.\n"
         "*No Damage Reward:* Occurs on ship tiles — success restores the tile, failure destroys it."
     )
@@ -524,10 +959,7 @@ async def intro(ctx):
         [f"{ship.title()} ({size} tiles): {SHIP_EMOJIS.get(ship, '⬜') * size}" for ship, size in SHIP_TYPES.items()]
     ) + "\n⚓ ⚓ ⚓"
 
-    boards = {}
-    for t in config.TEAMS_LIST:
-        if board_exists(t):
-            boards[t] = load_board(t)
+    boards = load_boards(config.TEAMS_LIST)
 
 
     for team, channel_id in config.TEAM_CHANNELS.items():
@@ -672,11 +1104,18 @@ async def battleship_commands(ctx):
     embed.add_field(name="!view_enemy_board", value="View your enemy's current board (without ships, of course!).", inline=False)
     embed.add_field(name="!team", value="Show your team name.", inline=False)
     embed.add_field(name="!place <ship> <h/v> <start>", value="Place a ship on your board. Example: `!place carrier h A3`", inline=False)
+    embed.add_field(name="!placefleet <ship> <h/v> <start>; ...", value="Place several ships at once. Example: `!placefleet carrier h A1; battleship v C3`", inline=False)
     embed.add_field(name="!remove <ship>", value="Remove a ship from your board.", inline=False)
+    embed.add_field(name="!autoplace [notouch] [edge|center]", value="Randomly place any ships you haven't placed yet.", inline=False)
     embed.add_field(name="!current_task", value="Show your team's current task.", inline=False)
+    embed.add_field(name="!heatmap [team]", value="Show where the enemy's remaining ships most likely are.", inline=False)
     embed.add_field(name="!select <coord>", value="Select a coordinate to shoot at. Example: `!select B5`", inline=False)
     embed.add_field(name="!skips", value="Check your skip tokens.", inline=False)
     embed.add_field(name="!use_skip", value="Use a skip token to fire again immediately after a miss.", inline=False)
+    embed.add_field(name="!scoreboard", value="Show ships sunk, hits and hit streaks for every match.", inline=False)
+    embed.add_field(name="!leaderboard [season]", value="Show the best crews and sharpshooters of the season.", inline=False)
+    embed.add_field(name="!matchhistory [team]", value="Show a crew's past matches.", inline=False)
+    embed.add_field(name="!recap [team]", value="Show the latest shots, skips and events of your match.", inline=False)
     
     await ctx.send(embed=embed)
 
@@ -690,18 +1129,51 @@ async def refs_battleship_commands(ctx):
     
     embed.add_field(name="!lockboard [team]", value="Lock a team's board to prevent further changes.", inline=False)
     embed.add_field(name="!unlockboard [team]", value="Unlock a team's board to allow changes.", inline=False)
+    embed.add_field(name="!autofill [team|all] [notouch] [edge|center] [lock]", value="Randomly complete unfinished fleets, optionally locking the boards.", inline=False)
     embed.add_field(name="!board_status <team>", value="View the status of a team's board.", inline=False)
+    embed.add_field(name="!history [team]", value="List recent versions of a team's board.", inline=False)
+    embed.add_field(name="!undo [team]", value="Undo the last change to a team's board.", inline=False)
+    embed.add_field(name="!rollback <version> [team]", value="Restore a team's board to an earlier version.", inline=False)
+    embed.add_field(name="!replay <event|timestamp> [team]", value="Show a team's board as it was at a point of the match.", inline=False)
     embed.add_field(name="!team_progress", value="View progress of all teams.", inline=False)
+    embed.add_field(name="!reloadconfig", value="Apply changes to data/match_config.json (teams, channels, pairings) without a restart.", inline=False)
     embed.add_field(name="!intro", value="Send the introductory message to all team channels.", inline=False)
     embed.add_field(name="!beginbattle", value="Once boards are locked, start the battle and send the battle instructions.", inline=False)
     embed.add_field(name="!eventstart <event_type>", value="Start a random event for all teams.", inline=False)
-    embed.add_field(name="!eventend <event_type> <complete|fail>", value="End a random event for the current team.", inline=False)
+    embed.add_field(name="!eventend <event_type|event_id> <complete|fail>", value="End an event for the current team.", inline=False)
+    embed.add_field(name="!events [team]", value="List the active events on a team's board.", inline=False)
     embed.add_field(name="!matchsummary", value="Send a match summary to the spectator channel.", inline=False)
+    embed.add_field(name="!stats", value="Show command latency, file I/O and message counts.", inline=False)
+    embed.add_field(name="!tracesample <rate>", value="Trace this fraction (0-1) of state-changing commands.", inline=False)
+    embed.add_field(name="!profile start|stop [seconds] [mem]", value="Profile the live bot for a while and post the hottest functions.", inline=False)
     embed.add_field(name="!win <winner>", value="Declare a winner and send victory messages.", inline=False)
 
     await ctx.send(embed=embed)
 
 # Random Event Handlers 
+@bot.command(name="events")
+async def list_events(ctx, team: str = None):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    team = resolve_ref_team(ctx, team)
+    if not team:
+        await ctx.send(f"❌ Specify a team: {', '.join(config.TEAMS_LIST)}.")
+        return
+
+    events = active_events(team)
+    if not events:
+        await ctx.send(f"🌊 No active events on `{team}`'s board.")
+        return
+
+    lines = [f"• `{event_id}` at **{coord}**" for event_id, (coord, _) in sorted(events.items())]
+    await ctx.send(
+        f"🌊 **Active events for {config.TEAM_DISPLAY.get(team, team)}**\n"
+        + "\n".join(lines)
+        + "\n\nEnd one with `!eventend <event_id> complete|fail` in the team's channel."
+    )
+
 @bot.command(name="eventstart")
 async def start_event(ctx, event_type: str):
     if not user_has_refs_role(ctx):
@@ -709,8 +1181,7 @@ async def start_event(ctx, event_type: str):
         return
 
     try:
-        with open("data/random_events.json") as f:
-            events_data = json.load(f)
+        events_data = read_json("data/random_events.json", "random_events")
     except Exception as e:
         await ctx.send("⚠️ Could not load event definitions.")
         return
@@ -723,8 +1194,11 @@ async def start_event(ctx, event_type: str):
     deadline = now + timedelta(hours=events_data[event_type]["duration_hours"])
     unix_timestamp = int(deadline.timestamp()) 
 
+    tracing.annotate(event=event_type)
+    # every board gets its event (and is saved) together before anyone hears about it
+    results = apply_event_to_boards(event_type, list(config.TEAM_CHANNELS), events_data)
     for team, channel_id in config.TEAM_CHANNELS.items():
-        coord, err = apply_event_to_board(event_type, team, events_data)
+        event, err = results[team]
         channel = bot.get_channel(int(channel_id))
         if err:
             await channel.send(f"⚠️ `{event_type.title()}` tried to strike, but no valid targets on your board!")
@@ -733,7 +1207,7 @@ async def start_event(ctx, event_type: str):
         await channel.send(
             f"## 🌊 **A strange disturbance stirs the seas...** 🌊\n\n"
             f"⚠️ All hands on deck! A new threat has surfaced: **{event_type.upper()}** {events_data[event_type]['emoji']}\n"
-            f"Something is happening at **{coord}**!\n"
+            f"Something is happening at **{event['coord']}**! (event `{event['event_id']}`)\n"
             f"{events_data[event_type]['details']}\n\n"
             f"⏳ You must complete your task <t:{unix_timestamp}:R>, or the sea shall claim that tile!"
         )
@@ -754,13 +1228,13 @@ async def start_event(ctx, event_type: str):
     await ctx.send(f"📣 `{event_type}` event has been launched across all teams.")
 
 @bot.command(name="eventend")
-async def end_event(ctx, event_type: str, result: str):
+async def end_event(ctx, event_ref: str, result: str):
     if not user_has_refs_role(ctx):
         await ctx.send("❌ You need the `refs` role to use this command.")
         return
 
     if result not in ["complete", "fail"]:
-        await ctx.send("⚠️ Usage: `!eventend [event_type] complete|fail`")
+        await ctx.send("⚠️ Usage: `!eventend [event_type|event_id] complete|fail`")
         return
 
     team = get_team_from_channel(ctx.channel.id)
@@ -770,24 +1244,21 @@ async def end_event(ctx, event_type: str, result: str):
 
     # load event data
     try:
-        with open("data/random_events.json") as f:
-            events_data = json.load(f)
+        events_data = read_json("data/random_events.json", "random_events")
     except Exception:
         await ctx.send("❌ Could not load events config.")
         return
 
-    event_def = events_data.get(event_type)
-    if not event_def:
-        await ctx.send(f"❌ Unknown event type: `{event_type}`")
-        return
-
-    reward = event_def.get("reward")
+    tracing.annotate(team=team, match=match_id(team), event=event_ref)
 
     # resolve the event
-    success = resolve_event_on_board(event_type, team, result, events_data=events_data)
-    if not success:
-        await ctx.send(f"⚠️ No active `{event_type}` event found to resolve for `{team}`.")
+    event, err = resolve_event_on_board(event_ref, team, result, events_data=events_data)
+    if err:
+        await ctx.send(f"⚠️ {err}")
         return
+
+    event_type = event["event_type"]
+    reward = events_data.get(event_type, {}).get("reward")
     
     team_display = config.TEAM_DISPLAY[team]
     spec_channel = bot.get_channel(config.SPECTATOR_CHANNEL_ID)
@@ -840,17 +1311,98 @@ async def end_event(ctx, event_type: str, result: str):
 
     ctx.send(f"{event_type} event resolved for {team}: {result}")
 
+@bot.command(name="stats")
+async def stats(ctx):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    io_stats = storage.stats()
+    summary = metrics.format_summary() + (
+        f"\n\n**Storage:** {io_stats['pending']} queued | {io_stats['written']} written | "
+        f"{io_stats['coalesced']} coalesced | {io_stats['errors']} failed"
+    )
+    if io_stats["last_error"]:
+        summary += f"\n> last error: `{io_stats['last_error']}`"
+    await ctx.send(summary)
+
+@bot.command(name="tracesample")
+async def trace_sample(ctx, rate: float):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    tracing.set_sample_rate(rate)
+    await ctx.send(f"🧵 Tracing `{tracing.TRACE_SAMPLE_RATE * 100:g}%` of state-changing commands to `{tracing.TRACE_FILE}`.")
+
+@bot.command(name="reloadconfig")
+async def reload_config(ctx):
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    started = time.perf_counter()
+    try:
+        summary = match_config.reload(add_teams=add_teams)
+    except FileNotFoundError:
+        await ctx.send(f"⚠️ There's no `{match_config.PATH}`: the match setup comes from `config.py`. Write one with `python -m utils.match_config init`.")
+        return
+    except ValueError as e:
+        await ctx.send(f"❌ `{match_config.PATH}` was not applied, the current setup stays: {e}")
+        return
+    await ctx.send(f"🔄 Match setup reloaded in `{(time.perf_counter() - started) * 1000:.1f}ms`: {summary}.")
+
+async def post_profile(channel):
+    report = profiler.stop()
+    if report is None:
+        return
+    preview = "\n".join(profiler.top_functions(report))
+    file = discord.File(io.BytesIO(report.encode()), filename=f"profile-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.txt")
+    await channel.send(f"🩺 **Profile finished.** Hottest functions:\n```\n{preview[:1800]}\n```", file=file)
+
+async def stop_profile_after(channel, seconds):
+    await asyncio.sleep(seconds)
+    await post_profile(channel)
+
+profile_timer = None
+
+@bot.command(name="profile")
+async def profile(ctx, action: str, seconds: Optional[int] = None, mode: str = None):
+    # Optional lets discord.py skip `seconds` when it isn't a number, so `!profile start mem` works
+    global profile_timer
+
+    if not user_has_refs_role(ctx):
+        await ctx.send("❌ You need the `refs` role to use this command.")
+        return
+
+    action = action.lower()
+    if action == "start":
+        seconds = max(1, min(seconds or profiler.DEFAULT_SECONDS, profiler.MAX_SECONDS))
+        memory = (mode or "").lower() in ("mem", "memory")
+        if not profiler.start(memory=memory):
+            await ctx.send(f"⚠️ Already profiling ({profiler.elapsed():.0f}s so far). Use `!profile stop` to finish early.")
+            return
+        profile_timer = asyncio.create_task(stop_profile_after(ctx.channel, seconds))
+        extra = " with memory snapshots" if memory else ""
+        await ctx.send(f"🩺 Profiling the bot for **{seconds}s**{extra}. Results will be posted here.")
+    elif action == "stop":
+        if not profiler.is_running():
+            await ctx.send("⚠️ No profile is running.")
+            return
+        if profile_timer:
+            profile_timer.cancel()
+            profile_timer = None
+        await post_profile(ctx.channel)
+    else:
+        await ctx.send("⚠️ Usage: `!profile start|stop [seconds] [mem]`")
+
 @bot.command()
 async def matchsummary(ctx):
     if not user_has_refs_role(ctx):
         await ctx.send("❌ You need the `refs` role to use this command.")
         return
 
-    boards = {}
-    for t in config.TEAMS_LIST:
-        boards[t] = load_board(t)
-
-    summary = generate_match_summary(boards)
+    summary = generate_match_summary()
     await announce_to_spectators(ctx.bot, summary)
 
     await ctx.send("📣 Match summary sent to the spectator channel!")
@@ -869,13 +1421,11 @@ async def win(ctx, winner: str):
         return
 
     try:
-        board_winner = load_board(winner)
-        board_loser = load_board(loser)
+        summary = generate_match_summary([winner, loser])
     except Exception:
         await ctx.send("❌ Error loading boards. Are they complete?")
         return
 
-    summary = generate_match_summary(board_winner, board_loser)
     winner_name = config.TEAM_DISPLAY[winner]
     loser_name = config.TEAM_DISPLAY[loser]
 
@@ -919,6 +1469,7 @@ async def win(ctx, winner: str):
     spec_embed.set_image(url=SPECTATOR_GIF)
 
     await ctx.send("📣 Sending post-match messages...")
+    archive.finish_match(match_id(winner), winner)
 
     # send messages
     winner_channel = bot.get_channel(config.TEAM_CHANNELS[winner])
@@ -937,22 +1488,13 @@ async def win(ctx, winner: str):
 @bot.event
 async def on_ready():
     print(f"Logged in as {bot.user}!")
-    for team in config.TEAMS_LIST:
-        print(f"Board for {team} generating or loading...")
-        load_or_generate_board(team)
-
-    tokens = load_skip_tokens()
-    save_skip_tokens(tokens)
-
-    # ensure active skips initialized
-    active_skips = load_active_skips()
-    save_active_skips(active_skips)
-
-    print("Skip token and active skip files initialized.")
+    await startup.run(load_or_generate_board)
+    await web.start(config.WEB_HOST, config.WEB_PORT)
+    match_config.watch(add_teams=add_teams)
 
 # Load Ship Definitions
-with open("data/ship_tiles.json") as f:
-    SHIP_DEFINITIONS = json.load(f)
+SHIP_DEFINITIONS = read_json("data/ship_tiles.json", "ship_tiles")
 
 # Run Bot
-bot.run(config.TOKEN)
+if __name__ == "__main__":
+    bot.run(config.TOKEN)
@@ -1,6 +1,7 @@
 from dotenv import load_dotenv # type: ignore
 import os
 import discord # type: ignore
+from datetime import datetime
 
 load_dotenv()
 
@@ -42,5 +43,50 @@ SPECTATOR_CHANNEL_ID =   # your #spectator-channel ID
 
 TOKEN = os.getenv("DISCORD_TOKEN")
 
+# local web server: the live spectator dashboard at / and prometheus metrics at /metrics
+# (port 0 disables it; METRICS_PORT is the old name for WEB_PORT). set WEB_HOST to 0.0.0.0 to
+# let spectators on other machines in
+WEB_PORT = int(os.getenv("WEB_PORT") or os.getenv("METRICS_PORT") or "9108")
+WEB_HOST = os.getenv("WEB_HOST", "127.0.0.1")
+# bearer token for the API's full board views (unset = only the spectator views are served)
+API_TOKEN = os.getenv("API_TOKEN")
+
+# fraction of mutating commands to trace (0 = off, 1 = all) and where the spans go
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join("data", "traces.jsonl"))
+
+# post a targeting heatmap of the struck board to the spectator channel after every !select
+HEATMAP_ON_SELECT = os.getenv("HEATMAP_ON_SELECT", "0") == "1"
+
+# board versions kept per team for the ref !history / !undo / !rollback commands
+HISTORY_LIMIT = int(os.getenv("HISTORY_LIMIT", "100"))
+
+# match seed for new boards: each team's board is dealt from a seed derived from it, so a match
+# can be set up again exactly (unset = a random seed, still recorded in every board file)
+BOARD_SEED = int(os.getenv("BOARD_SEED")) if os.getenv("BOARD_SEED") else None
+
+# on-disk format for board files: "json" (readable) or "binary" (compact, much faster to load and
+# save). switch existing boards over with python -m utils.migrate_boards
+BOARD_FORMAT = os.getenv("BOARD_FORMAT", "json")
+
+# board and state files are written by a background thread (utils/storage.py). "always" fsyncs
+# each file before moving on, "never" leaves it to the OS (faster, but a power cut can lose
+# the last few saves)
+STORAGE_FSYNC = os.getenv("STORAGE_FSYNC", "always")
+
+# seconds during which a repeat of the same read-only command (!view_enemy_board, !current_task,
+# !skips...) in the same channel gets a 👆 on the earlier answer instead of a new copy
+# (0 = always answer). any board or skip token change ends the window at once
+COALESCE_WINDOW = float(os.getenv("COALESCE_WINDOW", "3"))
+
+# the match setup (teams, names, colors, channels, pairings) can be kept in this file instead of
+# the constants above and changed while the bot runs (see utils/match_config.py). it's checked
+# for changes every MATCH_CONFIG_POLL seconds (0 = only on the ref !reloadconfig command)
+MATCH_CONFIG_FILE = os.getenv("MATCH_CONFIG_FILE", os.path.join("data", "match_config.json"))
+MATCH_CONFIG_POLL = float(os.getenv("MATCH_CONFIG_POLL", "5"))
+
+# season that finished matches are archived under for !leaderboard (default: the current year)
+SEASON = os.getenv("SEASON") or str(datetime.now().year)
+
 intents = discord.Intents.all()
 intents.message_content = True
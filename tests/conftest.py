@@ -0,0 +1,38 @@
+# config.py ships with blanks to fill in (channel IDs, see the README), and until they're filled
+# in it doesn't even parse. the tests of modules that read config are skipped until then; the
+# rest run either way.
+
+import pytest
+
+try:
+    import config  # noqa: F401
+    CONFIG_ERROR = None
+except SyntaxError as e:
+    CONFIG_ERROR = e
+
+# test files that import a module reading config
+NEEDS_CONFIG = {
+    "test_archive.py",
+    "test_history.py",
+    "test_match_config.py",
+    "test_match_log.py",
+    "test_serializers.py",
+    "test_storage.py",
+}
+
+
+def pytest_ignore_collect(collection_path, config):
+    if CONFIG_ERROR is not None and collection_path.name in NEEDS_CONFIG:
+        return True
+
+
+def pytest_report_header(config):
+    if CONFIG_ERROR is not None:
+        return f"config.py doesn't parse yet ({CONFIG_ERROR.msg}), skipping: {', '.join(sorted(NEEDS_CONFIG))}"
+
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    """Runs the test from an empty directory, for modules that use paths under data/."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,112 @@
+import pytest
+
+from utils import archive
+
+MATCH = "red-vs-blue"
+
+
+@pytest.fixture(autouse=True)
+def fresh_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "DB_PATH", str(tmp_path / "archive.sqlite3"))
+    monkeypatch.setattr(archive, "_db", None)
+    monkeypatch.setattr(archive, "_open", {})
+    yield
+    archive.run(lambda db: db.close()).result()
+
+
+def shot(coord, hit=False, sunk=False, ts=None, player_id="7"):
+    return {"coord": coord, "hit": hit, "sunk": sunk, "ts": ts or f"ts-{coord}", "player_id": player_id, "player": "Pat"}
+
+
+def query(sql, *args):
+    return archive.run(lambda db: [tuple(row) for row in db.execute(sql, args)]).result()
+
+
+def team_totals():
+    return {row[0]: row[1:] for row in query("SELECT team, matches, wins, shots, hits, sunk FROM team_totals")}
+
+
+def test_shots_feed_every_total():
+    archive.record_shot(MATCH, "red", "blue", shot("A1", hit=True))
+    archive.record_shot(MATCH, "red", "blue", shot("A2", hit=True, sunk=True))
+    archive.record_shot(MATCH, "blue", "red", shot("C3", player_id=None))
+    assert team_totals() == {"red": (0, 0, 2, 2, 1), "blue": (0, 0, 1, 0, 0)}
+    assert query("SELECT player, team, shots, hits, sunk FROM player_totals") == [("Pat", "red", 2, 2, 1)]
+    assert query("SELECT team, shots, hits, sunk FROM match_teams ORDER BY team") == [("blue", 1, 0, 0), ("red", 2, 2, 1)]
+
+
+def test_finish_match():
+    archive.record_shot(MATCH, "red", "blue", shot("A1", hit=True))
+    match_id = archive.finish_match(MATCH, "red").result()
+    assert query("SELECT id, winner FROM matches WHERE ended_at IS NOT NULL") == [(match_id, "red")]
+    assert team_totals() == {"red": (1, 1, 1, 1, 0), "blue": (1, 0, 0, 0, 0)}
+    leaders, players = archive.run(archive.leaderboard).result()
+    assert [team["team"] for team in leaders] == ["red", "blue"]
+    assert players[0]["player"] == "Pat"
+
+
+def test_finishing_twice_counts_the_match_once():
+    archive.record_shot(MATCH, "red", "blue", shot("A1"))
+    first = archive.finish_match(MATCH, "red").result()
+    assert archive.finish_match(MATCH, "red").result() == first
+    assert query("SELECT COUNT(*) FROM matches") == [(1,)]
+    assert team_totals() == {"red": (1, 1, 1, 0, 0), "blue": (1, 0, 0, 0, 0)}
+
+
+def test_finishing_again_with_another_winner_corrects_it():
+    archive.record_shot(MATCH, "red", "blue", shot("A1"))
+    match_id = archive.finish_match(MATCH, "red").result()
+    archive.finish_match(MATCH, "blue").result()
+    assert query("SELECT id, winner FROM matches") == [(match_id, "blue")]
+    assert query("SELECT team, won FROM match_teams ORDER BY team") == [("blue", 1), ("red", 0)]
+    assert team_totals() == {"red": (1, 0, 1, 0, 0), "blue": (1, 1, 0, 0, 0)}
+
+
+def test_a_rematch_opens_a_new_match():
+    archive.record_shot(MATCH, "red", "blue", shot("A1"))
+    archive.finish_match(MATCH, "red").result()
+    archive.record_shot(MATCH, "red", "blue", shot("B1", ts="later"))
+    archive.finish_match(MATCH, "blue").result()
+    assert query("SELECT winner FROM matches ORDER BY id") == [("red",), ("blue",)]
+    assert team_totals() == {"red": (2, 1, 2, 0, 0), "blue": (2, 1, 0, 0, 0)}
+
+
+def test_a_new_season_opens_a_new_match(monkeypatch):
+    monkeypatch.setattr(archive, "SEASON", "one")
+    archive.finish_match(MATCH, "red").result()
+    monkeypatch.setattr(archive, "SEASON", "two")
+    archive.finish_match(MATCH, "blue").result()
+    assert query("SELECT season, winner FROM matches ORDER BY id") == [("one", "red"), ("two", "blue")]
+    # a corrected result in the new season moves that season's wins only
+    archive.finish_match(MATCH, "red").result()
+    assert query("SELECT season, team, wins FROM team_totals ORDER BY season, team") == [
+        ("one", "blue", 0), ("one", "red", 1), ("two", "blue", 0), ("two", "red", 1),
+    ]
+
+
+def test_rollback_retracts_and_restores_shots():
+    archive.record_shot(MATCH, "red", "blue", shot("A1", hit=True))
+    archive.record_shot(MATCH, "red", "blue", shot("A2", hit=True, sunk=True))
+    archive.record_rollback(MATCH, "blue", [("A2", "ts-A2")])
+    assert query("SELECT coord, retracted FROM shots ORDER BY id") == [("A1", 0), ("A2", 1)]
+    assert team_totals()["red"] == (0, 0, 1, 1, 0)
+    assert query("SELECT player, shots, hits, sunk FROM player_totals") == [("Pat", 1, 1, 0)]
+    assert query("SELECT shots, hits, sunk FROM match_teams WHERE team = 'red'") == [(1, 1, 0)]
+
+    # retracting again, or a shot the archive never saw, changes nothing
+    archive.record_rollback(MATCH, "blue", [("A2", "ts-A2"), ("J9", "ts-J9")])
+    assert team_totals()["red"] == (0, 0, 1, 1, 0)
+
+    archive.record_rollback(MATCH, "blue", [], [("A2", "ts-A2")])
+    assert query("SELECT coord, retracted FROM shots ORDER BY id") == [("A1", 0), ("A2", 0)]
+    assert team_totals()["red"] == (0, 0, 2, 2, 1)
+    assert query("SELECT player, shots, hits, sunk FROM player_totals") == [("Pat", 2, 2, 1)]
+
+
+def test_rollback_only_touches_the_shot_it_names():
+    archive.record_shot(MATCH, "red", "blue", shot("A1", ts="first"))
+    archive.record_rollback(MATCH, "blue", [("A1", "first")])
+    archive.record_shot(MATCH, "red", "blue", shot("A1", ts="second"))
+    archive.record_rollback(MATCH, "red", [("A1", "second")])
+    assert query("SELECT ts, retracted FROM shots ORDER BY id") == [("first", 1), ("second", 0)]
+    assert team_totals()["red"] == (0, 0, 1, 0, 0)
@@ -0,0 +1,95 @@
+import json
+import os
+import random
+
+import pytest
+
+from utils import catalog
+
+
+def write_source(path, count):
+    tiles = [{"id": i, "count": i % 3 + 1} for i in range(count)]
+    path.write_text(json.dumps({"tiles": tiles}), encoding="utf-8")
+    return tiles
+
+
+def read_catalog(path):
+    return json.loads(path.read_text(encoding="utf-8"))["tiles"]
+
+
+def test_name_cycle_deals_every_name_before_repeating():
+    cycle = catalog.NameCycle(["a", "b", "c"], random.Random(1))
+    dealt = [cycle.next() for _ in range(9)]
+    for start in (0, 3, 6):
+        assert sorted(dealt[start:start + 3]) == ["a", "b", "c"]
+    assert all(x != y for x, y in zip(dealt, dealt[1:]))
+
+
+def test_name_assigner_rejects_bad_weights():
+    with pytest.raises(ValueError):
+        catalog.NameAssigner([(["a"], -1)])
+    with pytest.raises(ValueError):
+        catalog.NameAssigner([(["a"], 0)])
+    with pytest.raises(ValueError):
+        catalog.NameAssigner([([], 1)])
+
+
+def test_iter_tiles_reads_json_and_json_lines(tmp_path):
+    tiles = write_source(tmp_path / "tiles.json", 5)
+    assert list(catalog.iter_tiles(str(tmp_path / "tiles.json"))) == tiles
+    lines = tmp_path / "tiles.jsonl"
+    lines.write_text("".join(json.dumps(t) + "\n" for t in tiles) + "\n", encoding="utf-8")
+    assert list(catalog.iter_tiles(str(lines))) == tiles
+    (tmp_path / "list.json").write_text(json.dumps(tiles), encoding="utf-8")
+    assert list(catalog.iter_tiles(str(tmp_path / "list.json"))) == tiles
+
+
+def test_load_pool(tmp_path):
+    assert catalog.load_pool("osrs_bosses") == (catalog.OSRS_BOSSES, 1.0)
+    (tmp_path / "raids.txt").write_text("Cox\n\nToB\n", encoding="utf-8")
+    assert catalog.load_pool(f"{tmp_path / 'raids.txt'}:2") == (["Cox", "ToB"], 2.0)
+    (tmp_path / "names.json").write_text('["x", 1]', encoding="utf-8")
+    assert catalog.load_pool(str(tmp_path / "names.json")) == (["x", "1"], 1.0)
+
+
+def test_build_catalog_names_every_tile(tmp_path):
+    tiles = write_source(tmp_path / "tiles.json", 12)
+    output = tmp_path / "out.json"
+    counts = catalog.build_catalogs(str(tmp_path / "tiles.json"), str(output), [(["a", "b", "c"], 1)], [(None, 5)])
+    assert counts == {str(output): 12}
+    built = read_catalog(output)
+    assert [{k: v for k, v in t.items() if k != "name"} for t in built] == tiles
+    assert {t["name"] for t in built} == {"a", "b", "c"}
+    assert not [p for p in os.listdir(tmp_path) if p.startswith(".catalog-")]
+
+
+def test_variants_are_seeded(tmp_path):
+    write_source(tmp_path / "tiles.json", 20)
+    output = str(tmp_path / "out_{variant}.json")
+    pools = [(catalog.OSRS_BOSSES, 1)]
+    catalog.build_catalogs(str(tmp_path / "tiles.json"), output, pools, catalog.parse_variants(["w1=1", "w2=2", "again=1"], None))
+    w1, w2, again = (read_catalog(tmp_path / f"out_{name}.json") for name in ("w1", "w2", "again"))
+    assert w1 == again
+    assert w1 != w2
+    with pytest.raises(ValueError):
+        catalog.build_catalogs(str(tmp_path / "tiles.json"), str(tmp_path / "out.json"), pools, [("a", 1), ("b", 2)])
+
+
+def test_output_can_not_be_the_source(tmp_path):
+    source = tmp_path / "tiles.json"
+    tiles = write_source(source, 3)
+    with pytest.raises(ValueError):
+        catalog.build_catalogs(str(source), str(source), [(["a"], 1)], [(None, 1)])
+    assert read_catalog(source) == tiles
+
+
+def test_broken_source_keeps_the_existing_catalog(tmp_path):
+    output = tmp_path / "out.json"
+    output.write_text('{"tiles": [{"id": 1}]}', encoding="utf-8")
+    (tmp_path / "broken.json").write_text('{"tiles": [{"id": 1}, {"id"', encoding="utf-8")
+    with pytest.raises(ValueError):
+        catalog.build_catalogs(str(tmp_path / "broken.json"), str(output), [(["a"], 1)], [(None, 1)])
+    with pytest.raises(OSError):
+        catalog.build_catalogs(str(tmp_path / "missing.json"), str(output), [(["a"], 1)], [(None, 1)])
+    assert read_catalog(output) == [{"id": 1}]
+    assert sorted(os.listdir(tmp_path)) == ["broken.json", "out.json"]
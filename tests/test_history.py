@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+import pytest
+
+import config
+from utils import history
+
+
+@pytest.fixture(autouse=True)
+def fresh_history(monkeypatch):
+    monkeypatch.setattr(history, "_history", {})
+    monkeypatch.setattr(history, "_counters", {})
+    monkeypatch.setattr(config, "TEAM_PAIRS", {"red": "blue", "blue": "red"})
+
+
+def board(shots=()):
+    return {
+        "tiles": {coord: {"name": f"tile {coord}"} for coord in ("A1", "A2", "A3")},
+        "shots": {coord: {"by": "blue", "hit": False} for coord in shots},
+        "ships": {"destroyer": ["A2", "A3"]},
+        "locked": True,
+    }
+
+
+def record(team, b, reason="saved", based_on=None, tokens=None):
+    return history.record(team, b, reason, tokens or {}, {}, {}, based_on)
+
+
+def test_versions_are_numbered_per_team():
+    assert record("red", board()) == 1
+    assert record("red", board(["A1"])) == 2
+    assert record("blue", board()) == 1
+    assert history.current_version("red") == 2
+    assert [v.number for v in history.versions("red")] == [1, 2]
+    assert history.latest("red").board["shots"] == {"A1": {"by": "blue", "hit": False}}
+    assert history.get_version("red", 3) is None
+
+
+def test_versions_share_unchanged_parts():
+    first = board()
+    record("red", first)
+    second = history.thaw(history.latest("red").board)
+    second["shots"]["A1"] = {"by": "blue", "hit": False}
+    record("red", second)
+    old, new = (v.board for v in history.versions("red"))
+    assert new["tiles"] is old["tiles"]
+    assert new["ships"] is old["ships"]
+    assert new["shots"] is not old["shots"]
+
+
+def test_snapshots_are_independent_of_the_board():
+    b = board()
+    record("red", b)
+    b["shots"]["A1"] = {"by": "blue", "hit": False}
+    b["ships"]["destroyer"].append("A1")
+    stored = history.latest("red").board
+    assert stored["shots"] == {}
+    assert stored["ships"]["destroyer"] == ("A2", "A3")
+
+
+def test_thaw_gives_a_mutable_copy():
+    record("red", board(["A1"]))
+    frozen = history.latest("red").board
+    thawed = history.thaw(frozen)
+    thawed["shots"].pop("A1")
+    thawed["ships"]["destroyer"].append("A1")
+    assert "A1" in frozen["shots"]
+    assert frozen["ships"]["destroyer"] == ("A2", "A3")
+    assert thawed["locked"] is True
+
+
+def test_state_of_both_teams_is_kept():
+    record("red", board(), tokens={"red": 1, "blue": 2, "green": 3})
+    version = history.latest("red")
+    assert version.skip_tokens == {"red": 1, "blue": 2}
+    assert version.active_skips == {"red": False, "blue": False}
+
+
+def test_history_limit(monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_LIMIT", 3)
+    for _ in range(5):
+        record("red", board())
+    assert [v.number for v in history.versions("red")] == [3, 4, 5]
+    assert history.current_version("red") == 5
+
+
+def test_undo_target():
+    assert history.undo_target("red") is None
+    record("red", board())
+    assert history.undo_target("red") is None
+    record("red", board(["A1"]))
+    record("red", board(["A1", "A2"]))
+    assert history.undo_target("red").number == 2
+    # undo after a rollback steps back from the version rolled back to
+    record("red", board(), "rollback to v1", based_on=1)
+    assert history.undo_target("red") is None
+    record("red", board(["A1", "A2"]), "rollback to v3", based_on=3)
+    assert history.undo_target("red").number == 2
+
+
+def test_describe():
+    record("red", board(["A1", "A2"]), "shot A2")
+    version = history.latest("red")
+    assert history.describe(version, version.timestamp + timedelta(seconds=5)) == "`v1` · 5s ago · shot A2 · 2 shot(s)"
+    assert "1h 1m ago" in history.describe(version, version.timestamp + timedelta(seconds=3660))
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import config
+from utils import match_config
+
+
+def setup(**overrides):
+    teams = {
+        "red": {"name": "Red Crew", "color": "#FF0000", "channel": 111, "opponent": "blue"},
+        "blue": {"name": "Blue Crew", "color": "0x0000FF", "channel": "222", "opponent": "red"},
+        "green": {"color": 65280},
+    }
+    for team, entry in overrides.items():
+        if entry is None:
+            teams.pop(team)
+        else:
+            teams[team] = {**teams.get(team, {}), **entry}
+    return {"spectator_channel": 999, "teams": teams}
+
+
+def errors(data):
+    with pytest.raises(ValueError) as e:
+        match_config.parse(data)
+    return str(e.value)
+
+
+def test_parse():
+    settings = match_config.parse(setup())
+    assert settings["TEAMS_LIST"] == ["red", "blue", "green"]
+    assert settings["TEAM_DISPLAY"] == {"red": "Red Crew", "blue": "Blue Crew", "green": "green"}
+    assert settings["TEAM_COLORS"] == {"red": 0xFF0000, "blue": 0x0000FF, "green": 0x00FF00}
+    assert settings["TEAM_CHANNELS"] == {"red": 111, "blue": 222}
+    assert settings["TEAM_PAIRS"] == {"red": "blue", "blue": "red"}
+    assert settings["SPECTATOR_CHANNEL_ID"] == 999
+    assert set(settings) == set(match_config.FIELDS)
+
+
+@pytest.mark.parametrize("data", [None, [], {}, {"teams": {}}, {"teams": ["red"]}])
+def test_needs_teams(data):
+    assert "teams" in errors(data)
+
+
+def test_every_problem_is_reported():
+    message = errors(setup(red={"color": "red", "channel": "general"}, green={"name": "Green", "channel": 222}))
+    assert "teams.red.color" in message
+    assert "teams.red.channel must be a channel ID" in message
+    assert "teams.green.channel is already blue's channel" in message
+
+
+@pytest.mark.parametrize("opponent, problem", [
+    ("red", "teams.red.opponent can't be the team itself"),
+    ("purple", "teams.red.opponent 'purple' is not a team"),
+    ("green", "teams.red plays green, but green doesn't play red"),
+    (["blue"], "teams.red.opponent must be a team name"),
+    ({"team": "blue"}, "teams.red.opponent must be a team name"),
+    (7, "teams.red.opponent must be a team name"),
+])
+def test_bad_opponents(opponent, problem):
+    assert problem in errors(setup(red={"opponent": opponent}))
+
+
+def test_team_must_be_an_object():
+    data = setup()
+    data["teams"]["green"] = "yes"
+    assert "teams.green must be an object" in errors(data)
+
+
+def test_round_trip_through_current(monkeypatch):
+    settings = match_config.parse(setup())
+    for name in match_config.FIELDS:
+        monkeypatch.setattr(config, name, settings[name])
+    assert match_config.parse(json.loads(json.dumps(match_config.current()))) == settings
+
+
+def test_reload_applies_and_reports(tmp_path, monkeypatch):
+    for name in match_config.FIELDS:
+        monkeypatch.setattr(config, name, getattr(config, name))
+    monkeypatch.setattr(config, "TEAMS_LIST", ["red", "blue"])
+    path = tmp_path / "match_config.json"
+    path.write_text(json.dumps(setup()), encoding="utf-8")
+    added = []
+    summary = match_config.reload(str(path), add_teams=added.extend)
+    assert summary == "3 team(s), 1 match(es), added green"
+    assert added == ["green"]
+    assert config.TEAM_CHANNELS == {"red": 111, "blue": 222}
+    assert match_config.team_for_channel(222) == "blue"
+
+
+def test_broken_file_keeps_the_running_setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TEAMS_LIST", ["red", "blue"])
+    path = tmp_path / "match_config.json"
+    path.write_text(json.dumps(setup(red={"opponent": ["blue"]})), encoding="utf-8")
+    with pytest.raises(ValueError):
+        match_config.reload(str(path))
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(ValueError):
+        match_config.reload(str(path))
+    assert config.TEAMS_LIST == ["red", "blue"]
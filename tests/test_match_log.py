@@ -0,0 +1,201 @@
+import builtins
+import copy
+import json
+import os
+import random
+
+import pytest
+
+from utils import history, match_log, storage
+
+MATCH = "blue-vs-red"
+COORDS = [f"{row}{col}" for row in "ABCDEFGHIJ" for col in range(1, 11)]
+
+
+@pytest.fixture(autouse=True)
+def fresh_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(match_log, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(match_log, "CHECKPOINT_EVERY", 4)
+    monkeypatch.setattr(match_log, "_matches", {})
+    monkeypatch.setattr(history, "_history", {})
+    monkeypatch.setattr(history, "_counters", {})
+
+
+def new_board(seed):
+    rng = random.Random(seed)
+    return {"tiles": {coord: {"name": f"tile {rng.randrange(50)}"} for coord in COORDS}, "locked": False}
+
+
+def change(board, rng):
+    """A random edit of the kinds the game makes: shots, ships, tiles and plain fields."""
+    board = history.thaw(board)
+    kind = rng.randrange(5)
+    if kind == 0:
+        coord = rng.choice(COORDS)
+        board.setdefault("shots", {})[coord] = {"by": "blue", "hit": rng.random() < 0.5, "timestamp": str(rng.random())}
+    elif kind == 1:
+        start = rng.randrange(90)
+        board.setdefault("ships", {})[rng.choice(["cruiser", "destroyer"])] = COORDS[start:start + 2]
+    elif kind == 2 and board.get("ships"):
+        del board["ships"][rng.choice(sorted(board["ships"]))]
+    elif kind == 3:
+        board["tiles"][rng.choice(COORDS)] = {"name": "event", "event": "storm"}
+    else:
+        board["locked"] = not board["locked"]
+        board.pop("note", None) if "note" in board else board.update(note="hi")
+    return board
+
+
+def save(team, board, reason="saved", event=None):
+    """What game.record_version does for the log."""
+    previous = history.latest(team)
+    history.record(team, board, reason, {}, {}, {})
+    match_log.record(MATCH, team, previous.board if previous else None, history.latest(team).board, reason, event)
+
+
+def play(count, seed=1):
+    """Plays `count` random changes. Returns [(seq, {team: board})] after each one."""
+    rng = random.Random(seed)
+    boards = {}
+    states = []
+    for seed, team in enumerate(["red", "blue"], 1):
+        boards[team] = new_board(seed)
+        save(team, boards[team], "generated")
+        states.append(copy.deepcopy(boards))
+    for _ in range(count):
+        team = rng.choice(sorted(boards))
+        boards[team] = change(boards[team], rng)
+        save(team, boards[team])
+        states.append(copy.deepcopy(boards))
+    storage.flush()
+    seqs = [r["seq"] for r in match_log.iter_events(MATCH) if r["type"] != "checkpoint"]
+    return list(zip(seqs, states))
+
+
+def plain(boards):
+    return json.loads(json.dumps(boards))
+
+
+def test_diff_apply_round_trip():
+    rng = random.Random(5)
+    board = new_board(3)
+    for _ in range(200):
+        after = change(board, rng)
+        patch = json.loads(json.dumps(match_log.diff(board, after)))
+        assert plain(match_log.apply(copy.deepcopy(plain(board)), patch)) == plain(after)
+        board = after
+
+
+def test_diff_of_the_same_board_is_empty():
+    board = new_board(4)
+    assert match_log.diff(board, history.thaw(board)) == {}
+
+
+def test_replay_by_seq_matches_every_state():
+    states = play(30)
+    assert match_log.Replay(MATCH).checkpoints
+    for seq, boards in states:
+        assert plain(match_log.Replay(MATCH).boards_at(seq=seq)) == plain(boards)
+    assert plain(match_log.Replay(MATCH).boards_at()) == plain(states[-1][1])
+
+
+def test_seeking_starts_from_the_nearest_checkpoint():
+    states = play(30)
+    replay = match_log.Replay(MATCH)
+    last = replay.checkpoints[-1]
+    offset, boards = replay._start(seq=last["seq"] + 1)
+    assert offset == last["offset"] > 0
+    assert boards
+    assert replay._start(seq=replay.checkpoints[0]["seq"] - 1) == (0, {})
+    seq, expected = states[-1]
+    assert plain(replay.boards_at(seq=seq)) == plain(expected)
+
+
+def test_replay_by_timestamp_across_checkpoints():
+    states = dict(play(30))
+    records = [r for r in match_log.iter_events(MATCH)]
+    checkpoints = match_log.Replay(MATCH).checkpoints
+    assert len(checkpoints) >= 2
+    for record in records:
+        # everything logged at or before this moment (timestamps can repeat)
+        upto = max(r["seq"] for r in records if r["ts"] <= record["ts"] and r["type"] != "checkpoint")
+        assert plain(match_log.Replay(MATCH).boards_at(when=record["ts"])) == plain(states[upto])
+    assert match_log.Replay(MATCH).boards_at(when="2000-01-01T00:00:00") == {}
+
+
+def test_steps_yield_every_event():
+    states = play(10)
+    steps = [(record["seq"], plain(boards)) for record, boards in match_log.Replay(MATCH).steps()]
+    assert steps == [(seq, plain(boards)) for seq, boards in states]
+
+
+def test_resume_carries_on_the_sequence():
+    states = play(6)
+    match_log._matches.clear()
+    match_log.resume([MATCH])
+    save("red", change(history.latest("red").board, random.Random(9)))
+    storage.flush()
+    seqs = [r["seq"] for r in match_log.iter_events(MATCH)]
+    assert seqs == list(range(1, len(seqs) + 1))
+    assert seqs[-1] > states[-1][0]
+
+
+def test_resume_drops_a_cut_off_record(capsys):
+    play(6)
+    path = match_log.log_path(MATCH)
+    with open(path, "rb") as f:
+        good = f.read()
+    last_seq = json.loads(good.splitlines()[-1])["seq"]
+    with open(path, "ab") as f:
+        f.write(b'{"seq":%d,"ts":"2026-' % (last_seq + 1))
+    match_log._matches.clear()
+
+    save("red", change(history.latest("red").board, random.Random(9)))
+    storage.flush()
+    assert "cut-off record" in capsys.readouterr().out
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data.startswith(good)
+    assert json.loads(data[len(good):])["seq"] == last_seq + 1
+    assert plain(match_log.Replay(MATCH).boards_at()) == plain({t: history.latest(t).board for t in ("red", "blue")})
+
+
+def test_resume_after_a_record_longer_than_a_read_chunk(monkeypatch):
+    monkeypatch.setattr(match_log, "_CHUNK", 64)
+    play(5)
+    match_log._matches.clear()
+    last = list(match_log.iter_events(MATCH))[-1]
+    assert match_log._resume(MATCH)["seq"] == last["seq"]
+    assert match_log._resume(MATCH)["offset"] == os.path.getsize(match_log.log_path(MATCH))
+
+
+def test_readers_skip_a_cut_off_record():
+    states = play(3)
+    with open(match_log.log_path(MATCH), "ab") as f:
+        f.write(b'{"seq":99,"ts":"20')
+    assert [r["seq"] for r in match_log.iter_events(MATCH)][-1] == states[-1][0]
+
+
+def test_resumed_matches_never_touch_the_disk(monkeypatch):
+    play(2)
+    match_log._matches.clear()
+    match_log.resume([MATCH, "green"])
+
+    def no_io(*args, **kwargs):
+        raise AssertionError("went to the disk")
+
+    monkeypatch.setattr(builtins, "open", no_io)
+    monkeypatch.setattr(os.path, "getsize", no_io)
+    monkeypatch.setattr(match_log, "_resume", no_io)
+    assert match_log._state(MATCH)["seq"] > 0
+    assert match_log._state("green")["seq"] == 0
+
+
+def test_log_trouble_never_reaches_the_caller(monkeypatch, capsys):
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage, "append", broken)
+    save("red", new_board(1))
+    match_log.note(MATCH, "red", {"type": "skip_used", "coord": "A1"})
+    assert capsys.readouterr().err.count("OSError: disk full") == 2
@@ -0,0 +1,88 @@
+import random
+
+from utils import placement
+
+
+def test_cells_and_coords():
+    assert placement.cell_index("A1") == 0
+    assert placement.cell_index("B3") == 12
+    assert placement.cell_index("J10") == 99
+    assert placement.cell_index("b03") == 12
+    assert placement.cell_index("K1") is None
+    assert placement.cell_index("A11") is None
+    assert [placement.coord_of(i) for i in (0, 12, 99)] == ["A1", "B3", "J10"]
+
+
+def test_masks_round_trip():
+    coords = ["A1", "C5", "J10"]
+    mask = placement.coords_mask(coords)
+    assert mask == (1 << 0) | (1 << 24) | (1 << 99)
+    assert placement.mask_coords(mask) == coords
+    assert placement.first_coord(mask) == "A1"
+    assert placement.first_coord(0) is None
+    assert placement.coords_mask(["Z9", "A1"]) == 1
+
+
+def test_placement_cells():
+    mask, coords = placement.placement_cells(3, "h", placement.cell_index("B8"))
+    assert coords == ["B8", "B9", "B10"]
+    assert mask == placement.coords_mask(coords)
+    _, coords = placement.placement_cells(2, "v", placement.cell_index("I4"))
+    assert coords == ["I4", "J4"]
+    assert placement.placement_mask(2, "v", placement.cell_index("I4")) == placement.coords_mask(coords)
+
+
+def test_out_of_bounds_placements():
+    assert placement.placement_cells(3, "h", placement.cell_index("B9")) is None
+    assert placement.placement_cells(2, "v", placement.cell_index("J4")) is None
+    assert placement.placement_mask(5, "h", placement.cell_index("A7")) is None
+
+
+def test_placements_count():
+    # a ship of length n fits 11 - n ways along each of the 10 rows, and as many down the columns
+    for length in (2, 3, 5):
+        assert len(placement.placements(length)) == 2 * 10 * (11 - length)
+
+
+def test_occupied_mask():
+    board = {"ships": {"destroyer": ["A1", "A2"], "submarine": ["C3", "D3", "E3"]}}
+    assert placement.mask_coords(placement.occupied_mask(board)) == ["A1", "A2", "C3", "D3", "E3"]
+    assert placement.occupied_mask({}) == 0
+
+
+def test_neighbours_mask_does_not_wrap():
+    grown = placement.neighbours_mask(placement.coords_mask(["A10"]))
+    assert placement.mask_coords(grown) == ["A9", "A10", "B9", "B10"]
+    grown = placement.neighbours_mask(placement.coords_mask(["E5"]))
+    assert len(placement.mask_coords(grown)) == 9
+
+
+def test_random_fleet_fits_around_occupied():
+    occupied = placement.coords_mask(["A1", "A2", "A3", "A4", "A5"])
+    lengths = {"battleship": 4, "cruiser": 3, "submarine": 3, "destroyer": 2}
+    fleet = placement.random_fleet(lengths, occupied, rng=random.Random(7))
+    assert set(fleet) == set(lengths)
+    seen = occupied
+    for ship, (orientation, start, mask) in fleet.items():
+        assert bin(mask).count("1") == lengths[ship]
+        assert placement.placement_mask(lengths[ship], orientation, placement.cell_index(start)) == mask
+        assert not mask & seen
+        seen |= mask
+
+
+def test_random_fleet_no_touch():
+    lengths = {"carrier": 5, "battleship": 4, "cruiser": 3, "submarine": 3, "destroyer": 2}
+    fleet = placement.random_fleet(lengths, no_touch=True, rng=random.Random(3))
+    masks = [mask for _, _, mask in fleet.values()]
+    for i, mask in enumerate(masks):
+        for other in masks[i + 1:]:
+            assert not placement.neighbours_mask(mask) & other
+
+
+def test_random_fleet_gives_up():
+    assert placement.random_fleet({"carrier": 5}, placement.FULL_MASK, attempts=3) is None
+
+
+def test_random_fleet_is_reproducible():
+    lengths = {"carrier": 5, "destroyer": 2}
+    assert placement.random_fleet(lengths, rng=random.Random(11)) == placement.random_fleet(lengths, rng=random.Random(11))
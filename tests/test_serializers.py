@@ -0,0 +1,103 @@
+import json
+import os
+
+import pytest
+
+from utils import serializers, storage
+
+
+def make_catalog(count, label="tile"):
+    return [{"name": f"{label} {i}", "count": i % 4 + 1} for i in range(count)]
+
+
+@pytest.fixture
+def catalogs(tmp_path):
+    path = os.path.join(tmp_path, "base_tiles.json")
+    storage.write(path, json.dumps({"tiles": make_catalog(120)}).encode())
+    storage.flush()
+    return serializers.CatalogStore(path, os.path.join(tmp_path, "catalogs"))
+
+
+def board_from(tiles):
+    coords = [f"{row}{col}" for row in "ABCDEFGHIJ" for col in range(1, 11)]
+    board = {"tiles": {coord: dict(tile) for coord, tile in zip(coords, tiles)}, "locked": True, "generation": {"seed": 3}}
+    board["tiles"]["A1"] = {"ship": "destroyer", "ship_tile_data": {"index": 0}, "previous_tile": board["tiles"]["A1"]}
+    board["tiles"]["A2"] = {"ship": "destroyer", "ship_tile_data": {"index": 1}, "previous_tile": board["tiles"]["A2"]}
+    board["tiles"]["J10"] = {"name": "custom", "count": 9, "tags": ["inline"]}
+    board["ships"] = {"destroyer": ["A1", "A2"]}
+    board["shots"] = {
+        "A1": {"by": "blue", "hit": True, "timestamp": "2026-10-01T12:00:00.250000+00:00"},
+        "B5": {"by": "blue", "hit": False, "timestamp": "2026-10-01T12:01:00"},
+        "C7": {"by": "blue", "hit": False, "timestamp": "yesterday"},
+        "D2": {"by": "blue", "hit": False, "timestamp": "2026-10-01T12:02:00+00:00", "skipped": True},
+    }
+    return board
+
+
+def test_json_round_trip():
+    serializer = serializers.get("json")
+    board = board_from(make_catalog(100))
+    assert serializer.loads(serializer.dumps(board)) == board
+
+
+def test_binary_round_trip(catalogs):
+    serializer = serializers.BinarySerializer(catalogs)
+    board = board_from(catalogs.current().tiles)
+    raw = serializer.dumps(board)
+    assert raw.startswith(serializers.MAGIC)
+    assert serializer.loads(raw) == board
+    assert len(raw) < len(serializers.get("json").dumps(board)) / 2
+
+
+def test_binary_tiles_are_shared_with_the_catalog(catalogs):
+    serializer = serializers.BinarySerializer(catalogs)
+    tiles = catalogs.current().tiles
+    loaded = serializer.loads(serializer.dumps(board_from(tiles)))
+    assert loaded["tiles"]["B1"] is tiles[10]
+    assert loaded["tiles"]["A1"]["previous_tile"] is tiles[0]
+
+
+def test_binary_board_outlives_a_catalog_change(catalogs, tmp_path):
+    serializer = serializers.BinarySerializer(catalogs)
+    board = board_from(catalogs.current().tiles)
+    raw = serializer.dumps(board)
+    old = catalogs.current().fingerprint
+    storage.write(catalogs.catalog_path, json.dumps({"tiles": make_catalog(150, "new")}).encode())
+    storage.flush()
+    assert catalogs.current().fingerprint != old
+    assert serializer.loads(raw) == board
+    # and a fresh store (a restarted bot) finds the old catalog in the archive
+    restarted = serializers.BinarySerializer(serializers.CatalogStore(catalogs.catalog_path, catalogs.directory))
+    assert restarted.loads(raw) == board
+
+
+def test_binary_rejects_other_files(catalogs):
+    with pytest.raises(ValueError):
+        serializers.BinarySerializer(catalogs).loads(b'{"tiles": {}}')
+
+
+def test_formats_by_name_and_extension():
+    assert serializers.for_path("data/board_red.json").name == "json"
+    assert serializers.for_path("data/board_red.bin").name == "binary"
+    with pytest.raises(ValueError):
+        serializers.for_path("data/board_red.txt")
+    with pytest.raises(ValueError):
+        serializers.get("xml")
+
+
+def test_catalog_fingerprint():
+    tiles = make_catalog(5)
+    same = json.loads(json.dumps(tiles))
+    assert serializers.catalog_fingerprint(tiles) == serializers.catalog_fingerprint(same)
+    same[0]["count"] += 1
+    assert serializers.catalog_fingerprint(tiles) != serializers.catalog_fingerprint(same)
+
+
+def test_write_and_read_board(tmp_path):
+    path = os.path.join(tmp_path, "board_red.json")
+    board = board_from(make_catalog(100))
+    serializers.write_board(path, board)
+    assert serializers.read_board(path) == board
+    storage.flush()
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == board
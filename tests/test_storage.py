@@ -0,0 +1,161 @@
+import asyncio
+import builtins
+import os
+import threading
+import time
+
+import pytest
+
+from utils import storage
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    """A private writer (as storage's own) whose first write can be held up with `hold()`."""
+    w = storage.Writer(fsync="never", max_pending=2)
+    monkeypatch.setattr(storage, "_writer", w)
+    gate = threading.Event()
+
+    def hold(path):
+        w.submit(path, b"held", on_written=lambda stat: gate.wait(5))
+        while not w._in_flight and w.depth():
+            time.sleep(0.001)
+
+    w.hold = hold
+    w.release = gate.set
+    yield w
+    gate.set()
+    w.flush(5)
+
+
+def wait_until(check, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_reads_see_queued_writes(tmp_path, writer):
+    path = str(tmp_path / "state.json")
+    writer.hold(str(tmp_path / "first"))
+    storage.write(path, b"queued")
+    assert not os.path.exists(path)
+    assert storage.read(path) == b"queued"
+    assert storage.exists(path)
+    writer.release()
+    assert storage.flush(5)
+    with open(path, "rb") as f:
+        assert f.read() == b"queued"
+
+
+def test_rewrites_of_a_file_are_coalesced(tmp_path, writer):
+    path = str(tmp_path / "board.json")
+    written = []
+    writer.hold(str(tmp_path / "first"))
+    for data in (b"1", b"22", b"333"):
+        storage.write(path, data, on_written=lambda stat, data=data: written.append((data, stat.st_size)))
+    assert writer.coalesced == 2
+    assert storage.read(path) == b"333"
+    writer.release()
+    assert storage.flush(5)
+    assert written == [(b"333", 3)]
+    assert writer.written == 2
+
+
+def test_appends_are_merged(tmp_path, writer):
+    path = str(tmp_path / "log.jsonl")
+    writer.hold(str(tmp_path / "first"))
+    storage.append(path, b"a\n")
+    storage.append(path, b"b\n")
+    assert writer.queued(path) is None
+    writer.release()
+    storage.append(path, b"c\n")
+    assert storage.flush(5)
+    with open(path, "rb") as f:
+        assert f.read() == b"a\nb\nc\n"
+
+
+def test_known_files_are_answered_from_memory(tmp_path, monkeypatch):
+    path = str(tmp_path / "tokens.json")
+    missing = str(tmp_path / "missing.json")
+    storage.write(path, b"{}")
+    assert storage.flush(5)
+    assert storage.read(path) == b"{}"
+    assert not storage.exists(missing)
+    key = storage.stat_key(path)
+    stat = os.stat(path)
+    assert key == (stat.st_mtime_ns, stat.st_size)
+
+    def no_io(*args, **kwargs):
+        raise AssertionError("went to the disk")
+
+    monkeypatch.setattr(os, "stat", no_io)
+    monkeypatch.setattr(builtins, "open", no_io)
+    assert storage.read(path) == b"{}"
+    assert storage.stat_key(path) == key
+    assert storage.exists(path)
+    assert not storage.exists(missing)
+    assert storage.stat_key(missing) is None
+    with pytest.raises(FileNotFoundError):
+        storage.read(missing)
+
+
+def test_edits_made_outside_are_picked_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "REVALIDATE_SECONDS", 0.02)
+    path = str(tmp_path / "board.json")
+    created = str(tmp_path / "created.json")
+    storage.write(path, b"old")
+    assert storage.flush(5)
+    assert storage.read(path) == b"old"
+    assert not storage.exists(created)
+
+    with open(path, "wb") as f:
+        f.write(b"edited by hand")
+    with open(created, "wb") as f:
+        f.write(b"new")
+    assert wait_until(lambda: storage.read(path) == b"edited by hand")
+    assert wait_until(lambda: storage.exists(created))
+    assert storage.read(created) == b"new"
+
+    os.remove(created)
+    assert wait_until(lambda: not storage.exists(created))
+
+
+def test_writes_on_the_event_loop_never_block(tmp_path, writer):
+    async def main():
+        writer.hold(str(tmp_path / "first"))
+        started = time.perf_counter()
+        for i in range(10):
+            storage.write(str(tmp_path / f"file{i}"), b"x")
+        assert time.perf_counter() - started < 1
+        assert not writer.has_room()
+
+        waiting = asyncio.ensure_future(storage.backpressure())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        writer.release()
+        await asyncio.wait_for(waiting, 5)
+        assert writer.has_room()
+
+    asyncio.run(main())
+
+
+def test_writes_off_the_event_loop_wait_for_room(tmp_path, writer):
+    writer.hold(str(tmp_path / "first"))
+    done = threading.Event()
+
+    def write_many():
+        for i in range(5):
+            storage.write(str(tmp_path / f"file{i}"), b"x")
+        done.set()
+
+    thread = threading.Thread(target=write_many)
+    thread.start()
+    assert not done.wait(0.1)
+    writer.release()
+    assert done.wait(5)
+    thread.join()
+    assert storage.flush(5)
+    assert sorted(os.listdir(tmp_path)) == ["file0", "file1", "file2", "file3", "file4", "first"]
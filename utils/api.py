@@ -0,0 +1,112 @@
+# read-only JSON API on the bot's web server (utils/web.py), for the clan website and stream
+# overlays. everything comes from the in-memory state (utils/live.py and utils/history.py).
+#
+#   GET /api/matches                    teams, pairings and board versions
+#   GET /api/boards/{team}              a board as spectators see it
+#   GET /api/boards/{team}?view=full    the whole board, ships included (needs API_TOKEN)
+#   GET /api/stats                      shots, hits, accuracy, ships sunk and last shot per team
+#   GET /api/history/{team}             the team's retained board versions
+#
+# every response carries an ETag built from the versions it was made from. send it back as
+# If-None-Match and you get an empty 304 until something changes, so polling costs next to
+# nothing. each response body is serialized once per version and shared by every request.
+
+import hmac
+import json
+
+import config
+from utils import history, live, match_config
+
+# {(resource, view): (etag, body)}
+_cache = {}
+
+
+def _serialized(key, etag, build):
+    cached = _cache.get(key)
+    if cached is None or cached[0] != etag:
+        body = json.dumps(build(), separators=(",", ":")).encode("utf-8")
+        cached = _cache[key] = (etag, body)
+    return cached[1]
+
+
+def _authorized(request):
+    if not config.API_TOKEN:
+        return False
+    header = request.headers.get("Authorization", "")
+    return hmac.compare_digest(header, f"Bearer {config.API_TOKEN}")
+
+
+def add_routes(app):
+    from aiohttp import web  # type: ignore
+
+    headers = {"Access-Control-Allow-Origin": "*", "Access-Control-Expose-Headers": "ETag", "Cache-Control": "no-cache"}
+
+    def respond(request, key, etag, build):
+        etag = f'"{etag}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers={**headers, "ETag": etag})
+        body = _serialized(key, etag, build)
+        return web.Response(body=body, content_type="application/json", headers={**headers, "ETag": etag})
+
+    def not_found(message):
+        return web.json_response({"error": message}, status=404, headers=headers)
+
+    async def matches(request):
+        def build():
+            seen, result = set(), []
+            for team in config.TEAMS_LIST:
+                opponent = config.TEAM_PAIRS.get(team)
+                if team in seen or not opponent:
+                    continue
+                seen.update((team, opponent))
+                result.append({
+                    "match": "-vs-".join(sorted([team, opponent])),
+                    "teams": {t: {"name": config.TEAM_DISPLAY.get(t, t), "version": live.version(t)} for t in (team, opponent)},
+                })
+            return {"matches": result}
+        return respond(request, ("matches",), f"s{live.sequence()}", build)
+
+    async def board(request):
+        team = request.match_info["team"]
+        version = live.version(team)
+        if version is None:
+            return not_found(f"no board for {team}")
+        view = request.query.get("view", "public")
+        if view == "full":
+            if not _authorized(request):
+                return web.json_response({"error": "the full view needs API_TOKEN"}, status=403, headers=headers)
+            build = lambda: {"team": team, "version": version, "board": live.board(team)}
+        elif view == "public":
+            build = lambda: live.public_board(team)
+        else:
+            return web.json_response({"error": "view is public or full"}, status=400, headers=headers)
+        return respond(request, ("board", team, view), f"{team}-{version}-{view}-c{match_config.generation()}", build)
+
+    async def stats(request):
+        return respond(request, ("stats",), f"s{live.sequence()}", lambda: {"teams": live.scores()})
+
+    async def board_history(request):
+        team = request.match_info["team"]
+        if team not in config.TEAMS_LIST:
+            return not_found(f"unknown team {team}")
+
+        def build():
+            return {
+                "team": team,
+                "versions": [
+                    {
+                        "version": v.number,
+                        "timestamp": v.timestamp.isoformat(),
+                        "reason": v.reason,
+                        "shots": len(v.board.get("shots", {})),
+                        "based_on": v.based_on,
+                    }
+                    for v in history.versions(team)
+                ],
+            }
+        return respond(request, ("history", team), f"{team}-h{history.current_version(team)}", build)
+
+    app.router.add_get("/api/matches", matches)
+    app.router.add_get("/api/boards/{team}", board)
+    app.router.add_get("/api/stats", stats)
+    app.router.add_get("/api/history/{team}", board_history)
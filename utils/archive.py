@@ -0,0 +1,329 @@
+# archive of every match across seasons, in a local SQLite database (data/archive.sqlite3), for
+# the leaderboard and match history commands. it's written as the match goes, not dumped at
+# the end: every shot is inserted as it's fired, and running totals per team and per player
+# are bumped in the same transaction, so the leaderboard is a lookup rather than a scan over
+# past matches. !win closes the match and records the result (once: a second !win only
+# corrects the winner). shots taken back by !undo or !rollback stay in the table, marked
+# retracted, and come off the totals.
+#
+# all database work happens on one background thread, in order: the bot hands it writes and
+# awaits queries through run(), so a slow disk never holds up the event loop.
+
+import atexit
+import os
+import sqlite3
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import config
+
+DB_PATH = os.path.join("data", "archive.sqlite3")
+SEASON = config.SEASON
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    match TEXT NOT NULL,
+    season TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    ended_at TEXT,
+    winner TEXT
+);
+CREATE INDEX IF NOT EXISTS matches_open ON matches (match, ended_at);
+
+CREATE TABLE IF NOT EXISTS match_teams (
+    match_id INTEGER NOT NULL REFERENCES matches (id),
+    team TEXT NOT NULL,
+    shots INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    sunk INTEGER NOT NULL DEFAULT 0,
+    won INTEGER,
+    PRIMARY KEY (match_id, team)
+);
+CREATE INDEX IF NOT EXISTS match_teams_team ON match_teams (team, match_id);
+
+CREATE TABLE IF NOT EXISTS shots (
+    id INTEGER PRIMARY KEY,
+    match_id INTEGER NOT NULL REFERENCES matches (id),
+    team TEXT NOT NULL,
+    target TEXT NOT NULL,
+    coord TEXT NOT NULL,
+    hit INTEGER NOT NULL,
+    ship TEXT,
+    sunk INTEGER NOT NULL DEFAULT 0,
+    tile TEXT,
+    tile_count INTEGER,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    player_id TEXT,
+    ts TEXT NOT NULL,
+    retracted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS shots_match ON shots (match_id, team, ts);
+
+CREATE TABLE IF NOT EXISTS team_totals (
+    season TEXT NOT NULL,
+    team TEXT NOT NULL,
+    matches INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    shots INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    sunk INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (season, team)
+);
+CREATE INDEX IF NOT EXISTS team_totals_rank ON team_totals (season, wins DESC, sunk DESC, hits DESC);
+
+CREATE TABLE IF NOT EXISTS player_totals (
+    season TEXT NOT NULL,
+    player_id TEXT NOT NULL,
+    player TEXT NOT NULL,
+    team TEXT NOT NULL,
+    shots INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    sunk INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (season, player_id, team)
+);
+CREATE INDEX IF NOT EXISTS player_totals_rank ON player_totals (season, hits DESC, sunk DESC);
+"""
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive")
+_db = None
+# {match: id of its open row}, so a shot doesn't look the match up
+_open = {}
+
+
+def _connect():
+    global _db
+    if _db is None:
+        directory = os.path.dirname(DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _db = sqlite3.connect(DB_PATH, check_same_thread=False)
+        _db.row_factory = sqlite3.Row
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute("PRAGMA synchronous=NORMAL" if config.STORAGE_FSYNC != "always" else "PRAGMA synchronous=FULL")
+        _db.executescript(_SCHEMA)
+        migrate(_db)
+    return _db
+
+
+# columns added after the first archives were written: (table, column, definition)
+_ADDED_COLUMNS = [
+    ("shots", "tile_count", "INTEGER"),
+    ("shots", "skipped", "INTEGER NOT NULL DEFAULT 0"),
+    ("shots", "retracted", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+def migrate(db):
+    """Brings an archive written by an older version of the bot up to the current schema."""
+    for table, column, definition in _ADDED_COLUMNS:
+        columns = {row["name"] for row in db.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _open_match(db, match):
+    match_id = _open.get(match)
+    if match_id is not None:
+        return match_id
+    row = db.execute("SELECT id FROM matches WHERE match = ? AND ended_at IS NULL ORDER BY id DESC LIMIT 1", (match,)).fetchone()
+    if row:
+        match_id = row["id"]
+    else:
+        match_id = db.execute(
+            "INSERT INTO matches (match, season, started_at) VALUES (?, ?, ?)", (match, SEASON, _now())
+        ).lastrowid
+        db.executemany(
+            "INSERT INTO match_teams (match_id, team) VALUES (?, ?)", [(match_id, team) for team in match.split("-vs-")]
+        )
+    _open[match] = match_id
+    return match_id
+
+
+def _logged(fn):
+    # archive trouble must never break a shot; it's reported and the bot carries on
+    def run(*args):
+        try:
+            return fn(*args)
+        except Exception:
+            traceback.print_exc()
+    return run
+
+
+def _count_shot(db, match_id, season, team, player_id, player, hit, sunk, sign=1):
+    """Adds a shot to (sign=-1: takes it off) the match's, the team's and the player's totals."""
+    shots, hit, sunk = sign, sign * hit, sign * sunk
+    db.execute(
+        "UPDATE match_teams SET shots = shots + ?, hits = hits + ?, sunk = sunk + ? WHERE match_id = ? AND team = ?",
+        (shots, hit, sunk, match_id, team),
+    )
+    db.execute(
+        "INSERT INTO team_totals (season, team, shots, hits, sunk) VALUES (?, ?, ?, ?, ?)"
+        " ON CONFLICT (season, team) DO UPDATE SET shots = shots + excluded.shots, hits = hits + excluded.hits,"
+        " sunk = sunk + excluded.sunk",
+        (season, team, shots, hit, sunk),
+    )
+    if player_id:
+        db.execute(
+            "INSERT INTO player_totals (season, player_id, player, team, shots, hits, sunk) VALUES (?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (season, player_id, team) DO UPDATE SET player = excluded.player, shots = shots + excluded.shots,"
+            " hits = hits + excluded.hits, sunk = sunk + excluded.sunk",
+            (season, player_id, player or player_id, team, shots, hit, sunk),
+        )
+
+
+@_logged
+def _record_shot(match, team, target, shot):
+    db = _connect()
+    with db:
+        match_id = _open_match(db, match)
+        hit, sunk = int(bool(shot.get("hit"))), int(bool(shot.get("sunk")))
+        db.execute(
+            "INSERT INTO shots (match_id, team, target, coord, hit, ship, sunk, tile, tile_count, skipped, player_id, ts)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (match_id, team, target, shot["coord"], hit, shot.get("ship"), sunk, shot.get("tile"), shot.get("tile_count"),
+             int(bool(shot.get("skipped"))), shot.get("player_id"), shot.get("ts") or _now()),
+        )
+        _count_shot(db, match_id, SEASON, team, shot.get("player_id"), shot.get("player"), hit, sunk)
+
+
+@_logged
+def _record_rollback(match, target, removed, restored):
+    db = _connect()
+    with db:
+        for shots, retracted in ((removed, 1), (restored, 0)):
+            for coord, ts in shots:
+                row = db.execute(
+                    "SELECT s.id, s.match_id, s.team, s.hit, s.sunk, s.player_id, m.season, p.player"
+                    " FROM shots s JOIN matches m ON m.id = s.match_id"
+                    " LEFT JOIN player_totals p ON p.season = m.season AND p.player_id = s.player_id AND p.team = s.team"
+                    " WHERE m.match = ? AND s.target = ? AND s.coord = ? AND s.ts = ? AND s.retracted = ?"
+                    " ORDER BY s.id DESC LIMIT 1",
+                    (match, target, coord, ts, 1 - retracted),
+                ).fetchone()
+                if row is None:
+                    continue  # fired before the archive, or already in the state asked for
+                db.execute("UPDATE shots SET retracted = ? WHERE id = ?", (retracted, row["id"]))
+                _count_shot(db, row["match_id"], row["season"], row["team"], row["player_id"], row["player"],
+                            row["hit"], row["sunk"], -1 if retracted else 1)
+
+
+def _finished_match(db, match):
+    """The match's latest row this season if it's closed and no newer one is open, else None."""
+    if match in _open:
+        return None
+    row = db.execute(
+        "SELECT id, season, ended_at, winner FROM matches WHERE match = ? AND season = ? ORDER BY id DESC LIMIT 1",
+        (match, SEASON),
+    ).fetchone()
+    return row if row and row["ended_at"] is not None else None
+
+
+def _correct_winner(db, match, match_id, season, old, new):
+    db.execute("UPDATE matches SET winner = ? WHERE id = ?", (new, match_id))
+    for team in match.split("-vs-"):
+        won = int(team == new)
+        change = won - int(team == old)
+        db.execute("UPDATE match_teams SET won = ? WHERE match_id = ? AND team = ?", (won, match_id, team))
+        if change:
+            db.execute("UPDATE team_totals SET wins = wins + ? WHERE season = ? AND team = ?", (change, season, team))
+
+
+@_logged
+def _finish_match(match, winner):
+    db = _connect()
+    with db:
+        finished = _finished_match(db, match)
+        if finished is not None:
+            # !win again: the match is counted once, a different winner corrects the result
+            if finished["winner"] != winner:
+                _correct_winner(db, match, finished["id"], finished["season"], finished["winner"], winner)
+            return finished["id"]
+        match_id = _open_match(db, match)
+        db.execute("UPDATE matches SET ended_at = ?, winner = ? WHERE id = ?", (_now(), winner, match_id))
+        for team in match.split("-vs-"):
+            won = int(team == winner)
+            db.execute("UPDATE match_teams SET won = ? WHERE match_id = ? AND team = ?", (won, match_id, team))
+            db.execute(
+                "INSERT INTO team_totals (season, team, matches, wins) VALUES (?, ?, 1, ?)"
+                " ON CONFLICT (season, team) DO UPDATE SET matches = matches + 1, wins = wins + excluded.wins",
+                (SEASON, team, won),
+            )
+    _open.pop(match, None)
+    return match_id
+
+
+def record_shot(match, team, target, shot):
+    """
+    Queues one shot: `shot` holds coord, hit, ship, sunk, skipped, tile, tile_count, ts and,
+    when known, the player_id/player who fired it.
+    """
+    _executor.submit(_record_shot, match, team, target, dict(shot))
+
+
+def record_rollback(match, target, removed, restored=()):
+    """
+    Queues the shots at a target that an !undo or !rollback took back ([(coord, ts), ...]): they're
+    marked retracted and taken off the totals. `restored` shots (a rollback to a later version)
+    are counted again.
+    """
+    _executor.submit(_record_rollback, match, target, list(removed), list(restored))
+
+
+def finish_match(match, winner):
+    """
+    Closes the match's archive entry with its winner. Returns a future of the match's row ID. Finishing
+    a match that's already finished (with no newer shots) only corrects its winner if it changed.
+    """
+    return _executor.submit(_finish_match, match, winner)
+
+
+def run(fn, *args):
+    """Runs fn(connection, *args) on the archive thread, after every queued write. Returns a future."""
+    return _executor.submit(lambda: fn(_connect(), *args))
+
+
+# Queries, for run()
+def leaderboard(db, season=None, limit=10):
+    """(teams, players) for a season (default: the current one), best first."""
+    season = season or SEASON
+    teams = db.execute(
+        "SELECT team, matches, wins, shots, hits, sunk FROM team_totals WHERE season = ?"
+        " ORDER BY wins DESC, sunk DESC, hits DESC LIMIT ?",
+        (season, limit),
+    ).fetchall()
+    players = db.execute(
+        "SELECT player, team, shots, hits, sunk FROM player_totals WHERE season = ?"
+        " ORDER BY hits DESC, sunk DESC LIMIT ?",
+        (season, limit),
+    ).fetchall()
+    return [dict(row) for row in teams], [dict(row) for row in players]
+
+
+def team_history(db, team, limit=10):
+    """A team's latest matches, newest first, with its shots, hits, ships sunk and result."""
+    rows = db.execute(
+        "SELECT m.id, m.match, m.season, m.started_at, m.ended_at, m.winner, t.shots, t.hits, t.sunk, t.won"
+        " FROM match_teams t JOIN matches m ON m.id = t.match_id"
+        " WHERE t.team = ? ORDER BY t.match_id DESC LIMIT ?",
+        (team, limit),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def seasons(db):
+    return [row["season"] for row in db.execute("SELECT DISTINCT season FROM matches ORDER BY season")]
+
+
+def _close():
+    _executor.shutdown(wait=True)
+    if _db is not None:
+        _db.close()
+
+
+atexit.register(_close)
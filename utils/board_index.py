@@ -0,0 +1,135 @@
+# per-board indexes for event targeting and ship placement: the free water cells, the ship
+# cells an event can land on, the active events by ID and by type, and the mask of cells
+# covered by ships. an index is built once from a board (one pass over its 100 tiles) and then
+# kept current by the game functions, which call touch() with the cells they change, so
+# picking or resolving an event or checking a placement never rescans a board.
+
+from utils import placement
+
+# {id(board): BoardIndex}, only for boards someone asked an index for
+_indexes = {}
+
+
+def event_id_of(coord, tile):
+    """Boards saved before events had IDs get one derived from their cell."""
+    return tile.get("event_id") or f"{tile['event']}@{coord}"
+
+
+class BoardIndex:
+    def __init__(self, board):
+        self.board = board
+        self.free_water = set()
+        self.live_ships = set()
+        # {event_id: (coord, event_type)}
+        self.events = {}
+        # {event_type: {event_id, ...}}
+        self.events_by_type = {}
+        # {coord: event_id}, so a changed cell can drop its old event
+        self._event_at = {}
+        # cells covered by ships, shot or not (see utils/placement.py)
+        self.occupied = 0
+        for coord in board.get("tiles", {}):
+            self._update(coord)
+
+    def _update(self, coord):
+        tile = self.board["tiles"].get(coord, {})
+        shots = self.board.get("shots", {})
+
+        self.free_water.discard(coord)
+        self.live_ships.discard(coord)
+        old_event = self._event_at.pop(coord, None)
+        if old_event is not None:
+            event_type = self.events.pop(old_event, (None, None))[1]
+            ids = self.events_by_type.get(event_type)
+            if ids is not None:
+                ids.discard(old_event)
+                if not ids:
+                    del self.events_by_type[event_type]
+
+        bit = placement.BITS.get(coord, 0)
+        if "ship" in tile:
+            self.occupied |= bit
+        else:
+            self.occupied &= ~bit
+
+        if coord in shots:
+            # shot cells are settled, including events completed as a virtual miss
+            return
+        if tile.get("event"):
+            event_id = event_id_of(coord, tile)
+            self.events[event_id] = (coord, tile["event"])
+            self.events_by_type.setdefault(tile["event"], set()).add(event_id)
+            self._event_at[coord] = event_id
+        elif "ship" in tile:
+            self.live_ships.add(coord)
+        else:
+            self.free_water.add(coord)
+
+    def copy_for(self, board):
+        """This index for a copy of its board, without rescanning the tiles."""
+        index = BoardIndex.__new__(BoardIndex)
+        index.board = board
+        index.free_water = set(self.free_water)
+        index.live_ships = set(self.live_ships)
+        index.events = dict(self.events)
+        index.events_by_type = {event_type: set(ids) for event_type, ids in self.events_by_type.items()}
+        index._event_at = dict(self._event_at)
+        index.occupied = self.occupied
+        return index
+
+    def update(self, coords):
+        for coord in coords:
+            self._update(coord)
+
+    def find_event(self, ref):
+        """
+        Looks an event up by ID, or by type when only one event of that type is active.
+        Returns (event_id, coord, error).
+        """
+        if ref in self.events:
+            coord, _ = self.events[ref]
+            return ref, coord, None
+        ids = self.events_by_type.get(ref)
+        if not ids:
+            return None, None, f"No active `{ref}` event found."
+        if len(ids) > 1:
+            listed = ", ".join(f"`{i}`" for i in sorted(ids))
+            return None, None, f"Several `{ref}` events are active ({listed}). Say which one by ID."
+        event_id = next(iter(ids))
+        return event_id, self.events[event_id][0], None
+
+
+def index_for(board):
+    index = _indexes.get(id(board))
+    if index is None or index.board is not board:
+        index = BoardIndex(board)
+        _indexes[id(board)] = index
+    return index
+
+
+def occupied(board):
+    """The mask of cells covered by the board's ships as kept by its index, or None without one."""
+    index = _indexes.get(id(board))
+    if index is not None and index.board is board:
+        return index.occupied
+    return None
+
+
+def copy_index(original, copy):
+    """Carries the original board's index (if it has one) over to a working copy of it."""
+    index = _indexes.get(id(original))
+    if index is not None and index.board is original:
+        _indexes[id(copy)] = index.copy_for(copy)
+
+
+def touch(board, *coords):
+    """Tells the board's index (if it has one) that these cells changed."""
+    index = _indexes.get(id(board))
+    if index is not None and index.board is board:
+        index.update(coords)
+
+
+def forget(board):
+    index = _indexes.get(id(board))
+    if index is not None and index.board is board:
+        del _indexes[id(board)]
@@ -0,0 +1,309 @@
+# run python -m utils.catalog to build tile catalogs (base_tiles.json files) from a tile source
+#
+#   python -m utils.catalog data/base_tiles.json -o data/base_tiles_bosses.json
+#   python -m utils.catalog tiles.jsonl --pool bosses.txt:3 --pool raids.txt:1 --seed 7 -o event.json
+#   python -m utils.catalog tiles.jsonl --variant week1=1 --variant week2=2 -o data/base_tiles_{variant}.json
+#
+# tile sources are read one tile at a time (a {"tiles": [...]} file or JSON lines) and written
+# out the same way, so a catalog of any size is a single pass in constant memory. names come
+# from pools, each dealt as a shuffled cycle: every name is used once before any repeats.
+# catalogs are written to a temporary file and only renamed into place once the whole source
+# has been read, so a missing or broken source never leaves a half-written catalog behind.
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+OSRS_BOSSES = [
+    "Zulrah", "Vorkath", "Hunllef (Corrupted Gauntlet only)", "Sarachnis", "Kree'arra", "Moons of Peril",
+    "Commander Zilyana", "General Graardor", "Kraken", "Cerberus", "Scorpia", "Callisto", "Vet'ion",
+    "Venenatis", "King Black Dragon", "Chaos Fanatic", "Crazy Archaeologist", "Chaos Elemental",
+    "Kalphite Queen", "Dagannoth Rex", "Dagannoth Supreme", "Dagannoth Prime", "Thermonuclear Smoke Devil",
+    "The Nightmare", "Phantom Muspah", "Obor", "Bryophyta", "Barrows", "Tempoross", "Wintertodt",
+    "TzTok-Jad", "TzKal-Zuk", "Duke Sucellus", "Whisperer", "Leviathan", "Vardorvis", "Nex",
+    "Royal Titans", "Yama", "Hueycoatl", "The Great Olm", "Corporeal Beast", "Grotesque Guardians",
+    "Verzik Vitur", "Wardens", "Zalcano", "Giant Mole", "Kril Tsutsaroth", "Alchemical Hydra"
+]
+
+# pools that don't need a file
+BUILTIN_POOLS = {"osrs_bosses": OSRS_BOSSES}
+
+READ_CHUNK = 1 << 16
+
+
+class NameCycle:
+    """Deals names from a pool in shuffled rounds: O(1) per name, no repeats within a round."""
+
+    def __init__(self, names, rng):
+        if not names:
+            raise ValueError("name pool is empty")
+        self.names = list(names)
+        self.rng = rng
+        self.position = len(self.names)
+
+    def next(self):
+        if self.position == len(self.names):
+            last = self.names[-1]
+            self.rng.shuffle(self.names)
+            # don't deal the same name twice in a row across a reshuffle
+            if len(self.names) > 1 and self.names[0] == last:
+                self.names[0], self.names[-1] = self.names[-1], self.names[0]
+            self.position = 0
+        name = self.names[self.position]
+        self.position += 1
+        return name
+
+
+class NameAssigner:
+    """Picks a pool for every tile by weight, then the next name from that pool's cycle."""
+
+    def __init__(self, pools, seed=None):
+        # pools: [(names, weight), ...]
+        self.rng = random.Random(seed)
+        self.cycles = [NameCycle(names, random.Random(self.rng.random())) for names, _ in pools]
+        # cumulative weights, so a weighted pick is a bisect instead of a scan
+        self.cumulative = []
+        total = 0
+        for _, weight in pools:
+            if weight < 0:
+                raise ValueError("pool weights can't be negative")
+            total += weight
+            self.cumulative.append(total)
+        if not total:
+            raise ValueError("at least one pool needs a positive weight")
+
+    def next(self):
+        if len(self.cycles) == 1:
+            return self.cycles[0].next()
+        cycle = self.rng.choices(self.cycles, cum_weights=self.cumulative)[0]
+        return cycle.next()
+
+
+def iter_tiles(path):
+    """
+    Yields tiles one at a time from a JSON lines file (`.jsonl`, or `-` for stdin) or from a
+    {"tiles": [...]} / [...] JSON file.
+    """
+    if path == "-" or path.endswith(".jsonl"):
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        return
+
+    with open(path, encoding="utf-8") as f:
+        yield from _JsonArrayReader(f).tiles()
+
+
+class _JsonArrayReader:
+    """Decodes the items of a JSON tile array as the file is read, without loading it whole."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.stream.read(READ_CHUNK)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def _skip_space(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def _next_char(self):
+        self._skip_space()
+        char = self.buffer[self.pos:self.pos + 1]
+        self.pos += 1
+        return char
+
+    def _expect(self, char):
+        found = self._next_char()
+        if found != char:
+            raise ValueError(f"expected {char!r} in tile source, found {found!r}")
+
+    def _value(self):
+        self._skip_space()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number cut off at the end of the buffer still decodes, so make sure it ended
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def tiles(self):
+        self._skip_space()
+        if self.buffer[self.pos:self.pos + 1] == "{":
+            # walk the top-level keys up to "tiles", skipping the rest
+            self._expect("{")
+            while True:
+                key = self._value()
+                self._expect(":")
+                if key == "tiles":
+                    break
+                self._value()
+                if self._next_char() != ",":
+                    raise ValueError('tile source has no "tiles" list')
+        self._expect("[")
+
+        self._skip_space()
+        if self.buffer[self.pos:self.pos + 1] == "]":
+            return
+        while True:
+            yield self._value()
+            char = self._next_char()
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError("malformed tile list")
+
+
+class CatalogWriter:
+    """Writes tiles as they come: JSON lines for `.jsonl`, otherwise a compact {"tiles": [...]} file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lines = path.endswith(".jsonl")
+        self.temp = None
+        if path == "-":
+            self.file = sys.stdout
+        else:
+            fd, self.temp = tempfile.mkstemp(prefix=".catalog-", dir=os.path.dirname(path) or ".")
+            # mkstemp makes it private; give the catalog the usual permissions
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(self.temp, 0o666 & ~umask)
+            self.file = open(fd, "w", encoding="utf-8")
+        self.count = 0
+        if not self.lines:
+            self.file.write('{"tiles": [')
+
+    def write(self, tile):
+        raw = json.dumps(tile, ensure_ascii=False, separators=(",", ":"))
+        if self.lines:
+            self.file.write(raw + "\n")
+        else:
+            self.file.write(("\n" if not self.count else ",\n") + raw)
+        self.count += 1
+
+    def close(self, complete=True):
+        """Finishes the catalog, or throws it away (leaving any existing file alone) if not complete."""
+        if complete and not self.lines:
+            self.file.write("\n]}\n")
+        if self.file is sys.stdout:
+            self.file.flush()
+            return
+        self.file.close()
+        if complete:
+            os.replace(self.temp, self.path)
+        else:
+            os.remove(self.temp)
+
+
+def load_pool(spec):
+    """
+    `osrs_bosses`, `names.txt` (one per line) or `names.json` (a list), optionally with a weight
+    after a colon: `raids.txt:2`. Returns (names, weight).
+    """
+    source, weight = spec, 1.0
+    head, sep, tail = spec.rpartition(":")
+    if sep and head:
+        try:
+            source, weight = head, float(tail)
+        except ValueError:
+            pass
+
+    if source in BUILTIN_POOLS:
+        return list(BUILTIN_POOLS[source]), weight
+    with open(source, encoding="utf-8") as f:
+        if source.endswith(".json"):
+            names = json.load(f)
+        else:
+            names = [line.strip() for line in f if line.strip()]
+    return [str(name) for name in names], weight
+
+
+def parse_variants(specs, seed):
+    """`week1=7` -> ("week1", 7); with no variants there's a single unnamed one."""
+    if not specs:
+        return [(None, seed)]
+    variants = []
+    for spec in specs:
+        name, _, variant_seed = spec.partition("=")
+        variants.append((name, int(variant_seed) if variant_seed else None))
+    return variants
+
+
+def build_catalogs(source, output, pools, variants, field="name"):
+    """
+    Reads `source` once and writes one catalog per variant. `output` may contain `{variant}`.
+    Returns {output_path: tiles_written}.
+    """
+    if len(variants) > 1 and "{variant}" not in output:
+        raise ValueError("several variants need {variant} in the output path")
+    paths = [output.format(variant=name) if name else output for name, _ in variants]
+    if source != "-":
+        for path in paths:
+            if path != "-" and os.path.abspath(path) == os.path.abspath(source):
+                raise ValueError(f"{path} is the source: write the catalog somewhere else")
+
+    outputs = []
+    complete = False
+    try:
+        for path, (_, seed) in zip(paths, variants):
+            outputs.append((NameAssigner(pools, seed), CatalogWriter(path)))
+        for tile in iter_tiles(source):
+            for assigner, writer in outputs:
+                writer.write({**tile, field: assigner.next()})
+        complete = True
+    finally:
+        for _, writer in outputs:
+            writer.close(complete)
+    return {writer.path: writer.count for _, writer in outputs}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build tile catalogs with names dealt from one or more pools.")
+    parser.add_argument("source", help="tile source: a {\"tiles\": [...]} JSON file, a .jsonl file, or - for JSON lines on stdin")
+    parser.add_argument("-o", "--output", default="data/base_tiles_bosses.json",
+                        help="where to write (.jsonl for JSON lines, - for stdout, {variant} for several variants)")
+    parser.add_argument("--pool", action="append",
+                        help="name pool, repeatable: osrs_bosses, a .txt (one name per line) or .json list, with an optional :weight")
+    parser.add_argument("--seed", type=int, help="seed for the names (default: random)")
+    parser.add_argument("--variant", action="append", help="NAME=SEED, repeatable: writes one catalog per variant in the same pass")
+    parser.add_argument("--field", default="name", help="tile field to fill in (default: name)")
+    args = parser.parse_args(argv)
+
+    pools = [load_pool(spec) for spec in (args.pool or ["osrs_bosses"])]
+    try:
+        written = build_catalogs(args.source, args.output, pools, parse_variants(args.variant, args.seed), args.field)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"❌ {e}")
+    for path, count in written.items():
+        print(f"✅ Wrote {count} tile(s) to {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
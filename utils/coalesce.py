@@ -0,0 +1,92 @@
+# coalescing of read-only commands. when several crew members ask for the same thing in the same
+# channel at once (!view_enemy_board, !current_task, !skips...), the first call is answered as
+# usual and every identical call within COALESCE_WINDOW seconds just gets a 👆 reaction pointing
+# at that answer instead of another copy of it. calls that arrive while the first one is still
+# running wait for it to finish first, so the reaction never lands before the answer.
+#
+# anything that changes game state calls invalidate() (game.record_version and the skip token
+# saves do), after which the next call is answered afresh.
+
+import asyncio
+import functools
+import time
+
+import config
+from utils import metrics
+
+WINDOW = config.COALESCE_WINDOW
+REACTION = "👆"
+_MAX_ENTRIES = 256
+
+# bumped on every state change; answers from an older generation are never reused
+_generation = 0
+# {(command, channel, args): _Answer}
+_answers = {}
+
+
+class _Answer:
+    __slots__ = ("generation", "done", "finished_at", "failed")
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.done = asyncio.Event()
+        self.finished_at = None
+        self.failed = False
+
+    def fresh(self, now):
+        if self.generation != _generation or self.failed:
+            return False
+        return self.finished_at is None or now - self.finished_at <= WINDOW
+
+
+def invalidate():
+    """Forget every answer: the state they were made from has changed."""
+    global _generation
+    _generation += 1
+    _answers.clear()
+
+
+def _prune(now):
+    for key in [k for k, answer in _answers.items() if answer.finished_at is not None and not answer.fresh(now)]:
+        del _answers[key]
+
+
+async def _acknowledge(ctx):
+    try:
+        await ctx.message.add_reaction(REACTION)
+    except Exception:
+        pass  # no permission to react, message gone... the answer is up there either way
+
+
+def read_command(fn):
+    """Decorates a read-only command so identical calls in a channel share one answer."""
+
+    @functools.wraps(fn)
+    async def wrapper(ctx, *args, **kwargs):
+        if WINDOW <= 0:
+            return await fn(ctx, *args, **kwargs)
+
+        key = (fn.__name__, ctx.channel.id, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        answer = _answers.get(key)
+        if answer is not None and answer.fresh(now):
+            await answer.done.wait()
+            if answer.fresh(time.monotonic()):
+                metrics.record_cache("coalesce", True)
+                await _acknowledge(ctx)
+                return
+        metrics.record_cache("coalesce", False)
+
+        if len(_answers) >= _MAX_ENTRIES:
+            _prune(now)
+        answer = _answers[key] = _Answer(_generation)
+        try:
+            return await fn(ctx, *args, **kwargs)
+        except BaseException:
+            answer.failed = True
+            raise
+        finally:
+            answer.finished_at = time.monotonic()
+            answer.done.set()
+
+    return wrapper
@@ -1,12 +1,15 @@
+import bisect
 import json
 import os
 import random
+import threading
 import asyncio
 import discord # type: ignore
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import config
+from utils import archive, board_index, coalesce, heatmap, history, live, match_log, metrics, placement, serializers, stats, storage, tracing
 
 # Constants
 DATA_DIR = Path("data")
@@ -27,36 +30,32 @@ COOLDOWN_DISABLED = False # set to True to disable cooldown for testing
 # Global cooldown tracker
 last_shot_time = {}
 
-def generate_match_summary(boards):
+def generate_match_summary(teams=None):
     """
-    Accepts a dict of boards where keys are team slugs and values are their board data.
-    Generates a summary for each team.
+    Generates a summary for each team in `teams` (default: every team in the config), from the
+    running stats of the shots each team fired at its opponent's board.
     """
-    def summarize(board, team_display_name):
-        shots = board.get("shots", {})
-        hits = [s for s in shots.values() if s["hit"]]
-        total = len(shots)
-        sunk = sum(
-            1 for coords in board.get("ships", {}).values()
-            if all(shots.get(c, {}).get("hit") for c in coords)
-        )
-        accuracy = (len(hits) / total * 100) if total else 0
+    def summarize(team_slug, team_display_name):
+        fired = board_stats(config.TEAM_PAIRS.get(team_slug))
+        received = board_stats(team_slug)
+        if fired is None or received is None:
+            return f"⚠️ No board found for `{team_slug}` or its opponent."
+        shooter = fired.shooter(team_slug)
         return (
             f"**{team_display_name}**\n"
-            f"> 🔫 Shots Fired: `{total}`\n"
-            f"> 🎯 Hits: `{len(hits)}`\n"
-            f"> 🚢 Ships Sunk: `{sunk}`\n"
-            f"> 🎯 Accuracy: `{accuracy:.1f}%`\n"
+            f"> 🔫 Shots Fired: `{shooter.shots}`\n"
+            f"> 🎯 Hits: `{shooter.hits}`\n"
+            f"> 🚢 Ships Sunk: `{len(shooter.sunk)}`\n"
+            f"> 🎯 Accuracy: `{shooter.accuracy:.1f}%`\n"
+            f"> 🔥 Best Hit Streak: `{shooter.best_streak}`\n"
+            f"> ⏱️ Avg. Time Between Shots: `{stats.format_gap(shooter.average_gap)}`\n"
+            f"> ⚓ Ships Lost: `{len(received.ships_lost)}`\n"
         )
 
     lines = ["🏁 **Final Match Summary:**\n"]
-    for team_slug in config.TEAMS_LIST:
-        board = boards.get(team_slug)
-        if not board:
-            lines.append(f"⚠️ No board found for `{team_slug}`.")
-            continue
+    for team_slug in (teams or config.TEAMS_LIST):
         team_display = config.TEAM_DISPLAY.get(team_slug, team_slug)
-        lines.append(summarize(board, team_display))
+        lines.append(summarize(team_slug, team_display))
 
     return "\n".join(lines)
 
@@ -107,42 +106,24 @@ def get_last_shot(team):
     if not opponent:
         return None
 
-    board = load_board(opponent)
-    shots = board.get("shots", {})
-    if not shots:
+    shooter = board_stats(opponent)
+    shooter = shooter.shooters.get(team) if shooter else None
+    if not shooter:
         return None
-
-    def parse_ts(ts_str):
-        dt = datetime.fromisoformat(ts_str)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
-
-    recent = sorted(
-        shots.items(),
-        key=lambda item: parse_ts(item[1]["timestamp"]),
-        reverse=True
-    )
-
-    for coord, shot in recent:
-        if shot.get("by", "").lower() == team.lower():
-            return {
-                "coord": coord,
-                "hit": shot["hit"],
-                "timestamp": parse_ts(shot["timestamp"])
-            }
-
-    return None
+    return {
+        "coord": shooter.last_coord,
+        "hit": shooter.last_hit,
+        "timestamp": shooter.last_time,
+    }
 
 
 
 SKIP_FILE = DATA_DIR / "skip_tokens.json"
 
 def load_skip_tokens():
-    if not SKIP_FILE.exists():
+    if not storage.exists(SKIP_FILE):
         return {team: 0 for team in config.TEAMS_LIST}
-    with open(SKIP_FILE) as f:
-        data = json.load(f)
+    data = read_json(SKIP_FILE, "skip_tokens")
 
     # ensure all teams from config.TEAMS_LIST are present
     for team in config.TEAMS_LIST:
@@ -151,16 +132,15 @@ def load_skip_tokens():
     return data
 
 def save_skip_tokens(tokens):
-    with open(SKIP_FILE, "w") as f:
-        json.dump(tokens, f, indent=2)
+    write_json(SKIP_FILE, tokens, "skip_tokens")
+    coalesce.invalidate()
 
 ACTIVE_SKIP_FILE = DATA_DIR / "active_skips.json"
 
 def load_active_skips():
-    if not ACTIVE_SKIP_FILE.exists():
+    if not storage.exists(ACTIVE_SKIP_FILE):
         return {team: False for team in config.TEAMS_LIST}
-    with open(ACTIVE_SKIP_FILE) as f:
-        data = json.load(f)
+    data = read_json(ACTIVE_SKIP_FILE, "active_skips")
 
     # ensure all teams from config.TEAMS_LIST are present
     for team in config.TEAMS_LIST:
@@ -169,38 +149,371 @@ def load_active_skips():
     return data
 
 def save_active_skips(data):
-    with open(ACTIVE_SKIP_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    write_json(ACTIVE_SKIP_FILE, data, "active_skips")
+    coalesce.invalidate()
+
+def complete_state_files(tokens, active_skips):
+    """Writes the skip token files if they're missing or lack a team. Returns the files written."""
+    written = []
+    for path, data, save, kind in (
+        (SKIP_FILE, tokens, save_skip_tokens, "skip_tokens"),
+        (ACTIVE_SKIP_FILE, active_skips, save_active_skips, "active_skips"),
+    ):
+        if not storage.exists(path) or read_json(path, kind) != data:
+            save(data)
+            written.append(os.path.basename(path))
+    return written
 
 # Utility Functions
-def board_path(team):
-    return os.path.join("data", f"board_{team}.json")
+def read_json(path, kind):
+    """Loads a JSON file (or its queued write), counting the read under `kind` in the metrics."""
+    raw = storage.read(path)
+    metrics.count_read(kind, len(raw))
+    return json.loads(raw)
+
+def write_json(path, data, kind):
+    """Queues data to be written as pretty-printed JSON, counting the write under `kind` in the metrics."""
+    raw = json.dumps(data, indent=2).encode()
+    storage.write(path, raw)
+    metrics.count_write(kind, len(raw))
+
+def board_path(team, board_format=None):
+    extension = serializers.get(board_format or config.BOARD_FORMAT).extension
+    return os.path.join("data", f"board_{team}{extension}")
+
+def match_id(team):
+    """Stable ID for the match a team plays in, e.g. `anneBonny-vs-maryRead`."""
+    opponent = config.TEAM_PAIRS.get(team)
+    if not opponent:
+        return team
+    return "-vs-".join(sorted([team, opponent]))
+
+# boards stay in memory between commands: {team: ((mtime_ns, size), board)}. the cache is the
+# authority: while a save is still queued in utils/storage.py its key is None and the file isn't
+# looked at. once the save lands the key is the file's stat again, so a board edited on disk
+# is picked up on the next load.
+_board_cache = {}
+_board_cache_lock = threading.Lock()
+
+def _file_key(stat):
+    return stat.st_mtime_ns, stat.st_size
+
+def _cache_board(team, key, board):
+    with _board_cache_lock:
+        cached = _board_cache.get(team)
+        if cached and cached[1] is not board:
+            board_index.forget(cached[1])
+        _board_cache[team] = (key, board)
+
+def _board_written(team, board, stat):
+    # runs on the storage writer thread; a newer save may already have replaced this board
+    with _board_cache_lock:
+        cached = _board_cache.get(team)
+        if cached and cached[1] is board and cached[0] is None:
+            _board_cache[team] = (_file_key(stat), board)
+
+def board_file_key(team):
+    """The (mtime_ns, size) of a team's board file, or None without one."""
+    return storage.stat_key(board_path(team))
+
+def cached_boards():
+    """{team: (file key, board)} for every board in memory that matches its file."""
+    with _board_cache_lock:
+        return {team: entry for team, entry in _board_cache.items() if entry[0] is not None}
+
+def prime_board(team, key, board):
+    """Caches a board known to match the board file with this key (see utils/startup.py)."""
+    _cache_board(team, tuple(key), board)
 
 def load_board(team):
     path = board_path(team)
-    if not os.path.exists(path):
+    cached = _board_cache.get(team)
+    if cached and cached[0] is None:
+        metrics.record_cache("board", True)
+        return cached[1]
+    key = storage.stat_key(path)
+    if key is None:
         return {}
-    with open(path, "r") as f:
-        return json.load(f)
+    if cached and cached[0] == key:
+        metrics.record_cache("board", True)
+        return cached[1]
+    metrics.record_cache("board", False)
+    board = serializers.read_board(path)
+    _cache_board(team, key, board)
+    return board
+
+def _write_board(team, board):
+    _cache_board(team, None, board)
+    serializers.write_board(board_path(team), board, lambda stat: _board_written(team, board, stat))
+
+def save_board(team, board, reason="saved", tokens=None, active_skips=None, event=None):
+    """
+    Writes a team's board and records it as a new version for !history / !undo, and in the
+    match log. `event` says what happened for the log ({"type": "shot", ...}).
+    """
+    _write_board(team, board)
+    return record_version(team, board, reason, tokens, active_skips, event=event)
+
+def board_stats(team):
+    """Running stats of everything fired at a team's board (see utils/stats.py), or None without a board."""
+    board = load_board(team) if team else None
+    if not board:
+        return None
+    return stats.for_board(team, board)
+
+def load_boards(teams):
+    """{team: board} for every team that has a board."""
+    boards = {}
+    for team in teams:
+        board = load_board(team)
+        if board:
+            boards[team] = board
+    return boards
+
+class BoardBatch:
+    """
+    Opens several teams' boards as one unit for ref-wide changes:
+
+        with BoardBatch(config.TEAMS_LIST) as batch:
+            for team, board in batch.boards.items():
+                ...change board...
+                batch.changed(team, "reason")
+
+    Changes are made to working copies. Leaving the block normally serializes every changed
+    board and only then swaps them all in and queues their writes in one go. If anything
+    raises first, no board changes at all.
+    """
+
+    def __init__(self, teams):
+        self.teams = list(teams)
+        self.boards = {}
+        self._reasons = {}
+        self._events = {}
+
+    def __enter__(self):
+        for team in self.teams:
+            original = load_board(team)
+            if not original:
+                continue
+            board = history.thaw(original)
+            board_index.copy_index(original, board)
+            self.boards[team] = board
+        return self
+
+    def changed(self, team, reason, event=None):
+        self._reasons[team] = reason
+        self._events[team] = event
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self._discard()
+        return False
+
+    def _discard(self):
+        for board in self.boards.values():
+            board_index.forget(board)
+
+    def commit(self):
+        """Saves every board marked as changed. Returns the version number recorded for each."""
+        if not self._reasons:
+            self._discard()
+            return {}
+        try:
+            encoded = {team: serializers.encode_board(board_path(team), self.boards[team]) for team in self._reasons}
+        except Exception:
+            self._discard()
+            raise
+
+        writes = []
+        for team, raw in encoded.items():
+            board = self.boards[team]
+            _cache_board(team, None, board)
+            writes.append((board_path(team), raw, lambda stat, team=team, board=board: _board_written(team, board, stat)))
+        storage.write_many(writes)
+
+        for team, board in self.boards.items():
+            if team not in self._reasons:
+                board_index.forget(board)
+        tokens, active_skips = load_skip_tokens(), load_active_skips()
+        versions = {
+            team: record_version(team, self.boards[team], reason, tokens, active_skips, event=self._events.get(team))
+            for team, reason in self._reasons.items()
+        }
+        self._reasons = {}
+        self._events = {}
+        return versions
+
+def record_version(team, board, reason, tokens=None, active_skips=None, based_on=None, event=None):
+    if tokens is None:
+        tokens = load_skip_tokens()
+    if active_skips is None:
+        active_skips = load_active_skips()
+    previous = history.latest(team)
+    number = history.record(team, board, reason, tokens, active_skips, last_shot_time, based_on)
+    before = previous.board if previous else None
+    after = history.latest(team).board
+    match = match_id(team)
+    stats.record(team, before, after, event)
+    match_log.record(match, team, before, after, reason, event)
+    live.update(team, number, after, event)
+    coalesce.invalidate()
+    if event and event.get("type") == "shot":
+        shot = after["shots"][event["coord"]]
+        archive.record_shot(match, event["by"], team, {**event, "ts": shot["timestamp"]})
+    elif event and event.get("type") == "rollback" and before is not None:
+        removed, restored = _shot_changes(before, after)
+        if removed or restored:
+            archive.record_rollback(match, team, removed, restored)
+    return number
+
+def _shot_changes(before, after):
+    """([(coord, ts)] of shots only in `before`, [(coord, ts)] of shots only in `after`)."""
+    old = {(coord, shot.get("timestamp")) for coord, shot in before.get("shots", {}).items()}
+    new = {(coord, shot.get("timestamp")) for coord, shot in after.get("shots", {}).items()}
+    return sorted(old - new), sorted(new - old)
+
+def restore_version(team, number):
+    """Puts a team's board, plus the skip tokens and cooldowns that went with it, back to a version."""
+    version = history.get_version(team, number)
+    if version is None:
+        return None
+
+    tokens = load_skip_tokens()
+    active_skips = load_active_skips()
+    tokens.update(version.skip_tokens)
+    active_skips.update(version.active_skips)
+    for t, last in version.cooldowns.items():
+        if last is None:
+            last_shot_time.pop(t, None)
+        else:
+            last_shot_time[t] = last
+    save_skip_tokens(tokens)
+    save_active_skips(active_skips)
+
+    board = history.thaw(version.board)
+    _write_board(team, board)
+    record_version(team, board, f"rollback to v{number}", tokens, active_skips, based_on=number,
+                   event={"type": "rollback", "version": number})
+    return board
+
+# (file contents, tiles) of the last base_tiles.json read. storage hands back the same bytes
+# while the file is unchanged, so the catalog is parsed (and fingerprinted) once per version
+_tiles = (None, None)
 
 def load_tiles():
-    with open(DATA_DIR / "base_tiles.json") as f:
-        return json.load(f)["tiles"]
+    """The base tile catalog. Shared between callers: treat it as read-only."""
+    global _tiles
+    raw = storage.read(DATA_DIR / "base_tiles.json")
+    if _tiles[0] is not raw:
+        metrics.count_read("base_tiles", len(raw))
+        _tiles = (raw, json.loads(raw)["tiles"])
+    return _tiles[1]
+
+def team_seed(base_seed, team):
+    """Seed for one team's board, derived from a match or tournament seed."""
+    return random.Random(f"{base_seed}:{team}").randrange(2**32)
+
+def _tile_count(tile):
+    return tile.get("count", 0) or 0
+
+def _balance(tiles, dealt, spare, target, tolerance):
+    """Swaps dealt tiles for spare ones until the dealt `count` total is within tolerance of target."""
+    total = sum(_tile_count(tiles[i]) for i in dealt)
+    spare = sorted(spare, key=lambda i: (_tile_count(tiles[i]), i))
+    spare_counts = [_tile_count(tiles[i]) for i in spare]
+
+    while spare and abs(total - target) > tolerance:
+        best = None
+        for pos, i in enumerate(dealt):
+            # the spare count that would land the total exactly on target
+            wanted = _tile_count(tiles[i]) - (total - target)
+            k = bisect.bisect_left(spare_counts, wanted)
+            for j in (k - 1, k):
+                if 0 <= j < len(spare):
+                    new_total = total - _tile_count(tiles[i]) + spare_counts[j]
+                    if best is None or abs(new_total - target) < best[0]:
+                        best = (abs(new_total - target), pos, j, new_total)
+        if best is None or best[0] >= abs(total - target):
+            break
+        _, pos, j, total = best
+        swapped_out = dealt[pos]
+        dealt[pos] = spare.pop(j)
+        spare_counts.pop(j)
+        k = bisect.bisect_left(spare_counts, _tile_count(tiles[swapped_out]))
+        spare.insert(k, swapped_out)
+        spare_counts.insert(k, _tile_count(tiles[swapped_out]))
+    return total
 
 # Board Management Functions
-def generate_board():
-    tiles = load_tiles()
+def generate_board(seed=None, tiles=None, target_count=None, tolerance=0):
+    """
+    Deals 100 tiles from the catalog onto a board. The same seed, catalog and settings always give
+    the same board, and they're stored under "generation" so regenerate_board can rebuild it.
+    With target_count, dealt tiles are swapped for undealt ones until the board's total `count`
+    is within tolerance of it (as close as the catalog allows).
+    """
+    if tiles is None:
+        tiles = load_tiles()
     assert len(tiles) >= 100, "Need at least 100 tiles"
-    random.shuffle(tiles)
+    if seed is None:
+        seed = random.randrange(2**32)
+
+    order = list(range(len(tiles)))
+    random.Random(seed).shuffle(order)
+    dealt, spare = order[:100], order[100:]
+    if target_count is not None:
+        total = _balance(tiles, dealt, spare, target_count, tolerance)
+    else:
+        total = sum(_tile_count(tiles[i]) for i in dealt)
+
     board = {}
     rows = "ABCDEFGHIJ"
-
     for i in range(10):
         for j in range(10):
             coord = f"{rows[i]}{j+1}"
-            board[coord] = tiles.pop()
-    
-    return {"tiles": board}
+            board[coord] = dict(tiles[dealt[i * 10 + j]])
+
+    generation = {"seed": seed, "catalog": serializers.catalog_fingerprint(tiles), "count_total": total}
+    if target_count is not None:
+        generation["target_count"] = target_count
+        generation["tolerance"] = tolerance
+    return {"tiles": board, "generation": generation}
+
+def balanced_target(tiles):
+    """Expected `count` total of a 100 tile board dealt from this catalog."""
+    return round(sum(_tile_count(t) for t in tiles) * 100 / len(tiles))
+
+def generate_boards(teams, seed=None, balanced=False, tolerance=0, tiles=None):
+    """
+    Generates a board for every team from a single catalog load. Each team's seed comes from
+    `seed`, so the one number reproduces the whole batch. Returns {team: board}.
+    """
+    if tiles is None:
+        tiles = load_tiles()
+    if seed is None:
+        seed = random.randrange(2**32)
+    target = balanced_target(tiles) if balanced else None
+    boards = {}
+    for team in teams:
+        boards[team] = generate_board(team_seed(seed, team), tiles, target, tolerance)
+        boards[team]["generation"]["batch_seed"] = seed
+    return boards
+
+def regenerate_board(board, tiles=None):
+    """Rebuilds a board's tiles from its recorded generation settings. Raises ValueError if it can't."""
+    generation = board.get("generation")
+    if not generation:
+        raise ValueError("board has no generation record (generated before seeds were stored)")
+    if tiles is None:
+        tiles = load_tiles()
+    if serializers.catalog_fingerprint(tiles) != generation["catalog"]:
+        raise ValueError("the tile catalog changed since this board was generated")
+    rebuilt = generate_board(generation["seed"], tiles, generation.get("target_count"), generation.get("tolerance", 0))
+    if "batch_seed" in generation:
+        rebuilt["generation"]["batch_seed"] = generation["batch_seed"]
+    return rebuilt
 
 def all_ships_placed(board, required_ships):
     placed = set(board.get("ships", {}).keys())
@@ -226,7 +539,6 @@ def unlock_board(board):
 def place_ship(board, ship_type, orientation, start_coord, ship_definitions):
     if board.get("locked", False):
         return "❌ Board is locked. Cannot place ships."
-    rows = "ABCDEFGHIJ"
     orientation = orientation.lower()
     ship_type = ship_type.lower()
 
@@ -239,31 +551,27 @@ def place_ship(board, ship_type, orientation, start_coord, ship_definitions):
     ship_tiles = ship_definitions[ship_type]
     length = len(ship_tiles)
 
-    try:
-        row_letter, col = start_coord[0].upper(), int(start_coord[1:])
-        row_idx = rows.index(row_letter)
-        col_idx = col - 1
-    except Exception:
+    start_idx = placement.cell_index(start_coord)
+    if start_idx is None:
         return f"❌ Invalid coordinate format. Use format like A3."
 
-    coords = []
-    for i in range(length):
-        r, c = row_idx, col_idx
-        if orientation == "h":
-            c += i
-        elif orientation == "v":
-            r += i
-        else:
-            return f"❌ Invalid orientation: {orientation}. Use 'h' for horizontal or 'v' for vertical."
+    if orientation not in ("h", "v"):
+        return f"❌ Invalid orientation: {orientation}. Use 'h' for horizontal or 'v' for vertical."
 
-        if r >= 10 or c >= 10:
-            return f"❌ {ship_type.capitalize()} would go out of bounds."
+    cells = placement.placement_cells(length, orientation, start_idx)
+    if cells is None:
+        return f"❌ {ship_type.capitalize()} would go out of bounds."
+    mask, coords = cells
 
-        coord = f"{rows[r]}{c+1}"
-        if board["tiles"].get(coord, {}).get("ship"):
-            return f"❌ Overlaps another ship at {coord}."
-
-        coords.append(coord)
+    occupied = board_index.occupied(board)
+    if occupied is None:
+        # no index keeping the mask: only this ship's own cells need looking at
+        taken = next((coord for coord in coords if "ship" in board["tiles"][coord]), None)
+    else:
+        overlap = mask & occupied
+        taken = placement.first_coord(overlap) if overlap else None
+    if taken:
+        return f"❌ Overlaps another ship at {taken}."
 
     for i, coord in enumerate(coords):
         original_tile = board["tiles"][coord].copy()
@@ -273,7 +581,8 @@ def place_ship(board, ship_type, orientation, start_coord, ship_definitions):
             "previous_tile": original_tile,
         }
 
-    board.setdefault("ships", {})[ship_type] = coords
+    board.setdefault("ships", {})[ship_type] = list(coords)
+    board_index.touch(board, *coords)
     direction = "horizontally" if orientation == "h" else "vertically"
     return f"✅ Placed {ship_type.capitalize()} starting at {coords[0]} going {direction}."
 
@@ -290,44 +599,142 @@ def remove_ship(board, ship_type):
         if prev:
             board["tiles"][coord] = prev
         else:
-            board["tiles"][coord]["ship"] = None
-            board["tiles"][coord].pop("ship_tile_data", None)
+            # replace rather than edit the tile, other copies of the board may share it
+            board["tiles"][coord] = {k: v for k, v in tile.items() if k not in ("ship", "ship_tile_data")}
 
+    board_index.touch(board, *board["ships"][ship_type])
     del board["ships"][ship_type]
     return f"✅ Removed {ship_type.capitalize()}."
 
-# File Operations for Ship Placement and Removal
-def place_ship_to_file(team_name, ship_type, orientation, start_coord, ship_definitions, board_dir="data"):
-    file_path = os.path.join(board_dir, f"board_{team_name}.json")
+def autoplace_fleet(board, ship_definitions, no_touch=False, edge_bias=0.0, rng=None):
+    """Places every ship that isn't on the board yet at random, around the ones that are."""
+    if board.get("locked", False):
+        return "❌ Board is locked. Cannot place ships."
 
-    if not os.path.exists(file_path):
-        return f"❌ Board file for team '{team_name}' not found."
+    placed = board.get("ships", {})
+    missing = {ship: len(tiles) for ship, tiles in ship_definitions.items() if ship not in placed}
+    if not missing:
+        return "❌ All ships are already placed."
 
-    with open(file_path, "r") as f:
-        board = json.load(f)
+    occupied = board_index.occupied(board)
+    if occupied is None:
+        occupied = placement.occupied_mask(board)
+    fleet = placement.random_fleet(missing, occupied, no_touch, edge_bias, rng)
+    if fleet is None:
+        return "❌ Couldn't fit the remaining ships around the ones already placed. Try removing some first."
 
-    result = place_ship(board, ship_type, orientation, start_coord, ship_definitions)
+    for ship_type, (orientation, start_coord, _) in fleet.items():
+        place_ship(board, ship_type, orientation, start_coord, ship_definitions)
+    return f"✅ Auto-placed {', '.join(ship.capitalize() for ship in fleet)}."
 
-    if result.startswith("✅"):
-        with open(file_path, "w") as f:
-            json.dump(board, f, indent=2)
+def parse_fleet(spec):
+    """
+    Parses `carrier h A1; battleship v C3` (semicolons or new lines between ships) into
+    [(ship_type, orientation, start_coord)]. Returns (placements, errors).
+    """
+    placements, errors = [], []
+    for chunk in spec.replace("\n", ";").split(";"):
+        parts = chunk.replace(",", "").split()
+        if not parts:
+            continue
+        if len(parts) != 3:
+            errors.append(f"❌ Couldn't read `{chunk.strip()}`. Use `ship h/v coord`, e.g. `carrier h A1`.")
+            continue
+        placements.append((parts[0].lower(), parts[1].lower(), parts[2].upper()))
+    return placements, errors
 
-    return result
+def fleet_from_json(data):
+    """
+    Accepts either a list of {"ship", "orientation", "start"} objects or a dict like
+    {"carrier": "h A1"} / {"carrier": {"orientation": "h", "start": "A1"}}.
+    """
+    if isinstance(data, dict):
+        data = data.get("ships", data)
+    placements = []
+    if isinstance(data, dict):
+        for ship_type, spec in data.items():
+            if isinstance(spec, str):
+                orientation, _, start = spec.replace(",", "").partition(" ")
+            else:
+                orientation, start = spec.get("orientation", ""), spec.get("start", "")
+            placements.append((ship_type.lower(), orientation.strip().lower(), start.strip().upper()))
+    elif isinstance(data, list):
+        for entry in data:
+            placements.append((
+                str(entry.get("ship", "")).lower(),
+                str(entry.get("orientation", "")).lower(),
+                str(entry.get("start", "")).replace(",", "").upper(),
+            ))
+    else:
+        raise ValueError("expected a list or an object of ship placements")
+    return placements
 
-def remove_ship_from_file(team_name, ship_type, board_dir="data"):
-    file_path = os.path.join(board_dir, f"board_{team_name}.json")
+def place_fleet(board, placements, ship_definitions):
+    """
+    Places several ships as one change: all of them go on the board, or none do.
+    Ships in the set that are already on the board are moved. Returns (ok, messages).
+    """
+    if board.get("locked", False):
+        return False, ["❌ Board is locked. Cannot place ships."]
+    if not placements:
+        return False, ["❌ No ships given."]
+
+    seen = set()
+    for ship_type, _, _ in placements:
+        if ship_type in seen:
+            return False, [f"❌ {ship_type.capitalize()} is listed more than once."]
+        seen.add(ship_type)
+
+    # work on a copy so a bad ship halfway through leaves the real board untouched
+    work = {**board, "tiles": dict(board["tiles"]), "ships": dict(board.get("ships", {}))}
+    board_index.copy_index(board, work)
+    for ship_type in seen:
+        if ship_type in work["ships"]:
+            remove_ship(work, ship_type)
+
+    messages, ok = [], True
+    for ship_type, orientation, start_coord in placements:
+        result = place_ship(work, ship_type, orientation, start_coord, ship_definitions)
+        ok = ok and result.startswith("✅")
+        messages.append(result)
+    board_index.forget(work)
+
+    if ok:
+        changed = [c for ship in seen for c in board.get("ships", {}).get(ship, [])]
+        board["tiles"] = work["tiles"]
+        board["ships"] = work["ships"]
+        changed += [c for ship in seen for c in board["ships"][ship]]
+        board_index.touch(board, *changed)
+    return ok, messages
 
-    if not os.path.exists(file_path):
+# File Operations for Ship Placement and Removal
+def place_ship_to_file(team_name, ship_type, orientation, start_coord, ship_definitions):
+    with tracing.span("load"):
+        board = load_board(team_name)
+    if not board:
         return f"❌ Board file for team '{team_name}' not found."
 
-    with open(file_path, "r") as f:
-        board = json.load(f)
+    with tracing.span("mutate"):
+        result = place_ship(board, ship_type, orientation, start_coord, ship_definitions)
 
-    result = remove_ship(board, ship_type)
+    if result.startswith("✅"):
+        with tracing.span("persist"):
+            save_board(team_name, board, f"placed {ship_type.lower()}", event={"type": "ship_placed", "ship": ship_type})
+
+    return result
+
+def remove_ship_from_file(team_name, ship_type):
+    with tracing.span("load"):
+        board = load_board(team_name)
+    if not board:
+        return f"❌ Board file for team '{team_name}' not found."
+
+    with tracing.span("mutate"):
+        result = remove_ship(board, ship_type)
 
     if result.startswith("✅"):
-        with open(file_path, "w") as f:
-            json.dump(board, f, indent=2)
+        with tracing.span("persist"):
+            save_board(team_name, board, f"removed {ship_type.lower()}", event={"type": "ship_removed", "ship": ship_type})
 
     return result
 
@@ -351,15 +758,46 @@ def can_shoot(team):
 def already_shot(board, coord):
     return coord.upper() in board.get("shots", {})
 
-def handle_tile_selection(bot, selecting_team, target_coord, boards, team_channels):
+# teams with a !select being handled right now (begin_shot/end_shot)
+_shots_in_flight = set()
+
+def begin_shot(team):
+    """Claims the team's one shot in flight. False if another !select of theirs holds it."""
+    if team in _shots_in_flight:
+        return False
+    _shots_in_flight.add(team)
+    return True
+
+def end_shot(team):
+    _shots_in_flight.discard(team)
+
+def precheck_selection(team, coord):
+    """
+    The checks a shot can fail without touching the disk: the coordinate, the cooldown and,
+    when the target board is in memory, whether the square was already struck. Returns the
+    error to send, or None if the shot is worth loading the boards for. handle_tile_selection
+    still makes every check itself.
+    """
+    if placement.cell_index(coord) is None:
+        return f"❌ **{coord}** is impossible to hit — there's nothing there to strike, Captain!"
+    ok, cooldown_msg = can_shoot(team)
+    if not ok:
+        return cooldown_msg
+    latest = history.latest(config.TEAM_PAIRS.get(team))
+    if latest is not None and already_shot(latest.board, coord):
+        return f"⚠️ **{coord}** has already been struck. Choose another target."
+    return None
+
+def handle_tile_selection(bot, selecting_team, target_coord, boards, team_channels, player=None):
     opposing_team = config.TEAM_PAIRS.get(selecting_team)
     target_board = boards[opposing_team]
     target_coord = target_coord.upper()
     team_img = None
     opponent_img = None
 
-    tokens = load_skip_tokens()
-    active_skips = load_active_skips()
+    with tracing.span("load_skip_tokens"):
+        tokens = load_skip_tokens()
+        active_skips = load_active_skips()
     skip_used = False
 
     can_shoot_result, cooldown_msg = can_shoot(selecting_team)
@@ -392,32 +830,44 @@ def handle_tile_selection(bot, selecting_team, target_coord, boards, team_channe
     is_hit = "ship" in tile
     timestamp = datetime.now(timezone.utc).isoformat()
 
-    target_board.setdefault("shots", {})[target_coord] = {
-        "by": selecting_team,
-        "hit": is_hit,
-        "timestamp": timestamp,
-    }
+    with tracing.span("mutate", coord=target_coord, hit=is_hit):
+        target_board.setdefault("shots", {})[target_coord] = {
+            "by": selecting_team,
+            "hit": is_hit,
+            "timestamp": timestamp,
+        }
+        board_index.touch(target_board, target_coord)
 
-    if not is_hit:
-        if active_skips.get(selecting_team) and tokens.get(selecting_team, 0) > 0:
-            tokens[selecting_team] -= 1
-            active_skips[selecting_team] = False
-            save_skip_tokens(tokens)
-            save_active_skips(active_skips)
-            skip_used = True
+        if not is_hit:
+            if active_skips.get(selecting_team) and tokens.get(selecting_team, 0) > 0:
+                tokens[selecting_team] -= 1
+                active_skips[selecting_team] = False
+                skip_used = True
+            else:
+                last_shot_time[selecting_team] = datetime.now(timezone.utc)
         else:
             last_shot_time[selecting_team] = datetime.now(timezone.utc)
-    else:
-        last_shot_time[selecting_team] = datetime.now(timezone.utc)
 
-    with open(board_path(opposing_team), "w") as f:
-        json.dump(target_board, f, indent=2)
+    ship_type = tile.get("ship")
+    sunk = bool(is_hit and ship_type and is_ship_sunk(target_board, ship_type))
+    shot_event = {
+        "type": "shot", "by": selecting_team, "coord": target_coord, "hit": is_hit, "ship": ship_type,
+        "sunk": sunk, "skipped": skip_used, "tile": tile.get("name"), "tile_count": tile.get("count"),
+    }
+    if player is not None:
+        shot_event["player_id"] = str(player.id)
+        shot_event["player"] = getattr(player, "display_name", None) or str(player)
+
+    with tracing.span("persist"):
+        if skip_used:
+            save_skip_tokens(tokens)
+            save_active_skips(active_skips)
+        save_board(opposing_team, target_board, f"shot {target_coord} by {selecting_team}", tokens, active_skips, event=shot_event)
 
     team_selecting_channel = team_channels[selecting_team]
     team_target_channel = team_channels[opposing_team]
 
     if is_hit:
-        ship_type = tile.get("ship")
         ship_name = ship_type.capitalize() if ship_type else "Unknown"
         tile_name = tile["name"]
         tile_details = tile.get("details", "")
@@ -444,7 +894,7 @@ def handle_tile_selection(bot, selecting_team, target_coord, boards, team_channe
             image="https://media3.giphy.com/media/v1.Y2lkPTc5MGI3NjExdnY1ZDByNWJ1YmplbXBxOXNiZmh1cWY2M3NpbHVqazNibDd5a2I3MSZlcD12MV9pbnRlcm5hbF9naWZfYnlfaWQmY3Q9Zw/c41Vg6E0tqOuxk32rH/giphy.gif"
         ))
         # check if this sunk the ship
-        if ship_type and is_ship_sunk(target_board, ship_type):
+        if sunk:
             result_to_team += f"\n\n🔥 **You sunk the enemy’s {ship_name}!** 💥"
             result_to_opponent += f"\n\n💥 **Your {ship_name} has been sunk!** Prepare to patch the hull!"
 
@@ -496,8 +946,19 @@ def handle_tile_selection(bot, selecting_team, target_coord, boards, team_channe
             image="https://media1.giphy.com/media/v1.Y2lkPTc5MGI3NjExeHNtMDV1ZDdycXE4d3F3bHRseTNzbW1zd3BsNDc0cXRxNmptY3hteSZlcD12MV9pbnRlcm5hbF9naWZfYnlfaWQmY3Q9Zw/3og0ITfxYUkLNVawrm/giphy.gif"
         ))
 
-    board_preview_for_selecting = render_board_with_shots(target_board, reveal_ships=False)
-    board_preview_for_opponent = render_board_with_shots(target_board, reveal_ships=True)
+    with tracing.span("render"):
+        board_preview_for_selecting = render_board_with_shots(target_board, reveal_ships=False)
+        board_preview_for_opponent = render_board_with_shots(target_board, reveal_ships=True)
+
+    if config.HEATMAP_ON_SELECT:
+        with tracing.span("heatmap"):
+            heat = heatmap.render_heatmap(target_board, cache_key=opposing_team)
+        asyncio.create_task(announce_to_spectators(
+            bot,
+            heat,
+            color=config.TEAM_COLORS[selecting_team],
+            title="🔥 Targeting Heatmap of " + config.TEAM_DISPLAY[opposing_team] + "'s Waters"
+        ))
 
     if is_hit: 
         asyncio.create_task(announce_to_spectators(
@@ -601,7 +1062,7 @@ async def current_task_command(team, boards, ctx):
     
     opponent_board = boards[opponent_team]
 
-    last_coord = get_last_shot_coord(opponent_board)
+    last_coord = stats.for_board(opponent_team, opponent_board).last_coord
     if not last_coord:
         await ctx.send("Yer cannons be silent — no shots fired yet, captain!")
         return
@@ -609,17 +1070,6 @@ async def current_task_command(team, boards, ctx):
     details_msg = get_tile_details(opponent_board, last_coord)
     await ctx.send(details_msg)
 
-def get_last_shot_coord(board):
-    shots = board.get("shots", {})
-    if not shots:
-        return None
-    sorted_shots = sorted(
-        shots.items(),
-        key=lambda item: datetime.fromisoformat(item[1]["timestamp"]),
-        reverse=True,
-    )
-    return sorted_shots[0][0]
-
 def get_shots_against_team(team):
     board = load_board(team)
     return board.get("shots", {})
@@ -640,92 +1090,145 @@ def get_move_history_for_team(team_name, boards):
 
 ## event functions
 def apply_event_to_board(event_type, team, events_data):
-    board = load_board(team)
+    """Starts an event on a random eligible tile. Returns (event, error), like resolve_event_on_board."""
+    with tracing.span("load", team=team):
+        board = load_board(team)
+    event, error = place_event(board, event_type, events_data)
+    if error:
+        return None, error
+
+    with tracing.span("persist", team=team):
+        save_board(team, board, f"{event['event_id']} event at {event['coord']}", event={"type": "event_started", **event})
+    return event, None
+
+def apply_event_to_boards(event_type, teams, events_data):
+    """
+    Starts an event on every team's board as one batch: either every board gets its event or,
+    if anything fails, none does. Returns {team: (event, error)}.
+    """
+    results = {}
+    with tracing.span("batch", teams=len(teams)), BoardBatch(teams) as batch:
+        for team in teams:
+            board = batch.boards.get(team)
+            if board is None:
+                results[team] = (None, "No board found.")
+                continue
+            event, error = place_event(board, event_type, events_data)
+            results[team] = (event, error)
+            if event:
+                batch.changed(team, f"{event['event_id']} event at {event['coord']}", {"type": "event_started", **event})
+    return results
+
+def place_event(board, event_type, events_data):
+    """Puts an event on a random eligible tile of a board (in memory). Returns (event, error)."""
     reward = events_data[event_type].get("reward")
+    index = board_index.index_for(board)
 
     if reward == "skip":
-        # get non-ship, non-shot, non-event tiles
-        opponent_team = team  # the team whose board the event is applied to
-        tile_candidates = [
-            coord for coord, tile in board["tiles"].items()
-            if "ship" not in tile and not tile.get("event") and coord not in board.get("shots", {})
-        ]
+        # non-ship, non-shot, non-event tiles
+        tile_candidates = index.free_water
     else:
-        # default: pick a ship tile with no active event
-        tile_candidates = [
-            coord for coord, tile in board["tiles"].items()
-            if "ship" in tile and not tile.get("event")
-        ]
+        # default: a ship tile with no active event
+        tile_candidates = index.live_ships
 
     if not tile_candidates:
         return None, "No valid tiles available to apply this event."
 
-    target_coord = random.choice(tile_candidates)
+    target_coord = random.choice(sorted(tile_candidates))
     original = board["tiles"][target_coord]
 
+    # several events (even of the same type) can run at once, each with its own ID
+    board["event_seq"] = board.get("event_seq", 0) + 1
+    event_id = f"{event_type}-{board['event_seq']}"
+
     board["tiles"][target_coord] = {
         "name": f"{event_type.title()} Event",
         "details": events_data[event_type]["details"],
         "event": event_type,
+        "event_id": event_id,
         "emoji": events_data[event_type]["emoji"],
         "original_tile": original,
         "event_timestamp": datetime.utcnow().isoformat()
     }
+    index.update([target_coord])
+    return {"event_id": event_id, "event_type": event_type, "coord": target_coord}, None
 
-    file_path = board_path(team)
-    with open(file_path, "w") as f:
-        json.dump(board, f, indent=2)
-
-    return target_coord, None
-
-
-def resolve_event_on_board(event_type, team, result, events_data=None):
+def active_events(team):
+    """{event_id: (coord, event_type)} for every event running on a team's board."""
     board = load_board(team)
+    if not board:
+        return {}
+    return dict(board_index.index_for(board).events)
 
-    for coord, tile in board["tiles"].items():
-        if tile.get("event") == event_type:
-            reward = events_data.get(event_type, {}).get("reward") if events_data else None
-
-            if result == "complete":
-                if reward == "skip":
-                    # mark it as a resolved virtual miss (log it as a shot)
-                    board.setdefault("shots", {})[coord] = {
-                        "by": "event-complete",
-                        "hit": False,
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                else:
-                    # default restoration for ship-based events
-                    board["tiles"][coord] = tile.get("original_tile", {
-                        "name": "Unknown Waters",
-                        "details": "Restored after mysterious event.",
-                    })
-
-                # apply skip token if applicable
-                if reward == "skip":
-                    tokens = load_skip_tokens()
-                    tokens[team] = tokens.get(team, 0) + 1
-                    save_skip_tokens(tokens)
-
-            elif result == "fail":
-                # ship piece is marked as wreckage
-                board["tiles"][coord] = {
-                    "name": "Wreckage",
-                    "details": f"This piece of your ship was destroyed by the {event_type}!",
-                }
-
-                board.setdefault("shots", {})[coord] = {
-                    "by": "event",
-                    "hit": True,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-            else:
-                return False
+def find_event(team, event_ref):
+    """Finds an active event by ID (`kraken-2`) or by type when only one of it is running."""
+    board = load_board(team)
+    if not board:
+        return None, None, f"No board found for `{team}`."
+    event_id, coord, error = board_index.index_for(board).find_event(event_ref)
+    if error:
+        return None, None, error
+    return event_id, board["tiles"][coord]["event"], None
+
+def resolve_event_on_board(event_ref, team, result, events_data=None):
+    """
+    Resolves one active event, picked by ID or by type. Returns (event, error) where event is
+    {"event_id", "event_type", "coord"}.
+    """
+    if result not in ("complete", "fail"):
+        return None, f"Unknown result `{result}`."
+
+    with tracing.span("load", team=team):
+        board = load_board(team)
+    if not board:
+        return None, f"No board found for `{team}`."
+    index = board_index.index_for(board)
+    event_id, coord, error = index.find_event(event_ref)
+    if error:
+        return None, error
+
+    tile = board["tiles"][coord]
+    event_type = tile["event"]
+    reward = events_data.get(event_type, {}).get("reward") if events_data else None
+
+    if result == "complete":
+        if reward == "skip":
+            # mark it as a resolved virtual miss (log it as a shot)
+            board.setdefault("shots", {})[coord] = {
+                "by": "event-complete",
+                "hit": False,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        else:
+            # default restoration for ship-based events
+            board["tiles"][coord] = tile.get("original_tile", {
+                "name": "Unknown Waters",
+                "details": "Restored after mysterious event.",
+            })
+
+        # apply skip token if applicable
+        if reward == "skip":
+            tokens = load_skip_tokens()
+            tokens[team] = tokens.get(team, 0) + 1
+            save_skip_tokens(tokens)
 
-            with open(board_path(team), "w") as f:
-                json.dump(board, f, indent=2)
+    else:
+        # ship piece is marked as wreckage
+        board["tiles"][coord] = {
+            "name": "Wreckage",
+            "details": f"This piece of your ship was destroyed by the {event_type}!",
+        }
 
-            return True
+        board.setdefault("shots", {})[coord] = {
+            "by": "event",
+            "hit": True,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    index.update([coord])
 
-    return False
+    with tracing.span("persist", team=team):
+        save_board(team, board, f"{event_id} event {result} at {coord}", event={
+            "type": "event_resolved", "event_id": event_id, "event_type": event_type, "coord": coord, "result": result,
+        })
 
+    return {"event_id": event_id, "event_type": event_type, "coord": coord}, None
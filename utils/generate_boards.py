@@ -0,0 +1,81 @@
+# run python -m utils.generate_boards to deal every team's board for a match in one go
+#
+#   python -m utils.generate_boards --seed 20250601                 # boards for every configured team
+#   python -m utils.generate_boards team1 team2 team3 --balanced    # a tournament's worth, fair `count` totals
+#   python -m utils.generate_boards --check                         # rebuild existing boards from their seeds
+#
+# the seed, catalog fingerprint and balancing settings are stored in each board file under
+# "generation", so any board can be dealt again exactly for a bug report or an audit.
+
+import argparse
+import os
+
+import config
+from utils import match_config
+from utils.game import board_path, generate_boards, load_board, load_tiles, regenerate_board, save_board
+
+
+def check_boards(teams, tiles):
+    failed = 0
+    for team in teams:
+        board = load_board(team)
+        if not board:
+            print(f"{team}: no board")
+            continue
+        try:
+            rebuilt = regenerate_board(board, tiles)
+        except ValueError as e:
+            print(f"{team}: can't rebuild ({e})")
+            failed += 1
+            continue
+        # ships and events are layered on top of the dealt tiles, so compare the originals
+        # (wreckage no longer remembers what was under it)
+        mismatched = []
+        for coord, tile in board["tiles"].items():
+            while "previous_tile" in tile or "original_tile" in tile:
+                tile = tile.get("previous_tile") or tile["original_tile"]
+            if tile.get("name") != "Wreckage" and tile != rebuilt["tiles"].get(coord):
+                mismatched.append(coord)
+        if not mismatched:
+            print(f"{team}: ✅ matches seed {board['generation']['seed']}")
+        else:
+            print(f"{team}: ❌ differs from seed {board['generation']['seed']} at {', '.join(mismatched[:10])}")
+            failed += 1
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate reproducible boards for every team in one batch.")
+    parser.add_argument("teams", nargs="*", help="teams to generate boards for (default: every configured team)")
+    parser.add_argument("--seed", type=int, help="match seed; every team's board is derived from it (default: random)")
+    parser.add_argument("--balanced", action="store_true", help="even out the total tile `count` between boards")
+    parser.add_argument("--tolerance", type=int, default=0, help="how far a balanced board's total may be from the target")
+    parser.add_argument("--force", action="store_true", help="overwrite boards that already exist")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would be generated")
+    parser.add_argument("--check", action="store_true", help="verify existing boards against their recorded seeds")
+    args = parser.parse_args(argv)
+
+    match_config.load_initial()
+    teams = args.teams or list(config.TEAMS_LIST)
+    tiles = load_tiles()
+
+    if args.check:
+        raise SystemExit(1 if check_boards(teams, tiles) else 0)
+
+    existing = [team for team in teams if os.path.exists(board_path(team))]
+    if existing and not (args.force or args.dry_run):
+        raise SystemExit(f"Boards already exist for {', '.join(existing)}. Use --force to replace them.")
+
+    boards = generate_boards(teams, args.seed, args.balanced, args.tolerance, tiles)
+    for team, board in boards.items():
+        generation = board["generation"]
+        print(f"{team}: seed {generation['seed']}, count total {generation['count_total']}")
+        if not args.dry_run:
+            save_board(team, board, "generated")
+
+    batch_seed = next(iter(boards.values()))["generation"]["batch_seed"] if boards else args.seed
+    print(f"{'Would generate' if args.dry_run else 'Generated'} {len(boards)} board(s) from match seed {batch_seed}.")
+
+
+if __name__ == "__main__":
+    main()
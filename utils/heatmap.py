@@ -0,0 +1,139 @@
+# targeting heatmap for spectators and refs: for every unshot cell, the chance that it holds a
+# ship that is still afloat, using only what everyone already knows (the shots, which ships are
+# sunk and the ship lengths). each remaining ship is treated as equally likely to be in any
+# placement that doesn't cross a miss or a sunk ship; placements through unresolved hits are
+# weighted up, since a hit ship has to be somewhere around its hits.
+#
+# the legal placements per board are cached and, as shots only ever add information, each new
+# shot just filters the cached lists instead of enumerating the board again.
+
+from utils import placement
+
+# how much more likely a placement is for every unresolved hit it covers
+HIT_WEIGHT = 20
+
+# cheapest to hottest
+HEAT_EMOJIS = ["🟦", "🟩", "🟨", "🟧", "🟥"]
+
+# {length: [(mask, cell_indices), ...]}
+_tables = {}
+# {cache_key: {"blocked": mask, "valid": {length: [(mask, cells), ...]}}}
+_cache = {}
+
+
+def _table(length):
+    if length not in _tables:
+        _tables[length] = [
+            (mask, tuple(placement.cell_index(c) for c in placement.mask_coords(mask)))
+            for mask, _, _ in placement.placements(length)
+        ]
+    return _tables[length]
+
+
+def board_knowledge(board):
+    """Public information about a board: (miss mask, unresolved hit mask, sunk mask, lengths of ships afloat)."""
+    shots = board.get("shots", {})
+    misses = hits = 0
+    for coord, shot in shots.items():
+        index = placement.cell_index(coord)
+        if index is None:
+            continue
+        if shot.get("hit"):
+            hits |= 1 << index
+        else:
+            misses |= 1 << index
+
+    sunk = 0
+    afloat = []
+    for ship_type, coords in board.get("ships", {}).items():
+        mask = placement.coords_mask(coords)
+        if mask and mask & hits == mask:
+            sunk |= mask
+        else:
+            afloat.append(len(coords))
+    return misses, hits & ~sunk, sunk, afloat
+
+
+def _valid_placements(cache_key, blocked, lengths):
+    entry = _cache.get(cache_key)
+    if entry is None or entry["blocked"] & ~blocked:
+        # first look at this board, or something was un-shot (undo/rollback): start over
+        entry = {"blocked": 0, "valid": {}}
+        _cache[cache_key] = entry
+
+    new_bits = blocked & ~entry["blocked"]
+    for length in set(lengths):
+        if length not in entry["valid"]:
+            entry["valid"][length] = [p for p in _table(length) if not p[0] & blocked]
+        elif new_bits:
+            entry["valid"][length] = [p for p in entry["valid"][length] if not p[0] & new_bits]
+    entry["blocked"] = blocked
+    return entry["valid"]
+
+
+def probabilities(board, cache_key=None):
+    """Returns a list of 100 probabilities (A1..J10); shot cells are always 0."""
+    misses, open_hits, sunk, afloat = board_knowledge(board)
+    shot_mask = misses | open_hits | sunk
+    blocked = misses | sunk
+    valid = _valid_placements(cache_key if cache_key is not None else id(board), blocked, afloat)
+
+    probs = [0.0] * placement.CELLS
+    for length in afloat:
+        counts = [0.0] * placement.CELLS
+        total = 0.0
+        for mask, cells in valid.get(length, ()):
+            covered = mask & open_hits
+            weight = 1 + HIT_WEIGHT * bin(covered).count("1") if covered else 1
+            total += weight
+            for i in cells:
+                counts[i] += weight
+        if not total:
+            continue
+        for i in range(placement.CELLS):
+            if counts[i]:
+                probs[i] += counts[i] / total
+
+    for i in range(placement.CELLS):
+        if shot_mask >> i & 1:
+            probs[i] = 0.0
+        elif probs[i] > 1.0:
+            probs[i] = 1.0
+    return probs
+
+
+def render_heatmap(board, cache_key=None, top=3):
+    """Emoji heatmap in the same layout (and shot markers) as render_board_with_shots."""
+    probs = probabilities(board, cache_key)
+    shots = board.get("shots", {})
+    emoji_numbers = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
+    emoji_letters = ["🇦", "🇧", "🇨", "🇩", "🇪", "🇫", "🇬", "🇭", "🇮", "🇯"]
+    hottest = max(probs) or 1.0
+
+    preview = "\n🧭 " + " ".join(emoji_numbers) + "\n"
+    for r in range(placement.SIZE):
+        line = f"{emoji_letters[r]} "
+        for c in range(placement.SIZE):
+            index = r * placement.SIZE + c
+            coord = placement.coord_of(index)
+            shot = shots.get(coord)
+            if shot:
+                if shot["hit"]:
+                    line += "💥 "
+                elif shot.get("by") == "event-complete":
+                    line += "🛡️ "
+                else:
+                    line += "⚫ "
+            elif board["tiles"].get(coord, {}).get("name") == "Wreckage":
+                line += "💥 "
+            else:
+                level = min(len(HEAT_EMOJIS) - 1, int(probs[index] / hottest * len(HEAT_EMOJIS)))
+                line += HEAT_EMOJIS[level] + " "
+        preview += line + "\n"
+
+    preview += "\n" + " ".join(HEAT_EMOJIS) + " cold → hot"
+    ranked = sorted(range(placement.CELLS), key=lambda i: probs[i], reverse=True)[:top]
+    ranked = [i for i in ranked if probs[i] > 0]
+    if ranked:
+        preview += "\n🔭 Hottest: " + ", ".join(f"**{placement.coord_of(i)}** ({probs[i] * 100:.0f}%)" for i in ranked)
+    return preview
@@ -0,0 +1,149 @@
+# versioned board history for the ref !history, !undo and !rollback commands. every saved
+# board becomes a numbered version. versions share structure with the one before them: the
+# tiles/shots/ships containers are only copied when they changed, and unchanged tiles and
+# shots are the very same objects as in the previous version, so a shot costs one new entry
+# rather than a whole board. each team keeps the last HISTORY_LIMIT versions.
+#
+# tiles and shots must never be edited in place once saved (replace them instead), which is
+# how everything in utils/game.py already treats them.
+
+from collections import deque
+from datetime import datetime, timezone
+
+import config
+
+HISTORY_LIMIT = config.HISTORY_LIMIT
+
+# {team: deque([Version, ...])}
+_history = {}
+# {team: last version number handed out}
+_counters = {}
+
+
+class Version:
+    __slots__ = ("number", "timestamp", "reason", "board", "skip_tokens", "active_skips", "cooldowns", "based_on")
+
+    def __init__(self, number, reason, board, skip_tokens, active_skips, cooldowns, based_on=None):
+        self.number = number
+        self.timestamp = datetime.now(timezone.utc)
+        self.reason = reason
+        self.board = board
+        self.skip_tokens = skip_tokens
+        self.active_skips = active_skips
+        self.cooldowns = cooldowns
+        self.based_on = based_on
+
+
+def _share(current, previous):
+    """Copy of a dict whose values are reused from `previous` wherever they're equal."""
+    if previous is None:
+        return dict(current)
+    shared = {}
+    same = len(current) == len(previous)
+    for key, value in current.items():
+        old = previous.get(key)
+        if old is value or (old is not None and old == value):
+            shared[key] = old
+        else:
+            shared[key] = value
+            same = False
+    return previous if same else shared
+
+
+def snapshot(board, previous=None):
+    """Structure-sharing copy of a board, reusing unchanged parts of `previous`."""
+    prev = previous or {}
+    copy = {k: v for k, v in board.items() if k not in ("tiles", "shots", "ships")}
+    copy["tiles"] = _share(board.get("tiles", {}), prev.get("tiles"))
+    if "shots" in board:
+        copy["shots"] = _share(board["shots"], prev.get("shots"))
+    if "ships" in board:
+        ships = {ship: tuple(coords) for ship, coords in board["ships"].items()}
+        copy["ships"] = _share(ships, prev.get("ships"))
+    return copy
+
+
+def thaw(frozen):
+    """A board that's safe to mutate and save, built from a stored snapshot."""
+    board = {k: v for k, v in frozen.items() if k not in ("tiles", "shots", "ships")}
+    board["tiles"] = dict(frozen.get("tiles", {}))
+    if "shots" in frozen:
+        board["shots"] = dict(frozen["shots"])
+    if "ships" in frozen:
+        board["ships"] = {ship: list(coords) for ship, coords in frozen["ships"].items()}
+    return board
+
+
+def involved_teams(team):
+    """The board owner and whoever shoots at it: their tokens and cooldowns travel with the board."""
+    teams = [team]
+    opponent = config.TEAM_PAIRS.get(team)
+    if opponent:
+        teams.append(opponent)
+    return teams
+
+
+def record(team, board, reason, skip_tokens, active_skips, cooldowns, based_on=None):
+    """Stores a new version of a team's board. Returns its version number."""
+    versions = _history.setdefault(team, deque(maxlen=HISTORY_LIMIT))
+    previous = versions[-1].board if versions else None
+    number = _counters.get(team, 0) + 1
+    _counters[team] = number
+
+    teams = involved_teams(team)
+    versions.append(Version(
+        number,
+        reason,
+        snapshot(board, previous),
+        {t: skip_tokens.get(t, 0) for t in teams},
+        {t: active_skips.get(t, False) for t in teams},
+        {t: cooldowns.get(t) for t in teams},
+        based_on,
+    ))
+    return number
+
+
+def versions(team):
+    return list(_history.get(team, ()))
+
+
+def current_version(team):
+    return _counters.get(team, 0)
+
+
+def latest(team):
+    """The team's newest Version, or None."""
+    versions = _history.get(team)
+    return versions[-1] if versions else None
+
+
+def get_version(team, number):
+    for version in _history.get(team, ()):
+        if version.number == number:
+            return version
+    return None
+
+
+def undo_target(team):
+    """The version an !undo should go back to, or None if there's nothing older retained."""
+    history = _history.get(team)
+    if not history or len(history) < 2:
+        return None
+    latest = history[-1]
+    # after a rollback, undo steps back from the version we rolled back to
+    anchor = latest.based_on if latest.based_on is not None else latest.number
+    older = [v for v in history if v.number < anchor]
+    return older[-1] if older else None
+
+
+def describe(version, now=None):
+    now = now or datetime.now(timezone.utc)
+    ago = int((now - version.timestamp).total_seconds())
+    if ago < 60:
+        when = f"{ago}s ago"
+    elif ago < 3600:
+        when = f"{ago // 60}m ago"
+    else:
+        when = f"{ago // 3600}h {ago % 3600 // 60}m ago"
+    shots = len(version.board.get("shots", {}))
+    return f"`v{version.number}` · {when} · {version.reason} · {shots} shot(s)"
@@ -0,0 +1,191 @@
+# live, read-only views of the match for the web dashboard (utils/web.py). every saved board
+# change reaches update() through game.record_version, the same place the history, stats and
+# match log get it. a board's public view (shots and sunk ships, never where the ships are)
+# is built at most once per version and shared by everyone who asks, and each change is
+# serialized once and handed to every connected viewer, so viewers cost no disk reads, no
+# Discord calls and no per-viewer work beyond a queue put.
+
+import asyncio
+import json
+
+import config
+
+# how many unsent updates a viewer may fall behind before it's dropped (its browser reconnects
+# and gets a fresh snapshot)
+VIEWER_QUEUE = 64
+
+# {team: {"version": n, "board": snapshot, "public": view or None}}
+_boards = {}
+# latest change of any board, for the SSE ids
+_sequence = 0
+_viewers = set()
+_loop = None
+# (sequence, {team: score}) as of the last scores() call
+_scores = (None, {})
+
+
+def _cell_states(board):
+    shots = board.get("shots", {})
+    ships = board.get("ships", {})
+    cells = {}
+    for coord, shot in shots.items():
+        if shot.get("by") == "event-complete":
+            cells[coord] = "cleared"
+        else:
+            cells[coord] = "hit" if shot.get("hit") else "miss"
+    sunk = []
+    for ship, coords in ships.items():
+        if coords and all(cells.get(c) == "hit" for c in coords):
+            sunk.append(ship)
+            for c in coords:
+                cells[c] = "sunk"
+    return cells, sunk
+
+
+def public_board(team):
+    """What spectators may see of a team's board, or None if it hasn't been seen yet."""
+    entry = _boards.get(team)
+    if entry is None:
+        return None
+    if entry["public"] is None:
+        board = entry["board"]
+        cells, sunk = _cell_states(board)
+        shots = board.get("shots", {})
+        entry["public"] = {
+            "team": team,
+            "name": config.TEAM_DISPLAY.get(team, team),
+            "opponent": config.TEAM_PAIRS.get(team),
+            "version": entry["version"],
+            "locked": bool(board.get("locked")),
+            "cells": cells,
+            "ships_lost": sunk,
+            "shots_taken": len(shots),
+            "hits_taken": sum(1 for s in shots.values() if s.get("hit")),
+        }
+    return entry["public"]
+
+
+def public_boards():
+    return {team: public_board(team) for team in _boards}
+
+
+def board(team):
+    """The team's latest saved board in full (a history snapshot: treat it as read-only)."""
+    entry = _boards.get(team)
+    return entry["board"] if entry else None
+
+
+def version(team):
+    entry = _boards.get(team)
+    return entry["version"] if entry else None
+
+
+def sequence():
+    """Goes up with every change to any board or to the match setup."""
+    return _sequence
+
+
+def scores():
+    """{team: what it has fired at its opponent}, rebuilt at most once per change."""
+    global _scores
+    if _scores[0] != _sequence:
+        result = {}
+        for team in _boards:
+            opponent = config.TEAM_PAIRS.get(team)
+            target = board(opponent)
+            if target is None:
+                continue
+            fired = [(coord, shot) for coord, shot in target.get("shots", {}).items() if shot.get("by") == team]
+            hits = sum(1 for _, shot in fired if shot.get("hit"))
+            last = max(fired, key=lambda item: item[1].get("timestamp", ""), default=None)
+            result[team] = {
+                "team": team,
+                "opponent": opponent,
+                "shots": len(fired),
+                "hits": hits,
+                "accuracy": round(hits / len(fired) * 100, 1) if fired else 0.0,
+                "ships_sunk": public_board(opponent)["ships_lost"],
+                "last_shot": {"coord": last[0], "hit": last[1].get("hit"), "timestamp": last[1].get("timestamp")} if last else None,
+            }
+        _scores = (_sequence, result)
+    return _scores[1]
+
+
+def reset_views():
+    """
+    Drops every cached view after the match setup changes (they carry team names and pairings)
+    and sends viewers a fresh snapshot.
+    """
+    global _sequence
+    for team in list(_boards):
+        if team in config.TEAMS_LIST:
+            _boards[team]["public"] = None
+        else:
+            del _boards[team]
+    _sequence += 1
+    if _viewers and _loop is not None:
+        _loop.call_soon_threadsafe(_fan_out, snapshot_message())
+
+
+def _public_event(team, event):
+    """The part of a change spectators are told about."""
+    event = event or {}
+    public = {"type": event.get("type", "change"), "team": team}
+    if public["type"] == "shot":
+        public.update(by=event.get("by"), coord=event.get("coord"), hit=event.get("hit"), sunk=event.get("sunk"))
+        if event.get("sunk"):
+            public["ship"] = event.get("ship")
+    elif public["type"] in ("event_started", "event_resolved"):
+        public.update(event_type=event.get("event_type"), coord=event.get("coord"), result=event.get("result"))
+    return public
+
+
+def update(team, version, board, event=None):
+    """Takes a saved board (a history snapshot) and pushes the change to every viewer."""
+    global _sequence
+    _boards[team] = {"version": version, "board": board, "public": None}
+    _sequence += 1
+    if not _viewers or _loop is None:
+        return
+    payload = {"event": _public_event(team, event), "board": public_board(team)}
+    message = _sse("board", payload, _sequence)
+    _loop.call_soon_threadsafe(_fan_out, message)
+
+
+def _sse(kind, payload, sequence):
+    data = json.dumps(payload, separators=(",", ":"))
+    return f"id: {sequence}\nevent: {kind}\ndata: {data}\n\n".encode("utf-8")
+
+
+def _fan_out(message):
+    for queue in list(_viewers):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # too far behind: cut it loose rather than buffer without end. None tells its
+            # handler to close, and the browser reconnects to a fresh snapshot
+            _viewers.discard(queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+
+def snapshot_message():
+    return _sse("snapshot", {"boards": public_boards()}, _sequence)
+
+
+def subscribe():
+    """A queue of SSE messages for one viewer. Call from the event loop; unsubscribe() when done."""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(VIEWER_QUEUE)
+    _viewers.add(queue)
+    return queue
+
+
+def unsubscribe(queue):
+    _viewers.discard(queue)
+
+
+def viewers():
+    return len(_viewers)
@@ -0,0 +1,266 @@
+# the match setup (teams, their display names, colors, channels and pairings, and the
+# spectator channel) can live in data/match_config.json instead of config.py, so it can be
+# changed mid-event without restarting the bot:
+#
+#   {
+#     "spectator_channel": 123456789012345678,
+#     "teams": {
+#       "anneBonny": {"name": "Anne Bonny’s Crew", "color": "#1ABC9C", "channel": 111, "opponent": "maryRead"},
+#       "maryRead": {"name": "Mary Read’s Crew", "color": "#FFA500", "channel": 222, "opponent": "anneBonny"}
+#     }
+#   }
+#
+# the bot checks the file every MATCH_CONFIG_POLL seconds and refs can force it with
+# !reloadconfig. a new file is validated as a whole and then swapped into config in one go
+# (no await in between, so no command ever sees half of it); a broken file is reported and the
+# running setup kept. teams the file adds get their boards and history in the same step. without
+# the file, config.py's values are used as before.
+#
+#   python -m utils.match_config init     # write config.py's current setup to the file
+#   python -m utils.match_config check    # validate the file
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import traceback
+
+import config
+from utils import coalesce, live
+
+PATH = config.MATCH_CONFIG_FILE
+POLL = config.MATCH_CONFIG_POLL
+
+# the config.py names the file replaces
+FIELDS = ("TEAMS_LIST", "TEAM_DISPLAY", "TEAM_COLORS", "TEAM_CHANNELS", "TEAM_PAIRS", "SPECTATOR_CHANNEL_ID")
+
+# bumped every time a setup is applied
+_generation = 0
+# (mtime, size) of the file as last applied, so the watcher doesn't apply it twice
+_stamp = None
+# (the TEAM_CHANNELS dict it was built from, {channel id: team})
+_index = (None, {})
+_watcher = None
+
+
+def generation():
+    return _generation
+
+
+def team_for_channel(channel_id):
+    """The team whose channel this is, or None."""
+    global _index
+    channels = config.TEAM_CHANNELS
+    if _index[0] is not channels:
+        _index = (channels, {cid: team for team, cid in channels.items() if cid is not None})
+    return _index[1].get(channel_id)
+
+
+def _channel_id(value, where, errors):
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        errors.append(f"{where} must be a channel ID, not {value!r}")
+        return None
+
+
+def _color(value, where, errors):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value.lstrip("#"), 16) if value.startswith("#") else int(value, 0)
+        except ValueError:
+            pass
+    errors.append(f"{where} must be a color like \"#1ABC9C\", not {value!r}")
+    return 0
+
+
+def parse(data):
+    """
+    The config values (see FIELDS) described by a match config file's contents. Raises ValueError
+    listing everything that's wrong with it.
+    """
+    errors = []
+    teams = data.get("teams") if isinstance(data, dict) else None
+    if not isinstance(teams, dict) or not teams:
+        raise ValueError("the file needs a \"teams\" object with at least one team")
+
+    settings = {name: {} for name in FIELDS}
+    settings["TEAMS_LIST"] = list(teams)
+    owners = {}
+    for team, entry in teams.items():
+        if not isinstance(entry, dict):
+            errors.append(f"teams.{team} must be an object")
+            continue
+        settings["TEAM_DISPLAY"][team] = str(entry.get("name") or team)
+        settings["TEAM_COLORS"][team] = _color(entry.get("color", 0), f"teams.{team}.color", errors)
+
+        channel = _channel_id(entry.get("channel"), f"teams.{team}.channel", errors)
+        if channel is not None:
+            if channel in owners:
+                errors.append(f"teams.{team}.channel is already {owners[channel]}'s channel")
+            owners[channel] = team
+            settings["TEAM_CHANNELS"][team] = channel
+
+        opponent = entry.get("opponent")
+        if opponent is None:
+            continue
+        if not isinstance(opponent, str):
+            errors.append(f"teams.{team}.opponent must be a team name, not {opponent!r}")
+        elif opponent == team:
+            errors.append(f"teams.{team}.opponent can't be the team itself")
+        elif opponent not in teams:
+            errors.append(f"teams.{team}.opponent {opponent!r} is not a team")
+        elif isinstance(teams[opponent], dict) and teams[opponent].get("opponent") != team:
+            errors.append(f"teams.{team} plays {opponent}, but {opponent} doesn't play {team}")
+        else:
+            settings["TEAM_PAIRS"][team] = opponent
+
+    settings["SPECTATOR_CHANNEL_ID"] = _channel_id(data.get("spectator_channel"), "spectator_channel", errors)
+    if errors:
+        raise ValueError("; ".join(errors))
+    return settings
+
+
+def current():
+    """config.py's (or the last applied file's) setup, in the file's format."""
+    return {
+        "spectator_channel": config.SPECTATOR_CHANNEL_ID,
+        "teams": {
+            team: {
+                "name": config.TEAM_DISPLAY.get(team, team),
+                "color": f"#{config.TEAM_COLORS.get(team, 0):06X}",
+                "channel": config.TEAM_CHANNELS.get(team),
+                "opponent": config.TEAM_PAIRS.get(team),
+            }
+            for team in config.TEAMS_LIST
+        },
+    }
+
+
+def apply(settings):
+    """Swaps a parsed setup into config and drops everything cached from the old one."""
+    global _generation
+    for name in FIELDS:
+        setattr(config, name, settings[name])
+    _generation += 1
+    coalesce.invalidate()
+    live.reset_views()
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def reload(path=None, add_teams=None):
+    """
+    Reads, validates and applies the file. Returns a one-line summary of what changed; raises
+    FileNotFoundError or ValueError (with the running setup untouched) if it can't. Teams the
+    file adds are handed to `add_teams(teams)` right after, so they get a board and history
+    before any command can see them.
+    """
+    global _stamp
+    path = path or PATH
+    stamp = _file_stamp(path)
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"not valid JSON: {e}") from None
+    settings = parse(data)
+
+    before = set(config.TEAMS_LIST)
+    after = set(settings["TEAMS_LIST"])
+    apply(settings)
+    _stamp = stamp
+    if add_teams and after - before:
+        add_teams([team for team in settings["TEAMS_LIST"] if team not in before])
+
+    matches = len({frozenset(pair) for pair in settings["TEAM_PAIRS"].items()})
+    summary = f"{len(after)} team(s), {matches} match(es)"
+    if after - before:
+        summary += f", added {', '.join(sorted(after - before))}"
+    if before - after:
+        summary += f", removed {', '.join(sorted(before - after))}"
+    return summary
+
+
+def load_initial(path=None):
+    """Applies the file at startup if there is one. A broken file stops the bot from starting."""
+    path = path or PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        return reload(path)
+    except ValueError as e:
+        raise SystemExit(f"❌ {path}: {e}")
+
+
+async def _watch(path, interval, add_teams):
+    global _stamp
+    while True:
+        await asyncio.sleep(interval)
+        stamp = _file_stamp(path)
+        if stamp is None or stamp == _stamp:
+            continue
+        try:
+            print(f"🔄 Match config reloaded from {path}: {reload(path, add_teams)}")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Match config in {path} not applied, keeping the running one: {e}")
+            _stamp = stamp  # don't repeat the complaint until the file changes again
+        except Exception:
+            # a bug in here must not stop the watching
+            traceback.print_exc()
+            _stamp = stamp
+
+
+def watch(path=None, interval=None, add_teams=None):
+    """
+    Starts polling the file for changes (see reload() for `add_teams`). Safe to call more than once
+    (on_ready can fire again).
+    """
+    global _watcher
+    interval = POLL if interval is None else interval
+    if _watcher is not None or interval <= 0:
+        return _watcher
+    _watcher = asyncio.get_running_loop().create_task(_watch(path or PATH, interval, add_teams))
+    return _watcher
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the match setup file.")
+    parser.add_argument("action", choices=["init", "check"])
+    parser.add_argument("--path", default=PATH)
+    parser.add_argument("--force", action="store_true", help="overwrite an existing file on init")
+    args = parser.parse_args(argv)
+
+    if args.action == "init":
+        if os.path.exists(args.path) and not args.force:
+            raise SystemExit(f"❌ {args.path} already exists (use --force to overwrite it).")
+        data = current()
+        parse(data)
+        with open(args.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"✅ Wrote the setup of {len(data['teams'])} team(s) to {args.path}.")
+        return
+
+    try:
+        with open(args.path, encoding="utf-8") as f:
+            settings = parse(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"❌ {args.path}: {e}", file=sys.stderr)
+        raise SystemExit(1)
+    print(f"✅ {args.path} is valid: {len(settings['TEAMS_LIST'])} team(s), {len(settings['TEAM_CHANNELS'])} channel(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+# ordered event log for every match, for replays, recaps and exports. each saved board change
+# is appended to data/matches/<match>.jsonl as one line: what happened (a shot, a placement, an
+# event, a lock...) plus the difference it made to the board. the first change for a board in
+# a run of the bot logs the whole board instead, and every CHECKPOINT_EVERY events the whole
+# match is logged again as a checkpoint. a side file lists the checkpoints' byte offsets, so
+# rebuilding the boards at any moment reads from the nearest checkpoint before it rather than
+# from the start of the match.
+#
+# a log is picked up where an earlier run of the bot left it: startup calls resume() for every
+# match on a worker thread, so the event loop never reads a log. a record cut off by a crash is
+# cut from the file, and trouble with the log is reported without ever failing the board save
+# that it records.
+#
+#   python -m utils.match_log export anneBonny-vs-maryRead --format csv > match.csv
+#   python -m utils.match_log replay anneBonny-vs-maryRead --at 2025-06-01T20:15:00
+
+import argparse
+import bisect
+import csv
+import json
+import os
+import re
+import sys
+import traceback
+from datetime import datetime, timezone
+
+from utils import history, storage
+
+LOG_DIR = os.path.join("data", "matches")
+CHECKPOINT_EVERY = 50
+
+# board sections diffed key by key; everything else is compared as a whole
+_SECTIONS = ("tiles", "shots", "ships")
+
+# {match: {"seq": n, "offset": bytes, "since_checkpoint": n}}
+_matches = {}
+
+EXPORT_FIELDS = ["seq", "ts", "match", "type", "team", "by", "coord", "hit", "skipped", "ship", "event_id", "result", "reason"]
+
+
+def log_path(match):
+    return os.path.join(LOG_DIR, f"{match}.jsonl")
+
+
+def index_path(match):
+    return os.path.join(LOG_DIR, f"{match}.checkpoints.jsonl")
+
+
+def _teams_of(match):
+    return match.split("-vs-")
+
+
+# every record starts with its seq (see _append), so the seq is read without parsing the line
+_SEQ = re.compile(rb'\{"seq":(\d+)[,}]')
+_CHUNK = 1 << 16
+
+
+def _newlines(f, end):
+    """Positions of the newlines before `end`, last first."""
+    while end > 0:
+        start = max(0, end - _CHUNK)
+        f.seek(start)
+        chunk = f.read(end - start)
+        i = len(chunk)
+        while True:
+            i = chunk.rfind(b"\n", 0, i)
+            if i < 0:
+                break
+            yield start + i
+        end = start
+
+
+def _resume_point(path):
+    """
+    (seq, offset) to carry on from in a log: the last complete record's seq and where it ends.
+    Anything after that offset is a record cut off part way.
+    """
+    with open(path, "rb") as f:
+        newlines = _newlines(f, f.seek(0, os.SEEK_END))
+        line_end = next(newlines, None)
+        if line_end is None:
+            return 0, 0
+        offset = line_end + 1
+        while line_end is not None:
+            previous = next(newlines, None)
+            f.seek(0 if previous is None else previous + 1)
+            found = _SEQ.match(f.read(32))
+            if found:
+                return int(found.group(1)), offset
+            line_end = previous
+    return 0, offset
+
+
+def _resume(match):
+    seq, offset = 0, 0
+    path = log_path(match)
+    try:
+        seq, offset = _resume_point(path)
+        if os.path.getsize(path) > offset:
+            print(f"⚠️ Dropping a cut-off record at the end of {path}")
+            os.truncate(path, offset)
+    except FileNotFoundError:
+        pass
+    return {"seq": seq, "offset": offset, "since_checkpoint": 0}
+
+
+def resume(matches):
+    """Picks up the logs of these matches where an earlier run left them. Startup runs it off the loop."""
+    for match in matches:
+        if match not in _matches:
+            _matches[match] = _resume(match)
+
+
+def _state(match):
+    state = _matches.get(match)
+    if state is None:
+        # a match startup didn't know about (a team added later, or a CLI tool)
+        state = _matches[match] = _resume(match)
+    return state
+
+
+def diff(previous, board):
+    """What changed from `previous` to `board`: {"tiles": {coord: tile}, "tiles_del": [...], ..., "fields": {...}}."""
+    change = {}
+    for section in _SECTIONS:
+        old = previous.get(section) or {}
+        new = board.get(section) or {}
+        if old is new:
+            continue
+        changed = {k: v for k, v in new.items() if old.get(k) is not v and old.get(k) != v}
+        removed = [k for k in old if k not in new]
+        if changed:
+            change[section] = changed
+        if removed:
+            change[f"{section}_del"] = removed
+    fields = {k: v for k, v in board.items() if k not in _SECTIONS and previous.get(k) != v}
+    removed = [k for k in previous if k not in _SECTIONS and k not in board]
+    if fields:
+        change["fields"] = fields
+    if removed:
+        change["fields_del"] = removed
+    return change
+
+
+def apply(board, change):
+    """Applies a diff() to a board in place."""
+    for section in _SECTIONS:
+        if section in change:
+            target = board.setdefault(section, {})
+            for key, value in change[section].items():
+                target[key] = list(value) if section == "ships" else value
+        for key in change.get(f"{section}_del", ()):
+            board.get(section, {}).pop(key, None)
+    board.update(change.get("fields", {}))
+    for key in change.get("fields_del", ()):
+        board.pop(key, None)
+    return board
+
+
+def _append(match, records):
+    state = _state(match)
+    lines = []
+    for record in records:
+        state["seq"] += 1
+        record = {"seq": state["seq"], "ts": datetime.now(timezone.utc).isoformat(), "match": match, **record}
+        lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+    data = "".join(lines).encode("utf-8")
+    first_offset = state["offset"]
+    state["offset"] += len(data)
+    storage.append(log_path(match), data)
+    return first_offset
+
+
+def _logged(fn):
+    # the log is a record of the game, not part of it: trouble with it is reported, and the
+    # board change it was recording goes ahead
+    def run(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            traceback.print_exc()
+    return run
+
+
+@_logged
+def record(match, team, previous, board, reason, event=None):
+    """
+    Logs a saved change to a team's board in its match's log. `previous` and `board` are the
+    history snapshots before and after it (previous is None for the first one), `event` is what
+    happened ({"type": "shot", ...}).
+    """
+    entry = {"type": "change", **(event or {}), "team": team, "reason": reason}
+    if previous is None:
+        entry["board"] = board
+    else:
+        entry["diff"] = diff(previous, board)
+
+    _append(match, [entry])
+    state = _state(match)
+    state["since_checkpoint"] += 1
+    if state["since_checkpoint"] >= CHECKPOINT_EVERY:
+        checkpoint(match)
+
+
+@_logged
+def note(match, team, event):
+    """Logs something that happened without changing a board (a skip token being armed, say)."""
+    _append(match, [{**event, "team": team}])
+
+
+def checkpoint(match):
+    """Logs every known board of the match in full and remembers where, for fast seeking."""
+    boards = {}
+    for team in _teams_of(match):
+        version = history.latest(team)
+        if version is not None:
+            boards[team] = version.board
+    if not boards:
+        return
+    state = _state(match)
+    offset = _append(match, [{"type": "checkpoint", "boards": boards}])
+    state["since_checkpoint"] = 0
+    entry = {"seq": state["seq"], "ts": datetime.now(timezone.utc).isoformat(), "offset": offset}
+    storage.append(index_path(match), (json.dumps(entry) + "\n").encode("utf-8"))
+
+
+# Reading logs back
+def iter_events(match, start_offset=0):
+    """Yields the log's records in order, starting at a byte offset (a checkpoint's)."""
+    storage.flush()
+    path = log_path(match)
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        for line in f:
+            if line.strip():
+                record = _decode(line)
+                if record is not None:
+                    yield record
+
+
+def _decode(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None  # a record cut off by a crash, in a log no bot has resumed since
+
+
+def _checkpoints(match):
+    path = index_path(match)
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        return [c for c in (_decode(line) for line in f if line.strip()) if c is not None]
+
+
+def _parse_when(when):
+    if isinstance(when, datetime):
+        moment = when
+    else:
+        moment = datetime.fromisoformat(when)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+class Replay:
+    """Rebuilds a match's boards from its log, at any moment or one event at a time."""
+
+    def __init__(self, match):
+        self.match = match
+        self.checkpoints = _checkpoints(match)
+
+    def _start(self, seq=None, when=None):
+        """(offset, boards) of the last checkpoint at or before the target, or the log's start."""
+        if seq is not None:
+            keys = [c["seq"] for c in self.checkpoints]
+            i = bisect.bisect_right(keys, seq)
+        elif when is not None:
+            keys = [_parse_when(c["ts"]) for c in self.checkpoints]
+            i = bisect.bisect_right(keys, when)
+        else:
+            i = 0
+        if not i:
+            return 0, {}
+        checkpoint = self.checkpoints[i - 1]
+        for record in iter_events(self.match, checkpoint["offset"]):
+            return checkpoint["offset"], {team: history.thaw(board) for team, board in record["boards"].items()}
+        return 0, {}
+
+    def _play(self, seq, when):
+        target = _parse_when(when) if when is not None else None
+        offset, boards = self._start(seq, target)
+        yield None, boards
+        for record in iter_events(self.match, offset):
+            if seq is not None and record["seq"] > seq:
+                return
+            if target is not None and _parse_when(record["ts"]) > target:
+                return
+            if record["type"] == "checkpoint":
+                continue
+            team = record.get("team")
+            if "board" in record:
+                boards[team] = history.thaw(record["board"])
+            elif "diff" in record:
+                apply(boards.setdefault(team, {"tiles": {}}), record["diff"])
+            yield record, boards
+
+    def steps(self, seq=None, when=None):
+        """Yields (record, boards) for every event up to the target (or the end). `boards` is live: copy to keep it."""
+        play = self._play(seq, when)
+        next(play)
+        yield from play
+
+    def boards_at(self, seq=None, when=None):
+        """{team: board} as they were right after event `seq`, or at time `when`."""
+        play = self._play(seq, when)
+        _, boards = next(play)
+        for _ in play:
+            pass
+        return boards
+
+
+# event types worth a line in a recap; the rest (placements, checkpoints...) are set-up noise
+RECAP_TYPES = ("shot", "skip_used", "event_started", "event_resolved", "rollback")
+
+
+def describe(record):
+    """One line for a recap post."""
+    when = _parse_when(record["ts"]).strftime("%H:%M")
+    kind = record["type"]
+    if kind == "shot":
+        outcome = f"💥 hit the {record['ship']}" if record.get("hit") else "💨 missed"
+        skipped = " (skip used)" if record.get("skipped") else ""
+        return f"`{when}` {record['by']} fired at **{record['coord']}** on {record['team']} — {outcome}{skipped}"
+    if kind == "skip_used":
+        return f"`{when}` {record['team']} used a skip after missing at **{record['coord']}**"
+    if kind == "event_started":
+        return f"`{when}` {record['event_id']} event started at **{record['coord']}** on {record['team']}"
+    if kind == "event_resolved":
+        return f"`{when}` {record['event_id']} event at **{record['coord']}** on {record['team']}: {record['result']}"
+    if kind == "rollback":
+        return f"`{when}` refs rolled {record['team']} back to v{record['version']}"
+    return f"`{when}` {record['team']}: {record.get('reason', kind)}"
+
+
+def recap(match, team=None, limit=None):
+    """Recap lines for the match's notable events, oldest first (the last `limit` of them)."""
+    lines = []
+    for record in iter_events(match):
+        if record["type"] in RECAP_TYPES and (team is None or record.get("team") == team or record.get("by") == team):
+            lines.append(describe(record))
+            if limit and len(lines) > limit:
+                del lines[0]
+    return lines
+
+
+def export(match, out, fmt="jsonl"):
+    """Streams the match's events (without the board data) as JSON lines or CSV."""
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+    count = 0
+    for record in iter_events(match):
+        if record["type"] == "checkpoint":
+            continue
+        if writer:
+            writer.writerow({field: record.get(field, "") for field in EXPORT_FIELDS})
+        else:
+            slim = {k: v for k, v in record.items() if k not in ("board", "diff")}
+            out.write(json.dumps(slim) + "\n")
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or replay a match's event log.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="write the match's events as JSON lines or CSV")
+    export_cmd.add_argument("match", help="e.g. anneBonny-vs-maryRead")
+    export_cmd.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    export_cmd.add_argument("-o", "--output", default="-")
+    replay_cmd = sub.add_parser("replay", help="print the boards as they were at a moment of the match")
+    replay_cmd.add_argument("match")
+    replay_cmd.add_argument("--at", help="ISO timestamp (UTC unless it says otherwise)")
+    replay_cmd.add_argument("--seq", type=int, help="event number")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+        try:
+            count = export(args.match, out, args.format)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f"✅ Exported {count} event(s).", file=sys.stderr)
+        return
+
+    boards = Replay(args.match).boards_at(args.seq, args.at)
+    json.dump(boards, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# lightweight in-process metrics: command latency histograms, file I/O counters, outbound
+# message counts and cache hit ratios. exposed in prometheus text format at /metrics on the
+# bot's local web server (utils/web.py) and summarized by the ref !stats command.
+
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_started = time.time()
+
+# {command: {"buckets": [...], "count": n, "sum": s}}
+command_latency = {}
+# {(command, status): n}
+command_calls = {}
+# {kind: {"reads": n, "read_bytes": n, "writes": n, "write_bytes": n}}
+file_io = {}
+# {channel: n}
+messages_sent = {}
+# {cache: {"hits": n, "misses": n}}
+cache_stats = {}
+
+
+def observe_command(command, seconds, failed=False):
+    with _lock:
+        hist = command_latency.setdefault(
+            command, {"buckets": [0] * len(LATENCY_BUCKETS), "count": 0, "sum": 0.0}
+        )
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                hist["buckets"][i] += 1
+        hist["count"] += 1
+        hist["sum"] += seconds
+        key = (command, "error" if failed else "ok")
+        command_calls[key] = command_calls.get(key, 0) + 1
+
+
+def count_read(kind, nbytes):
+    with _lock:
+        stats = file_io.setdefault(kind, {"reads": 0, "read_bytes": 0, "writes": 0, "write_bytes": 0})
+        stats["reads"] += 1
+        stats["read_bytes"] += nbytes
+
+
+def count_write(kind, nbytes):
+    with _lock:
+        stats = file_io.setdefault(kind, {"reads": 0, "read_bytes": 0, "writes": 0, "write_bytes": 0})
+        stats["writes"] += 1
+        stats["write_bytes"] += nbytes
+
+
+def count_message(channel):
+    with _lock:
+        messages_sent[channel] = messages_sent.get(channel, 0) + 1
+
+
+def record_cache(cache, hit):
+    with _lock:
+        stats = cache_stats.setdefault(cache, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
+
+def cache_hit_ratio(cache):
+    stats = cache_stats.get(cache)
+    if not stats:
+        return None
+    total = stats["hits"] + stats["misses"]
+    return stats["hits"] / total if total else None
+
+
+def estimate_quantile(hist, q):
+    """Upper bound of the bucket holding the q-th observation (good enough for a summary)."""
+    if not hist["count"]:
+        return 0.0
+    target = q * hist["count"]
+    for bound, cumulative in zip(LATENCY_BUCKETS, hist["buckets"]):
+        if cumulative >= target:
+            return bound
+    return float("inf")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        lines.append("# HELP battleship_uptime_seconds Seconds since the bot process started.")
+        lines.append("# TYPE battleship_uptime_seconds gauge")
+        lines.append(f"battleship_uptime_seconds {time.time() - _started:.3f}")
+
+        lines.append("# HELP battleship_command_latency_seconds Command handler latency.")
+        lines.append("# TYPE battleship_command_latency_seconds histogram")
+        for command, hist in sorted(command_latency.items()):
+            label = f'command="{_escape(command)}"'
+            for bound, cumulative in zip(LATENCY_BUCKETS, hist["buckets"]):
+                lines.append(f'battleship_command_latency_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'battleship_command_latency_seconds_bucket{{{label},le="+Inf"}} {hist["count"]}')
+            lines.append(f"battleship_command_latency_seconds_sum{{{label}}} {hist['sum']:.6f}")
+            lines.append(f"battleship_command_latency_seconds_count{{{label}}} {hist['count']}")
+
+        lines.append("# HELP battleship_commands_total Commands handled, by outcome.")
+        lines.append("# TYPE battleship_commands_total counter")
+        for (command, status), n in sorted(command_calls.items()):
+            lines.append(f'battleship_commands_total{{command="{_escape(command)}",status="{status}"}} {n}')
+
+        lines.append("# HELP battleship_file_ops_total File reads and writes, by kind of file.")
+        lines.append("# TYPE battleship_file_ops_total counter")
+        lines.append("# HELP battleship_file_bytes_total Bytes read and written, by kind of file.")
+        lines.append("# TYPE battleship_file_bytes_total counter")
+        for kind, stats in sorted(file_io.items()):
+            label = f'kind="{_escape(kind)}"'
+            lines.append(f'battleship_file_ops_total{{{label},op="read"}} {stats["reads"]}')
+            lines.append(f'battleship_file_ops_total{{{label},op="write"}} {stats["writes"]}')
+            lines.append(f'battleship_file_bytes_total{{{label},op="read"}} {stats["read_bytes"]}')
+            lines.append(f'battleship_file_bytes_total{{{label},op="write"}} {stats["write_bytes"]}')
+
+        lines.append("# HELP battleship_messages_sent_total Messages the bot posted, by channel.")
+        lines.append("# TYPE battleship_messages_sent_total counter")
+        for channel, n in sorted(messages_sent.items()):
+            lines.append(f'battleship_messages_sent_total{{channel="{_escape(channel)}"}} {n}')
+
+        lines.append("# HELP battleship_cache_requests_total Cache lookups, by cache and result.")
+        lines.append("# TYPE battleship_cache_requests_total counter")
+        for cache, stats in sorted(cache_stats.items()):
+            label = f'cache="{_escape(cache)}"'
+            lines.append(f'battleship_cache_requests_total{{{label},result="hit"}} {stats["hits"]}')
+            lines.append(f'battleship_cache_requests_total{{{label},result="miss"}} {stats["misses"]}')
+    return "\n".join(lines) + "\n"
+
+
+def format_summary(top=8):
+    """Short human readable summary for the !stats command."""
+    uptime = int(time.time() - _started)
+    lines = [f"📊 **Bot Stats** (up {uptime // 3600}h {uptime % 3600 // 60}m)"]
+
+    busiest = sorted(command_latency.items(), key=lambda item: item[1]["count"], reverse=True)[:top]
+    if busiest:
+        lines.append("\n**Commands** (calls | p50 | p95 | avg)")
+        for command, hist in busiest:
+            errors = command_calls.get((command, "error"), 0)
+            avg_ms = hist["sum"] / hist["count"] * 1000
+            line = (
+                f"> `!{command}` {hist['count']} | ≤{estimate_quantile(hist, 0.5) * 1000:g}ms | "
+                f"≤{estimate_quantile(hist, 0.95) * 1000:g}ms | {avg_ms:.1f}ms"
+            )
+            if errors:
+                line += f" | ⚠️ {errors} failed"
+            lines.append(line)
+
+    if file_io:
+        lines.append("\n**File I/O** (reads | writes | KB written)")
+        for kind, stats in sorted(file_io.items()):
+            lines.append(f"> `{kind}` {stats['reads']} | {stats['writes']} | {stats['write_bytes'] / 1024:.1f}")
+
+    if messages_sent:
+        lines.append(f"\n**Messages sent:** `{sum(messages_sent.values())}`")
+        for channel, n in sorted(messages_sent.items(), key=lambda item: item[1], reverse=True)[:top]:
+            lines.append(f"> #{channel}: {n}")
+
+    if cache_stats:
+        lines.append("\n**Caches** (hit ratio)")
+        for cache in sorted(cache_stats):
+            lines.append(f"> `{cache}` {cache_hit_ratio(cache) * 100:.1f}%")
+
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+# run python -m utils.migrate_boards to convert board files between the formats in utils/serializers.py
+#
+#   python -m utils.migrate_boards --to binary            # every data/board_*.json -> .bin
+#   python -m utils.migrate_boards --to json              # and back again
+#   python -m utils.migrate_boards --export anneBonny     # print one board as readable JSON
+#
+# set BOARD_FORMAT in your .env to the format you migrated to before restarting the bot.
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+from utils import serializers, storage
+
+
+def board_files(directory, board_format):
+    extension = serializers.get(board_format).extension
+    return sorted(glob.glob(os.path.join(directory, f"board_*{extension}")))
+
+
+def migrate(directory, target, remove=False):
+    """Converts every board file not in `target` format. Returns a list of (source, dest, old size, new size)."""
+    converted = []
+    for source_format in serializers.SERIALIZERS:
+        if source_format == target:
+            continue
+        for source in board_files(directory, source_format):
+            dest = os.path.splitext(source)[0] + serializers.get(target).extension
+            board = serializers.read_board(source)
+            serializers.write_board(dest, board)
+            storage.flush()
+            # never drop the source unless the new file reads back as the same board
+            if serializers.read_board(dest) != board:
+                os.remove(dest)
+                raise ValueError(f"{dest} didn't read back the same as {source}; left {source} as it was")
+            converted.append((source, dest, os.path.getsize(source), os.path.getsize(dest)))
+            if remove:
+                os.remove(source)
+    return converted
+
+
+def export(directory, team, output):
+    for board_format in serializers.SERIALIZERS:
+        path = os.path.join(directory, f"board_{team}{serializers.get(board_format).extension}")
+        if os.path.exists(path):
+            board = serializers.read_board(path)
+            break
+    else:
+        raise ValueError(f"no board file for {team} in {directory}")
+
+    out = sys.stdout if output == "-" else open(output, "w", encoding="utf-8")
+    try:
+        json.dump(board, out, indent=2)
+        out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert board files between the JSON and binary formats.")
+    parser.add_argument("--to", choices=list(serializers.SERIALIZERS), help="format to convert every board file to")
+    parser.add_argument("--remove", action="store_true", help="delete the old files once converted and checked")
+    parser.add_argument("--export", metavar="TEAM", help="write one team's board as readable JSON instead")
+    parser.add_argument("-o", "--output", default="-", help="where --export writes (default: stdout)")
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.export:
+            export(args.data_dir, args.export, args.output)
+            return
+        if not args.to:
+            parser.error("pass --to json|binary or --export TEAM")
+        converted = migrate(args.data_dir, args.to, args.remove)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+
+    for source, dest, old_size, new_size in converted:
+        print(f"{source} -> {dest} ({old_size:,} -> {new_size:,} bytes)")
+    print(f"✅ Converted {len(converted)} board(s) to {args.to}. Set BOARD_FORMAT={args.to} in your .env.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# precomputed ship placement tables for the 10x10 board. every cell is one bit of an int
+# (A1 = bit 0, A2 = bit 1, ... J10 = bit 99), so a placement is a bitmask and checking it
+# against the ships already on a board is a single AND. used by place_ship for bounds and
+# overlap checks and by the !autoplace / !autofill commands to complete fleets at random.
+
+import random
+
+ROWS = "ABCDEFGHIJ"
+SIZE = 10
+CELLS = SIZE * SIZE
+FULL_MASK = (1 << CELLS) - 1
+
+# masks of every cell except the first / last column, so shifting left or right
+# never wraps a ship around to the next row
+NOT_FIRST_COL = sum(1 << (r * SIZE + c) for r in range(SIZE) for c in range(1, SIZE))
+NOT_LAST_COL = sum(1 << (r * SIZE + c) for r in range(SIZE) for c in range(SIZE - 1))
+EDGE_MASK = sum(
+    1 << (r * SIZE + c) for r in range(SIZE) for c in range(SIZE)
+    if r in (0, SIZE - 1) or c in (0, SIZE - 1)
+)
+
+# {length: [(mask, orientation, start_index), ...]}
+_placements = {}
+# {(length, orientation, start_index): (mask, coords)}
+_placement_lookup = {}
+
+COORDS = [f"{ROWS[i // SIZE]}{i % SIZE + 1}" for i in range(CELLS)]
+# {coord: cell index} and {coord: its bit}, for the hot paths
+CELL_INDEX = {coord: i for i, coord in enumerate(COORDS)}
+BITS = {coord: 1 << i for i, coord in enumerate(COORDS)}
+
+
+def cell_index(coord):
+    """`B3` -> 12, or None when the coordinate is off the board."""
+    index = CELL_INDEX.get(coord)
+    if index is not None:
+        return index
+    # lower case, `B03` and the like
+    try:
+        row = ROWS.index(coord[0].upper())
+        col = int(coord[1:]) - 1
+    except (ValueError, IndexError):
+        return None
+    if not 0 <= col < SIZE:
+        return None
+    return row * SIZE + col
+
+
+def coord_of(index):
+    return COORDS[index]
+
+
+def coords_mask(coords):
+    mask = 0
+    for coord in coords:
+        bit = BITS.get(coord)
+        if bit is None:
+            index = cell_index(coord)
+            bit = 0 if index is None else 1 << index
+        mask |= bit
+    return mask
+
+
+def mask_coords(mask):
+    """Coordinates of the set bits, in board order."""
+    coords = []
+    while mask:
+        low = mask & -mask
+        coords.append(coord_of(low.bit_length() - 1))
+        mask ^= low
+    return coords
+
+
+def first_coord(mask):
+    return coord_of((mask & -mask).bit_length() - 1) if mask else None
+
+
+def placements(length):
+    """Every legal placement of a ship of this length on an empty board."""
+    if length not in _placements:
+        table = []
+        for r in range(SIZE):
+            for c in range(SIZE):
+                start = r * SIZE + c
+                for orientation, step, fits in (("h", 1, c + length <= SIZE), ("v", SIZE, r + length <= SIZE)):
+                    if not fits:
+                        continue
+                    cells = [start + i * step for i in range(length)]
+                    mask = sum(1 << cell for cell in cells)
+                    table.append((mask, orientation, start))
+                    _placement_lookup[(length, orientation, start)] = (mask, [COORDS[cell] for cell in cells])
+        _placements[length] = table
+    return _placements[length]
+
+
+def placement_cells(length, orientation, start_index):
+    """(mask, coords in order) for one placement, or None if it would go out of bounds."""
+    if length not in _placements:
+        placements(length)
+    return _placement_lookup.get((length, orientation, start_index))
+
+
+def placement_mask(length, orientation, start_index):
+    """Mask for one placement, or None if it would go out of bounds."""
+    cells = placement_cells(length, orientation, start_index)
+    return cells[0] if cells else None
+
+
+def occupied_mask(board):
+    """
+    Cells covered by the ships placed on a board, worked out from its ship list. Boards with an
+    index keep this up to date instead (board_index.occupied).
+    """
+    mask = 0
+    for coords in board.get("ships", {}).values():
+        mask |= coords_mask(coords)
+    return mask
+
+
+def neighbours_mask(mask):
+    """The mask grown by one cell in every direction (including diagonals)."""
+    horizontal = mask | ((mask << 1) & NOT_FIRST_COL) | ((mask >> 1) & NOT_LAST_COL)
+    return (horizontal | (horizontal << SIZE) | (horizontal >> SIZE)) & FULL_MASK
+
+
+def random_fleet(ship_lengths, occupied=0, no_touch=False, edge_bias=0.0, rng=None, attempts=200):
+    """
+    Picks random placements for the given ships ({ship_type: length}) that avoid `occupied`.
+    With no_touch, ships (including the ones already on the board) never share an edge or corner.
+    edge_bias > 0 favours placements along the edges of the board, < 0 favours the middle.
+    Returns {ship_type: (orientation, start_coord, mask)} or None if no layout was found.
+    """
+    rng = rng or random
+    order = sorted(ship_lengths.items(), key=lambda item: item[1], reverse=True)
+    base_blocked = neighbours_mask(occupied) if no_touch else occupied
+
+    for _ in range(attempts):
+        blocked = base_blocked
+        chosen = {}
+        for ship_type, length in order:
+            candidates = [p for p in placements(length) if not p[0] & blocked]
+            if not candidates:
+                break
+            if edge_bias:
+                weights = [
+                    max(0.01, 1.0 + edge_bias * bin(p[0] & EDGE_MASK).count("1") / length)
+                    for p in candidates
+                ]
+                mask, orientation, start = rng.choices(candidates, weights)[0]
+            else:
+                mask, orientation, start = rng.choice(candidates)
+            chosen[ship_type] = (orientation, coord_of(start), mask)
+            blocked |= neighbours_mask(mask) if no_touch else mask
+        else:
+            return chosen
+    return None
@@ -0,0 +1,98 @@
+# on-demand profiling of the live bot for the ref !profile command. cProfile only hooks in
+# between start() and stop(), so there is no overhead at all while nobody is profiling.
+# optionally takes tracemalloc snapshots at both ends and reports what grew in between.
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+MAX_SECONDS = 600
+DEFAULT_SECONDS = 60
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+_profile = None
+_started = None
+_memory_snapshot = None
+_started_tracemalloc = False
+
+
+def is_running():
+    return _profile is not None
+
+
+def elapsed():
+    return time.perf_counter() - _started if _started else 0.0
+
+
+def start(memory=False):
+    """Starts profiling the calling thread (the event loop). Returns False if already running."""
+    global _profile, _started, _memory_snapshot, _started_tracemalloc
+    if _profile is not None:
+        return False
+
+    if memory:
+        _started_tracemalloc = not tracemalloc.is_tracing()
+        if _started_tracemalloc:
+            tracemalloc.start()
+        _memory_snapshot = tracemalloc.take_snapshot()
+
+    _profile = cProfile.Profile()
+    _started = time.perf_counter()
+    _profile.enable()
+    return True
+
+
+def stop():
+    """Stops profiling and returns the text report, or None if nothing was running."""
+    global _profile, _started, _memory_snapshot, _started_tracemalloc
+    if _profile is None:
+        return None
+
+    _profile.disable()
+    duration = time.perf_counter() - _started
+    profile, _profile, _started = _profile, None, None
+
+    out = io.StringIO()
+    out.write(f"Profiled the event loop for {duration:.1f}s\n\n")
+    stats = pstats.Stats(profile, stream=out)
+    stats.strip_dirs()
+    out.write(f"=== Top {TOP_FUNCTIONS} by own time ===\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_FUNCTIONS)
+    out.write(f"\n=== Top {TOP_FUNCTIONS} by cumulative time ===\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+
+    if _memory_snapshot is not None:
+        after = tracemalloc.take_snapshot()
+        out.write(f"\n=== Top {TOP_ALLOCATIONS} memory changes ===\n")
+        for diff in after.compare_to(_memory_snapshot, "lineno")[:TOP_ALLOCATIONS]:
+            out.write(f"{diff}\n")
+        current, peak = tracemalloc.get_traced_memory()
+        out.write(f"\ntraced memory: {current / 1024:.1f} KiB now, {peak / 1024:.1f} KiB peak\n")
+        if _started_tracemalloc:
+            tracemalloc.stop()
+        _memory_snapshot = None
+        _started_tracemalloc = False
+
+    return out.getvalue()
+
+
+def top_functions(report, limit=8):
+    """Pulls the first few rows of the own-time table out of a report for a chat preview."""
+    lines = report.splitlines()
+    rows = []
+    in_table = False
+    for line in lines:
+        if line.strip().startswith("ncalls"):
+            in_table = True
+            rows.append(line.rstrip())
+            continue
+        if in_table:
+            if not line.strip():
+                break
+            rows.append(line.rstrip())
+            if len(rows) > limit:
+                break
+    return rows
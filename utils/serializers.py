@@ -0,0 +1,384 @@
+# on-disk formats for board files. "json" is the original pretty-printed layout and stays the
+# human-readable export; "binary" packs a board with struct: catalog tiles are stored as an ID
+# into the tile catalog they were dealt from, text is interned in a string table and shots are
+# fixed-size records. pick one with BOARD_FORMAT in your .env and convert existing boards with
+# python -m utils.migrate_boards.
+#
+# binary boards name their catalog by fingerprint, and every catalog a binary board was written
+# against is kept in data/catalogs/<fingerprint>.json, so editing base_tiles.json mid-match never
+# makes an old board unreadable.
+
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+
+from utils import metrics, placement, storage
+
+MAGIC = b"BSB\x01"
+
+_HEADER = struct.Struct("<4sI")          # magic, length of the string table
+_U32 = struct.Struct("<I")
+_SECTION = struct.Struct("<III")         # number of tile records, shot records and ships
+# cell (or NOT_ON_GRID), tag, catalog index or string id, previous_tile and original_tile
+# records (their position + 1, 0 for none)
+_TILE = struct.Struct("<BBIHH")
+_SHOT = struct.Struct("<BBIBq")          # cell, hit, shooter string id, time tag, time value
+_SHIP = struct.Struct("<IB")             # name string id, number of cells
+
+NOT_ON_GRID = 0xFF
+_COORDS = [placement.coord_of(i) for i in range(placement.CELLS)]
+_CELLS = {coord: i for i, coord in enumerate(_COORDS)}
+
+# tile tags
+_CATALOG_TILE = 0
+_INLINE_TILE = 1
+_NESTED_KEYS = ("previous_tile", "original_tile")
+
+# shot time tags: naive utc isoformat, aware utc isoformat, or anything else as a string
+_NAIVE_TIME = 0
+_UTC_TIME = 1
+_TEXT_TIME = 2
+_EPOCH = datetime(1970, 1, 1)
+
+
+# (tiles, fingerprint) of the last catalog hashed: dealing boards asks for it once per board
+_last_fingerprint = (None, None)
+
+
+def catalog_fingerprint(tiles):
+    """Short hash of a tile catalog: its ID in binary boards and in generated boards' records."""
+    global _last_fingerprint
+    if _last_fingerprint[0] is tiles:
+        return _last_fingerprint[1]
+    raw = json.dumps(tiles, sort_keys=True, separators=(",", ":"))
+    fingerprint = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+    _last_fingerprint = (tiles, fingerprint)
+    return fingerprint
+
+
+def _tile_key(tile):
+    try:
+        return tuple(tile.items())
+    except TypeError:
+        return None
+
+
+class Catalog:
+    """One tile catalog and the lookups to find a tile's index in it."""
+
+    def __init__(self, fingerprint, tiles):
+        self.fingerprint = fingerprint
+        self.tiles = tiles
+        # tiles read from binary boards are these very objects, so most lookups are by identity
+        self._by_id = {id(tile): index for index, tile in enumerate(tiles)}
+        self._by_value = {}
+        for index, tile in enumerate(tiles):
+            key = _tile_key(tile)
+            if key is not None:
+                self._by_value.setdefault(key, index)
+
+    def index_of(self, tile):
+        index = self._by_id.get(id(tile))
+        if index is not None and self.tiles[index] is tile:
+            return index
+        key = _tile_key(tile)
+        try:
+            return self._by_value.get(key) if key is not None else None
+        except TypeError:
+            # a value in the tile can't be hashed (a list, say): store it inline
+            return None
+
+
+class CatalogStore:
+    """The current tile catalog plus every catalog a binary board has been written against."""
+
+    def __init__(self, catalog_path, directory):
+        self.catalog_path = catalog_path
+        self.directory = directory
+        # (mtime_ns, size) of catalog_path when it was last read
+        self._current_key = None
+        self._current = None
+        # {fingerprint: Catalog}; never replaced once loaded, boards share its tile objects
+        self._catalogs = {}
+
+    def current(self):
+        """The Catalog for base_tiles.json, or None without one."""
+        key = storage.stat_key(self.catalog_path)
+        if key is None:
+            return None
+        if key != self._current_key:
+            tiles = json.loads(storage.read(self.catalog_path))["tiles"]
+            fingerprint = catalog_fingerprint(tiles)
+            if fingerprint not in self._catalogs:
+                self._catalogs[fingerprint] = Catalog(fingerprint, tiles)
+                self._archive(fingerprint, tiles)
+            self._current_key, self._current = key, self._catalogs[fingerprint]
+        return self._current
+
+    def _archive_path(self, fingerprint):
+        return os.path.join(self.directory, f"{fingerprint}.json")
+
+    def _archive(self, fingerprint, tiles):
+        path = self._archive_path(fingerprint)
+        if not storage.exists(path):
+            storage.write(path, json.dumps({"tiles": tiles}, indent=2).encode())
+
+    def get(self, fingerprint):
+        if fingerprint not in self._catalogs:
+            self.current()
+        if fingerprint not in self._catalogs:
+            try:
+                tiles = json.loads(storage.read(self._archive_path(fingerprint)))["tiles"]
+            except FileNotFoundError:
+                raise ValueError(f"tile catalog {fingerprint} is missing from {self.directory}") from None
+            self._catalogs[fingerprint] = Catalog(fingerprint, tiles)
+        return self._catalogs[fingerprint]
+
+
+class JsonSerializer:
+    name = "json"
+    extension = ".json"
+
+    def dumps(self, board):
+        return json.dumps(board, indent=2).encode()
+
+    def loads(self, raw):
+        return json.loads(raw)
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, text):
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def pack(self):
+        encoded = [text.encode("utf-8") for text in self.strings]
+        lengths = struct.pack(f"<I{len(encoded)}I", len(encoded), *(len(raw) for raw in encoded))
+        return lengths + b"".join(encoded)
+
+
+def _unpack_strings(raw, offset):
+    (count,) = _U32.unpack_from(raw, offset)
+    lengths = struct.unpack_from(f"<{count}I", raw, offset + 4)
+    offset += 4 + 4 * count
+    strings = []
+    for length in lengths:
+        strings.append(raw[offset:offset + length].decode("utf-8"))
+        offset += length
+    return strings, offset
+
+
+def _pack_time(timestamp, strings):
+    """Shot timestamps as microseconds when that round-trips to the exact same string."""
+    if isinstance(timestamp, str):
+        try:
+            moment = datetime.fromisoformat(timestamp)
+        except ValueError:
+            moment = None
+        if moment is not None:
+            if moment.tzinfo is None:
+                micros = (moment - _EPOCH) // timedelta(microseconds=1)
+                if (_EPOCH + timedelta(microseconds=micros)).isoformat() == timestamp:
+                    return _NAIVE_TIME, micros
+            elif moment.utcoffset() == timedelta(0):
+                micros = (moment.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+                rebuilt = (_EPOCH + timedelta(microseconds=micros)).replace(tzinfo=timezone.utc).isoformat()
+                if rebuilt == timestamp:
+                    return _UTC_TIME, micros
+    return _TEXT_TIME, strings.add(json.dumps(timestamp))
+
+
+def _unpack_time(tag, value, strings):
+    if tag == _NAIVE_TIME:
+        return (_EPOCH + timedelta(microseconds=value)).isoformat()
+    if tag == _UTC_TIME:
+        return (_EPOCH + timedelta(microseconds=value)).replace(tzinfo=timezone.utc).isoformat()
+    return json.loads(strings[value])
+
+
+class BinarySerializer:
+    """
+    Layout: header, string table, section counts, tile records, shot records, ships, then the
+    string id of a JSON object holding every other board field.
+    Tiles read back from the catalog are shared, never copied, like the boards in utils/history.py.
+    """
+
+    name = "binary"
+    extension = ".bin"
+
+    def __init__(self, catalogs):
+        self.catalogs = catalogs
+
+    def dumps(self, board):
+        catalog = self.catalogs.current()
+        strings = _StringTable()
+        records = []
+
+        def pack_tile(tile, cell):
+            # nested tiles go first, so the reader has built them by the time it gets here
+            links = [0, 0]
+            if tile.get("previous_tile") is not None or tile.get("original_tile") is not None:
+                nested = [key for key in _NESTED_KEYS if isinstance(tile.get(key), dict)]
+                for key in nested:
+                    links[_NESTED_KEYS.index(key)] = pack_tile(tile[key], NOT_ON_GRID) + 1
+                flat = {k: v for k, v in tile.items() if k not in nested} if nested else tile
+            else:
+                index = catalog.index_of(tile) if catalog else None
+                if index is not None:
+                    records.append(_TILE.pack(cell, _CATALOG_TILE, index, 0, 0))
+                    return len(records) - 1
+                flat = tile
+            string_id = strings.add(json.dumps(flat, ensure_ascii=False, separators=(",", ":")))
+            records.append(_TILE.pack(cell, _INLINE_TILE, string_id, *links))
+            return len(records) - 1
+
+        rest = {k: v for k, v in board.items() if k not in ("tiles", "shots", "ships")}
+        rest["_catalog"] = catalog.fingerprint if catalog else None
+        rest["_has"] = [key for key in ("shots", "ships") if key in board]
+
+        off_grid = {}
+        for coord, tile in board.get("tiles", {}).items():
+            cell = _CELLS.get(coord)
+            if cell is None:
+                off_grid[coord] = tile
+            else:
+                pack_tile(tile, cell)
+
+        shots = []
+        extra_shots = {}
+        for coord, shot in board.get("shots", {}).items():
+            cell = _CELLS.get(coord)
+            # shots that don't fit the fixed record ride along as JSON
+            if (cell is None or shot.keys() != {"by", "hit", "timestamp"}
+                    or not isinstance(shot["hit"], bool) or not isinstance(shot["by"], str)):
+                extra_shots[coord] = shot
+                continue
+            tag, value = _pack_time(shot["timestamp"], strings)
+            shots.append(_SHOT.pack(cell, shot["hit"], strings.add(shot["by"]), tag, value))
+
+        ships = []
+        for ship, coords in board.get("ships", {}).items():
+            cells = [_CELLS.get(c) for c in coords]
+            if None in cells:
+                rest.setdefault("_ships", {})[ship] = coords
+                continue
+            ships.append(_SHIP.pack(strings.add(ship), len(cells)) + bytes(cells))
+
+        if off_grid:
+            rest["_tiles"] = off_grid
+        if extra_shots:
+            rest["_shots"] = extra_shots
+        rest_id = strings.add(json.dumps(rest, separators=(",", ":")))
+
+        table = strings.pack()
+        return b"".join([
+            _HEADER.pack(MAGIC, len(table)), table,
+            _SECTION.pack(len(records), len(shots), len(ships)),
+            *records, *shots, *ships,
+            _U32.pack(rest_id),
+        ])
+
+    def loads(self, raw):
+        magic, _ = _HEADER.unpack_from(raw, 0)
+        if magic != MAGIC:
+            raise ValueError("not a binary board file")
+        strings, offset = _unpack_strings(raw, _HEADER.size)
+        tile_count, shot_count, ship_count = _SECTION.unpack_from(raw, offset)
+        offset += _SECTION.size
+
+        # the trailing fields name the catalog, which the tiles need, so read them first
+        (rest_id,) = _U32.unpack_from(raw, len(raw) - 4)
+        rest = json.loads(strings[rest_id])
+        fingerprint = rest.pop("_catalog")
+        catalog = self.catalogs.get(fingerprint).tiles if fingerprint else []
+        present = rest.pop("_has")
+
+        tiles = {}
+        built = []
+        end = offset + tile_count * _TILE.size
+        for cell, tag, value, previous, original in _TILE.iter_unpack(raw[offset:end]):
+            if tag == _CATALOG_TILE:
+                tile = catalog[value]
+            else:
+                tile = json.loads(strings[value])
+                if previous:
+                    tile["previous_tile"] = built[previous - 1]
+                if original:
+                    tile["original_tile"] = built[original - 1]
+            built.append(tile)
+            if cell != NOT_ON_GRID:
+                tiles[_COORDS[cell]] = tile
+        tiles.update(rest.pop("_tiles", {}))
+        offset = end
+
+        shots = {}
+        end = offset + shot_count * _SHOT.size
+        for cell, hit, by, tag, value in _SHOT.iter_unpack(raw[offset:end]):
+            shots[_COORDS[cell]] = {"by": strings[by], "hit": bool(hit), "timestamp": _unpack_time(tag, value, strings)}
+        shots.update(rest.pop("_shots", {}))
+        offset = end
+
+        ships = {}
+        for _ in range(ship_count):
+            name, cells = _SHIP.unpack_from(raw, offset)
+            offset += _SHIP.size
+            ships[strings[name]] = [_COORDS[i] for i in raw[offset:offset + cells]]
+            offset += cells
+        ships.update(rest.pop("_ships", {}))
+
+        board = {"tiles": tiles}
+        if "shots" in present:
+            board["shots"] = shots
+        if "ships" in present:
+            board["ships"] = ships
+        board.update(rest)
+        return board
+
+
+_catalogs = CatalogStore(os.path.join("data", "base_tiles.json"), os.path.join("data", "catalogs"))
+SERIALIZERS = {
+    "json": JsonSerializer(),
+    "binary": BinarySerializer(_catalogs),
+}
+
+
+def get(name):
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError(f"unknown board format {name!r} (choose from {', '.join(SERIALIZERS)})") from None
+
+
+def for_path(path):
+    """The serializer that reads a board file, going by its extension."""
+    for serializer in SERIALIZERS.values():
+        if path.endswith(serializer.extension):
+            return serializer
+    raise ValueError(f"no board format uses the extension of {path}")
+
+
+def read_board(path):
+    raw = storage.read(path)
+    metrics.count_read("board", len(raw))
+    return for_path(path).loads(raw)
+
+
+def encode_board(path, board):
+    """The bytes write_board would queue for this path, for callers batching several boards."""
+    raw = for_path(path).dumps(board)
+    metrics.count_write("board", len(raw))
+    return raw
+
+
+def write_board(path, board, on_written=None):
+    """Serializes a board now and queues the file write (see utils/storage.py)."""
+    storage.write(path, encode_board(path, board), on_written)
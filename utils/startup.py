@@ -0,0 +1,189 @@
+# what the bot does between connecting and answering commands (bot.on_ready calls run()).
+# every board is kept in data/warm_snapshot.json as well as in its own file: one read of the
+# snapshot fills the board cache for every board whose file hasn't changed since it was taken,
+# and only boards that did change (or are missing from it) are read from their files, in
+# parallel. the board files stay the authority, so a stale or missing snapshot costs speed,
+# never correctness. the snapshot is rewritten at the end of startup and on shutdown.
+#
+# until run() finishes, is_ready() is False and bot.py answers commands with a "warming up"
+# reply rather than let them see boards that aren't loaded yet. each phase is timed and the
+# timings printed once the bot is ready.
+
+import asyncio
+import atexit
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from utils import game, history, match_log, storage
+
+SNAPSHOT_PATH = os.path.join("data", "warm_snapshot.json")
+_WORKERS = 8
+
+_ready = False
+# [(phase, seconds)] of the last startup
+timings = []
+
+
+def is_ready():
+    return _ready
+
+
+class _Phase:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timings.append((self.name, time.perf_counter() - self.started))
+
+
+def board_problems(board):
+    """What's wrong with a board's structure (an empty list for a sound board)."""
+    tiles = board.get("tiles")
+    if not isinstance(tiles, dict) or not tiles:
+        return ["no tiles"]
+    problems = []
+    for ship, coords in board.get("ships", {}).items():
+        for coord in coords:
+            if tiles.get(coord, {}).get("ship") != ship:
+                problems.append(f"{ship} at {coord} is not on its tile")
+    for coord in board.get("shots", {}):
+        if coord not in tiles:
+            problems.append(f"shot at {coord} is off the board")
+    return problems
+
+
+def _read_snapshot():
+    try:
+        with open(SNAPSHOT_PATH, "rb") as f:
+            data = json.loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    if data.get("format") != config.BOARD_FORMAT:
+        return {}
+    return data.get("boards", {})
+
+
+def _warm(team, entry):
+    """(team, board or None, where it came from, problems). Runs on a worker thread."""
+    key = game.board_file_key(team)
+    if key is None:
+        return team, None, "new", []
+    if entry and tuple(entry.get("key", ())) == key:
+        board = entry["board"]
+        game.prime_board(team, key, board)
+        source = "snapshot"
+    else:
+        board = game.load_board(team)
+        source = "file"
+    return team, board, source, board_problems(board)
+
+
+def _state_files():
+    """(skip tokens, active skips, files written). Runs on a worker thread."""
+    tokens = game.load_skip_tokens()
+    active_skips = game.load_active_skips()
+    return tokens, active_skips, game.complete_state_files(tokens, active_skips)
+
+
+def write_snapshot():
+    """Writes every cached board that matches its file to the warm snapshot."""
+    storage.flush(10)
+    boards = {
+        team: {"key": list(key), "board": board}
+        for team, (key, board) in game.cached_boards().items()
+        if team in config.TEAMS_LIST
+    }
+    raw = json.dumps({"format": config.BOARD_FORMAT, "boards": boards}, separators=(",", ":")).encode("utf-8")
+    storage.write(SNAPSHOT_PATH, raw)
+    return len(boards)
+
+
+async def run(load_or_generate_board):
+    """
+    Loads every team's board, records the starting versions and makes sure the skip token files
+    exist. `load_or_generate_board(team)` deals a board for a team that has none.
+    """
+    global _ready
+    if _ready:
+        return
+    loop = asyncio.get_running_loop()
+    timings.clear()
+    started = time.perf_counter()
+    teams = list(config.TEAMS_LIST)
+
+    with _Phase("snapshot"):
+        snapshot = await loop.run_in_executor(None, _read_snapshot)
+
+    with _Phase("boards"), ThreadPoolExecutor(min(_WORKERS, len(teams) or 1)) as pool:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, _warm, team, snapshot.get(team)) for team in teams
+        ))
+
+    sources = {}
+    boards = {}
+    for team, board, source, problems in results:
+        sources[source] = sources.get(source, 0) + 1
+        boards[team] = board
+        if problems:
+            print(f"⚠️ Board for {team} has problems: {'; '.join(problems[:5])}")
+
+    with _Phase("generate"):
+        for team in teams:
+            if boards[team] is None:
+                boards[team] = load_or_generate_board(team)
+
+    with _Phase("state"):
+        tokens, active_skips, written = await loop.run_in_executor(None, _state_files)
+
+    with _Phase("match_logs"):
+        await loop.run_in_executor(None, match_log.resume, {game.match_id(team) for team in teams})
+
+    with _Phase("history"):
+        for team in teams:
+            if not history.current_version(team):
+                game.record_version(team, boards[team], "startup", tokens, active_skips)
+
+    with _Phase("write_snapshot"):
+        await loop.run_in_executor(None, write_snapshot)
+
+    _ready = True
+    total = time.perf_counter() - started
+    print(
+        f"🚀 Ready in {total * 1000:.1f}ms: {len(teams)} board(s) "
+        f"({', '.join(f'{n} new' if source == 'new' else f'{n} from {source}' for source, n in sorted(sources.items()))})"
+        + (f", wrote {', '.join(written)}" if written else "")
+    )
+    print("   " + " · ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in timings))
+
+
+def add_teams(teams, load_or_generate_board):
+    """
+    Sets up teams a reloaded match setup added while the bot runs, as run() does at startup: their
+    boards, starting versions and skip token entries.
+    """
+    tokens = game.load_skip_tokens()
+    active_skips = game.load_active_skips()
+    game.complete_state_files(tokens, active_skips)
+    match_log.resume({game.match_id(team) for team in teams})
+    for team in teams:
+        board = load_or_generate_board(team)
+        problems = board_problems(board)
+        if problems:
+            print(f"⚠️ Board for {team} has problems: {'; '.join(problems[:5])}")
+        if not history.current_version(team):
+            game.record_version(team, board, "joined", tokens, active_skips)
+
+
+def _write_on_exit():
+    if _ready:
+        write_snapshot()
+
+# registered after storage's own flush, so it runs first and storage then writes the snapshot
+atexit.register(_write_on_exit)
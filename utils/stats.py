@@ -0,0 +1,153 @@
+# running match statistics for the summaries, progress reports and scoreboard. each board's
+# stats are built once from its shots (sorted by time) and then kept current by record(),
+# which game.record_version calls for every saved change: a shot or a resolved event is added
+# in O(1) (O(ship size) to check for a sinking), and any other change that touched the shots
+# (a rollback, a regenerated board) drops the board's stats so they're rebuilt on next use.
+
+from datetime import datetime, timezone
+
+# {board team: BoardStats}
+_stats = {}
+
+
+def parse_ts(ts):
+    moment = ts if isinstance(ts, datetime) else datetime.fromisoformat(ts)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+class ShooterStats:
+    """One shooter's record against one board."""
+
+    __slots__ = ("shots", "hits", "streak", "best_streak", "sunk", "last_coord", "last_hit", "last_time", "gap_total", "gaps")
+
+    def __init__(self):
+        self.shots = 0
+        self.hits = 0
+        self.streak = 0
+        self.best_streak = 0
+        self.sunk = []
+        self.last_coord = None
+        self.last_hit = None
+        self.last_time = None
+        self.gap_total = 0.0
+        self.gaps = 0
+
+    @property
+    def misses(self):
+        return self.shots - self.hits
+
+    @property
+    def accuracy(self):
+        return self.hits / self.shots * 100 if self.shots else 0.0
+
+    @property
+    def average_gap(self):
+        """Mean seconds between this shooter's shots, or None before the second one."""
+        return self.gap_total / self.gaps if self.gaps else None
+
+    def add(self, coord, hit, moment):
+        self.shots += 1
+        if hit:
+            self.hits += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.streak = 0
+        if self.last_time is not None:
+            self.gap_total += max(0.0, (moment - self.last_time).total_seconds())
+            self.gaps += 1
+        self.last_coord = coord
+        self.last_hit = hit
+        self.last_time = moment
+
+
+class BoardStats:
+    """Everything that's been fired at one team's board, by shooter ("event" for event wreckage)."""
+
+    def __init__(self, board):
+        self.board = board
+        self.shooters = {}
+        self.ships_lost = []
+        # the latest shot at the board by anyone (events included)
+        self.last_coord = None
+        # {coord: ship type} for the ship cells, so a hit knows what it hit
+        self._ship_at = {}
+        # {ship type: cells not hit yet}
+        self._afloat = {}
+        for ship, coords in board.get("ships", {}).items():
+            self._afloat[ship] = len(coords)
+            for coord in coords:
+                self._ship_at[coord] = ship
+
+        shots = board.get("shots", {})
+        for coord, shot in sorted(shots.items(), key=lambda item: parse_ts(item[1]["timestamp"])):
+            self.add(coord, shot)
+
+    @property
+    def shots_taken(self):
+        return sum(s.shots for s in self.shooters.values())
+
+    @property
+    def hits_taken(self):
+        return sum(s.hits for s in self.shooters.values())
+
+    def shooter(self, team):
+        return self.shooters.get(team) or ShooterStats()
+
+    def add(self, coord, shot):
+        by = shot.get("by", "")
+        hit = bool(shot.get("hit"))
+        shooter = self.shooters.get(by)
+        if shooter is None:
+            shooter = self.shooters[by] = ShooterStats()
+        shooter.add(coord, hit, parse_ts(shot["timestamp"]))
+        self.last_coord = coord
+
+        ship = self._ship_at.get(coord) if hit else None
+        if ship is not None:
+            self._afloat[ship] -= 1
+            if self._afloat[ship] == 0:
+                self.ships_lost.append(ship)
+                shooter.sunk.append(ship)
+
+
+def record(team, previous, board, event=None):
+    """Keeps a board's stats current after a saved change (snapshots before and after it)."""
+    stats = _stats.get(team)
+    if stats is None:
+        return  # built from the board on first use
+    kind = (event or {}).get("type")
+    if kind in ("shot", "event_resolved") and previous is not None:
+        coord = event["coord"]
+        shot = board.get("shots", {}).get(coord)
+        if shot is not None and (previous.get("shots") or {}).get(coord) is not shot:
+            stats.add(coord, shot)
+        return
+    if previous is None or previous.get("shots") is not board.get("shots") or previous.get("ships") is not board.get("ships"):
+        # snapshots share unchanged sections, so this only rebuilds when shots or ships changed
+        forget(team)
+
+
+def for_board(team, board):
+    """
+    The board's stats, built from it the first time. A different board object (the file was
+    changed outside the bot, a batch swapped in new boards) means a rebuild.
+    """
+    stats = _stats.get(team)
+    if stats is None or stats.board is not board:
+        stats = _stats[team] = BoardStats(board)
+    return stats
+
+
+def forget(team):
+    _stats.pop(team, None)
+
+
+def format_gap(seconds):
+    if seconds is None:
+        return "–"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
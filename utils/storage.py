@@ -0,0 +1,382 @@
+# all file I/O for the bot, kept off the discord.py event loop. writes are handed to a single
+# background writer thread and return at once: the writer saves each file to a temp file and
+# renames it into place, so a crash never leaves half a board behind. writes to the same file
+# that queue up are coalesced (only the newest one is written), and reads see queued writes,
+# so nothing ever reads a file that's older than what the bot last saved.
+#
+# once a file has been read, written or looked for, read(), stat_key() and exists() answer from
+# memory with no system call. a background thread re-checks every known file each
+# REVALIDATE_SECONDS and re-reads the ones edited by hand, so those edits still show up. only
+# the very first look at a file goes to the disk from the caller's thread; the bot's startup
+# (utils/startup.py) does that for its files on worker threads, so commands never wait on it.
+#
+# STORAGE_FSYNC picks the durability: "always" fsyncs every file and its directory before
+# moving on, "never" leaves flushing to the OS. reads that happen inside coroutines (images
+# for the channels) go through a small thread pool with read_async(). if the writer falls
+# more than MAX_PENDING files behind, CLI tools wait in write() and coroutines wait (without
+# blocking the loop) in backpressure(), which the bot awaits after every command.
+
+import asyncio
+import atexit
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+FSYNC = config.STORAGE_FSYNC
+# distinct files waiting to be written before writers are asked to wait
+MAX_PENDING = 256
+# images and other assets never change while the bot runs
+_ASSET_CACHE_LIMIT = 32
+# files known to storage: their contents are kept if they're small enough
+_READ_CACHE_LIMIT = 256
+_READ_CACHE_MAX_BYTES = 1 << 20
+# how often known files are checked for edits made outside the bot
+REVALIDATE_SECONDS = 1.0
+
+
+class _Write:
+    __slots__ = ("data", "append", "on_written")
+
+    def __init__(self, data, append, on_written):
+        self.data = data
+        self.append = append
+        self.on_written = on_written
+
+
+class Writer:
+    def __init__(self, fsync=FSYNC, max_pending=MAX_PENDING):
+        self.fsync = fsync
+        self.max_pending = max_pending
+        # {path: _Write} waiting to be written, oldest path first in _order
+        self._pending = {}
+        self._order = deque()
+        # {path: _Write} being written right now
+        self._in_flight = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self.written = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_error = None
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, path, data, append=False, on_written=None):
+        self.submit_many([(path, data, on_written)], append)
+
+    def submit_many(self, writes, append=False):
+        """Queues [(path, data, on_written), ...] in one go, so the writer takes them back to back."""
+        writes = [(os.fspath(path), data, on_written) for path, data, on_written in writes]
+        # on the event loop the queue may run over; the loop then waits in backpressure()
+        blocking = not _on_event_loop()
+        with self._cond:
+            new_paths = {path for path, _, _ in writes if path not in self._pending}
+            while blocking and self._pending and len(self._pending) + len(new_paths) > self.max_pending:
+                self._cond.wait()
+                new_paths = {path for path, _, _ in writes if path not in self._pending}
+            for path, data, on_written in writes:
+                queued = self._pending.get(path)
+                if queued is None:
+                    self._pending[path] = _Write(data, append, on_written)
+                    self._order.append(path)
+                elif append:
+                    queued.data += data
+                else:
+                    # a newer full rewrite replaces whatever was queued for this file
+                    self.coalesced += 1
+                    self._pending[path] = _Write(data, False, on_written)
+            self._start()
+            self._cond.notify_all()
+
+    def queued(self, path):
+        """Bytes the file will hold once queued writes land, or None if nothing's queued (or it's an append)."""
+        path = os.fspath(path)
+        with self._cond:
+            for table in (self._pending, self._in_flight):
+                write = table.get(path)
+                if write is not None and not write.append:
+                    return write.data
+        return None
+
+    def has_pending(self, path):
+        path = os.fspath(path)
+        with self._cond:
+            return path in self._pending or path in self._in_flight
+
+    def depth(self):
+        with self._cond:
+            return len(self._pending) + len(self._in_flight)
+
+    def has_room(self):
+        with self._cond:
+            return len(self._pending) <= self.max_pending
+
+    def wait_for_room(self):
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._pending) <= self.max_pending)
+
+    def flush(self, timeout=None):
+        """Waits for every queued write to reach the disk. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._order:
+                    self._cond.wait()
+                path = self._order.popleft()
+                write = self._pending.pop(path)
+                self._in_flight[path] = write
+                self._cond.notify_all()
+
+            stat = None
+            try:
+                if write.append:
+                    _append(path, write.data, self.fsync)
+                    _forget(path)
+                else:
+                    _replace(path, write.data, self.fsync)
+                    stat = os.stat(path)
+                    _remember(path, stat, write.data)
+                self.written += 1
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{path}: {e}"
+                traceback.print_exc()
+
+            with self._cond:
+                del self._in_flight[path]
+                self._cond.notify_all()
+            if write.on_written is not None and stat is not None:
+                try:
+                    write.on_written(stat)
+                except Exception:
+                    traceback.print_exc()
+
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return  # not supported on this platform
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _replace(path, data, fsync):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        if fsync == "always":
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if fsync == "always":
+        _fsync_dir(directory)
+
+
+def _append(path, data, fsync):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(data)
+        if fsync == "always":
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _on_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+# {path: ((mtime_ns, size) or None if there's no such file, bytes or None if not kept)}
+_read_cache = {}
+_read_cache_lock = threading.Lock()
+_revalidator = None
+
+
+def _stat_key(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+_ANY = object()
+
+
+def _store(path, key, data, expected=_ANY):
+    """Records what's in a file. With `expected`, only if the entry is still that (None: no entry)."""
+    if data is not None and len(data) > _READ_CACHE_MAX_BYTES:
+        data = None
+    with _read_cache_lock:
+        if expected is not _ANY and _read_cache.get(path) is not expected:
+            return  # the writer (or the revalidator) knows better
+        if path not in _read_cache and len(_read_cache) >= _READ_CACHE_LIMIT:
+            _read_cache.pop(next(iter(_read_cache)))
+        _read_cache[path] = (key, data)
+    _start_revalidator()
+
+
+def _remember(path, stat, data):
+    _store(path, (stat.st_mtime_ns, stat.st_size), data)
+
+
+def _forget(path):
+    with _read_cache_lock:
+        _read_cache.pop(path, None)
+
+
+def _start_revalidator():
+    global _revalidator
+    if _revalidator is None:
+        _revalidator = threading.Thread(target=_revalidate, name="storage-revalidate", daemon=True)
+        _revalidator.start()
+
+
+def _revalidate():
+    while True:
+        time.sleep(REVALIDATE_SECONDS)
+        with _read_cache_lock:
+            known = list(_read_cache.items())
+        for path, entry in known:
+            if _writer.has_pending(path):
+                continue  # the writer will record what it writes
+            key = _stat_key(path)
+            if key == entry[0]:
+                continue
+            data = None
+            if key is not None and entry[1] is not None:
+                try:
+                    with open(path, "rb") as f:
+                        stat = os.fstat(f.fileno())
+                        data = f.read()
+                    key = (stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    key = None
+            _store(path, key, data, expected=entry)
+
+
+_writer = Writer()
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="storage-io")
+_assets = {}
+
+
+def write(path, data, on_written=None):
+    """Queues a full rewrite of a file. `on_written(stat)` runs on the writer thread once it's on disk."""
+    _writer.submit(path, data, on_written=on_written)
+
+
+def write_many(writes):
+    """Queues several full rewrites [(path, data, on_written), ...] as one batch."""
+    _writer.submit_many(writes)
+
+
+def append(path, data):
+    """Queues data to be added to the end of a file (trace logs and the like)."""
+    _writer.submit(path, data, append=True)
+
+
+def read(path):
+    """A file's bytes, including writes that are still queued. Raises FileNotFoundError."""
+    path = os.fspath(path)
+    data = _writer.queued(path)
+    if data is not None:
+        return data
+    cached = _read_cache.get(path)
+    if cached is not None:
+        if cached[0] is None:
+            raise FileNotFoundError(path)
+        if cached[1] is not None:
+            return cached[1]
+    try:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+    except FileNotFoundError:
+        _store(path, None, None, expected=cached)
+        raise
+    _store(path, (stat.st_mtime_ns, stat.st_size), data, expected=cached)
+    return data
+
+
+def stat_key(path):
+    """
+    (mtime_ns, size) of a file as storage last saw it on disk, or None if there's no such file (yet:
+    a file whose first write is still queued has no stat).
+    """
+    path = os.fspath(path)
+    cached = _read_cache.get(path)
+    if cached is not None:
+        return cached[0]
+    key = _stat_key(path)
+    _store(path, key, None, expected=None)
+    return key
+
+
+def exists(path):
+    return _writer.has_pending(path) or stat_key(path) is not None
+
+
+async def read_async(path):
+    """read() on the I/O thread pool, for coroutines."""
+    data = _writer.queued(path)
+    if data is not None:
+        return data
+    return await asyncio.get_running_loop().run_in_executor(_executor, read, path)
+
+
+async def read_asset(path):
+    """Reads a file that doesn't change while the bot runs (images), cached after the first read."""
+    path = os.fspath(path)
+    data = _assets.get(path)
+    if data is None:
+        data = await read_async(path)
+        if len(_assets) >= _ASSET_CACHE_LIMIT:
+            _assets.pop(next(iter(_assets)))
+        _assets[path] = data
+    return data
+
+
+async def backpressure():
+    """Waits, without blocking the event loop, until the writer is no more than MAX_PENDING files behind."""
+    if not _writer.has_room():
+        await asyncio.get_running_loop().run_in_executor(_executor, _writer.wait_for_room)
+
+
+def flush(timeout=None):
+    return _writer.flush(timeout)
+
+
+def stats():
+    return {
+        "pending": _writer.depth(),
+        "written": _writer.written,
+        "coalesced": _writer.coalesced,
+        "errors": _writer.errors,
+        "last_error": _writer.last_error,
+    }
+
+
+# don't lose queued writes when the bot (or a CLI tool) exits
+atexit.register(flush, 10)
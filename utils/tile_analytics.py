@@ -0,0 +1,217 @@
+# run python -m utils.tile_analytics for how long each tile's task takes, to rebalance the
+# `count` values in base_tiles.json and ship_tiles.json before the next event
+#
+#   python -m utils.tile_analytics                       # every archived match
+#   python -m utils.tile_analytics --season 2025 --format csv -o tiles.csv
+#
+# a team can only fire again once the task of the tile it last hit is done, so the time from
+# one of its shots to its next shot is how long that tile took. shots where a skip let the
+# team fire straight away don't count, nor does a team's last shot of a match. the archive's
+# shots are read once, in order, as a stream, and every tile keeps a small log-scale histogram
+# rather than its samples, so the pass runs in constant memory however many seasons there are.
+
+import argparse
+import csv
+import json
+import math
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+from utils import archive
+
+# histogram buckets grow by 10% each, so quantiles are within ~5% of the real value
+_RATIO = 1.1
+_LOG_RATIO = math.log(_RATIO)
+
+CATALOGS = {"base": "data/base_tiles.json", "ship": "data/ship_tiles.json"}
+
+REPORT_FIELDS = ["kind", "name", "count", "samples", "p50_minutes", "p90_minutes", "mean_minutes",
+                 "minutes_per_count", "suggested_count"]
+
+
+class Distribution:
+    """Completion times of one tile, as a log-scale histogram."""
+
+    __slots__ = ("buckets", "samples", "total", "low", "high")
+
+    def __init__(self):
+        self.buckets = {}
+        self.samples = 0
+        self.total = 0.0
+        self.low = None
+        self.high = None
+
+    def add(self, seconds):
+        seconds = max(seconds, 1.0)
+        bucket = int(math.log(seconds) / _LOG_RATIO)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.samples += 1
+        self.total += seconds
+        self.low = seconds if self.low is None else min(self.low, seconds)
+        self.high = seconds if self.high is None else max(self.high, seconds)
+
+    @property
+    def mean(self):
+        return self.total / self.samples if self.samples else None
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        rank = q * self.samples
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # middle of the bucket, clamped to what was actually seen
+                value = _RATIO ** (bucket + 0.5)
+                return min(max(value, self.low), self.high)
+        return self.high
+
+
+def _parse_ts(ts):
+    moment = datetime.fromisoformat(ts)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def iter_completion_times(db, season=None):
+    """Yields (kind, name, count, seconds) for every shot whose task was completed."""
+    query = (
+        "SELECT s.match_id, s.team, s.hit, s.tile, s.tile_count, s.skipped, s.ts FROM shots s"
+        + (" JOIN matches m ON m.id = s.match_id WHERE m.season = ? AND" if season else " WHERE")
+        + " s.retracted = 0"
+        + " ORDER BY s.match_id, s.team, s.ts"
+    )
+    previous = None
+    for row in db.execute(query, (season,) if season else ()):
+        if (
+            previous is not None
+            and previous["match_id"] == row["match_id"]
+            and previous["team"] == row["team"]
+            and previous["tile"]
+            and not previous["skipped"]
+        ):
+            seconds = (_parse_ts(row["ts"]) - _parse_ts(previous["ts"])).total_seconds()
+            kind = "ship" if previous["hit"] else "base"
+            yield kind, previous["tile"], previous["tile_count"], seconds
+        previous = row
+
+
+def analyze(db, season=None):
+    """{(kind, name, count): Distribution} over the archive."""
+    distributions = {}
+    for kind, name, count, seconds in iter_completion_times(db, season):
+        key = (kind, name, count)
+        distribution = distributions.get(key)
+        if distribution is None:
+            distribution = distributions[key] = Distribution()
+        distribution.add(seconds)
+    return distributions
+
+
+def load_catalog_counts():
+    """{(kind, name): count} from the current tile catalogs, where they exist."""
+    counts = {}
+    for kind, path in CATALOGS.items():
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        groups = [data["tiles"]] if kind == "base" else data.values()
+        for tiles in groups:
+            for tile in tiles:
+                counts.setdefault((kind, tile.get("name")), tile.get("count"))
+    return counts
+
+
+def report(distributions, min_samples=1, catalog_counts=None):
+    """
+    Report rows, slowest tiles (per unit of count) first. Each kind of tile is measured against
+    the median minutes-per-count of all its tiles: suggested_count is the count that would
+    bring the tile to that pace.
+    """
+    catalog_counts = catalog_counts or {}
+    rows = []
+    for (kind, name, count), distribution in distributions.items():
+        if distribution.samples < min_samples:
+            continue
+        p50 = distribution.quantile(0.5)
+        count = catalog_counts.get((kind, name), count) if count is None else count
+        rows.append({
+            "kind": kind,
+            "name": name,
+            "count": count,
+            "samples": distribution.samples,
+            "p50_minutes": round(p50 / 60, 1),
+            "p90_minutes": round(distribution.quantile(0.9) / 60, 1),
+            "mean_minutes": round(distribution.mean / 60, 1),
+            "minutes_per_count": round(p50 / 60 / count, 1) if count else None,
+            "suggested_count": None,
+        })
+
+    for kind in {row["kind"] for row in rows}:
+        paces = sorted(row["minutes_per_count"] for row in rows if row["kind"] == kind and row["minutes_per_count"])
+        if not paces:
+            continue
+        target = paces[len(paces) // 2]
+        for row in rows:
+            if row["kind"] == kind and row["minutes_per_count"]:
+                row["suggested_count"] = max(1, round(row["count"] * target / row["minutes_per_count"]))
+
+    rows.sort(key=lambda row: (row["kind"], -(row["minutes_per_count"] or 0)))
+    return rows
+
+
+def write_report(rows, out, fmt):
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    elif fmt == "json":
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+    else:
+        out.write(f"{'kind':<5} {'tile':<48} {'count':>5} {'n':>5} {'p50':>7} {'p90':>7} {'min/ct':>7} {'suggest':>7}\n")
+        for row in rows:
+            suggested = row["suggested_count"]
+            change = "" if suggested in (None, row["count"]) else f"{suggested:>7}"
+            out.write(
+                f"{row['kind']:<5} {str(row['name'])[:48]:<48} {str(row['count']):>5} {row['samples']:>5} "
+                f"{row['p50_minutes']:>6}m {row['p90_minutes']:>6}m {str(row['minutes_per_count'] or '–'):>7} {change}\n"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Completion times per tile across archived matches.")
+    parser.add_argument("--db", default=archive.DB_PATH)
+    parser.add_argument("--season", help="only this season (default: every season)")
+    parser.add_argument("--min-samples", type=int, default=3, help="leave out tiles with fewer completions")
+    parser.add_argument("--format", choices=["text", "csv", "json"], default="text")
+    parser.add_argument("-o", "--output", default="-")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"❌ No archive at {args.db} yet.")
+    db = sqlite3.connect(args.db)
+    db.row_factory = sqlite3.Row
+    try:
+        archive.migrate(db)
+        rows = report(analyze(db, args.season), args.min_samples, load_catalog_counts())
+    finally:
+        db.close()
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        write_report(rows, out, args.format)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"✅ {len(rows)} tile(s) with at least {args.min_samples} completion(s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
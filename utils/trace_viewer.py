@@ -0,0 +1,126 @@
+# run python utils/trace_viewer.py to inspect the spans written by utils/tracing.py
+#
+#   python utils/trace_viewer.py data/traces.jsonl                     # text timeline of every trace
+#   python utils/trace_viewer.py data/traces.jsonl --slowest 5 --name select
+#   python utils/trace_viewer.py data/traces.jsonl --chrome trace.json # open in ui.perfetto.dev or chrome://tracing
+
+import argparse
+import json
+from collections import defaultdict
+
+
+def load_traces(path):
+    traces = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            traces[record["trace_id"]].append(record)
+    return traces
+
+
+def root_of(spans):
+    for s in spans:
+        if s["parent_id"] is None:
+            return s
+    return min(spans, key=lambda s: s["start"])
+
+
+def children_by_parent(spans):
+    children = defaultdict(list)
+    for s in spans:
+        children[s["parent_id"]].append(s)
+    for kids in children.values():
+        kids.sort(key=lambda s: s["start"])
+    return children
+
+
+def render_timeline(spans, width=50):
+    root = root_of(spans)
+    total_ms = root["duration_ms"] or 0.001
+    children = children_by_parent(spans)
+    attrs = ", ".join(f"{k}={v}" for k, v in root["attrs"].items())
+    lines = [f"▶ {root['name']} {total_ms:.2f}ms  [{attrs}]  trace={root['trace_id'][:8]}"]
+
+    def walk(span, depth):
+        for child in children.get(span["span_id"], []):
+            offset_ms = (child["start"] - root["start"]) * 1000
+            duration = child["duration_ms"] or 0
+            lead = int(offset_ms / total_ms * width)
+            bar = max(1, int(duration / total_ms * width))
+            lead = min(lead, width - 1)
+            bar = min(bar, width - lead)
+            extra = ", ".join(f"{k}={v}" for k, v in child["attrs"].items())
+            label = f"{'  ' * depth}{child['name']}"
+            lines.append(
+                f"  {label:<28} |{' ' * lead}{'█' * bar}{' ' * (width - lead - bar)}| "
+                f"{duration:8.2f}ms  {extra}"
+            )
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return "\n".join(lines)
+
+
+def to_chrome_events(traces):
+    """Converts traces to the chrome trace event format (one process row per trace)."""
+    events = []
+    for pid, (trace_id, spans) in enumerate(traces.items(), start=1):
+        root = root_of(spans)
+        events.append({
+            "name": "process_name", "ph": "M", "pid": pid,
+            "args": {"name": f"{root['name']} {trace_id[:8]}"},
+        })
+        for s in spans:
+            events.append({
+                "name": s["name"],
+                "cat": root["name"],
+                "ph": "X",
+                "ts": s["start"] * 1e6,
+                "dur": (s["duration_ms"] or 0) * 1000,
+                "pid": pid,
+                "tid": 1,
+                "args": s["attrs"],
+            })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show traces from the battleship bot.")
+    parser.add_argument("path", nargs="?", default="data/traces.jsonl")
+    parser.add_argument("--name", help="only traces whose root span has this name (e.g. select)")
+    parser.add_argument("--team", help="only traces for this team")
+    parser.add_argument("--slowest", type=int, help="only the N slowest traces")
+    parser.add_argument("--chrome", help="write a chrome/perfetto trace JSON here instead of printing")
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.path)
+    selected = {}
+    for trace_id, spans in traces.items():
+        root = root_of(spans)
+        if args.name and root["name"] != args.name:
+            continue
+        if args.team and root["attrs"].get("team") != args.team:
+            continue
+        selected[trace_id] = spans
+
+    ordered = sorted(selected.items(), key=lambda item: root_of(item[1])["start"])
+    if args.slowest:
+        ordered = sorted(ordered, key=lambda item: root_of(item[1])["duration_ms"] or 0, reverse=True)[: args.slowest]
+
+    if args.chrome:
+        with open(args.chrome, "w") as f:
+            json.dump(to_chrome_events(dict(ordered)), f)
+        print(f"✅ Wrote {len(ordered)} trace(s) to {args.chrome}")
+        return
+
+    for _, spans in ordered:
+        print(render_timeline(spans))
+        print()
+    print(f"{len(ordered)} trace(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# span based tracing for the mutating commands. a command opens a trace, the phases inside
+# it (parse, resolve context, load, mutate, persist, render, send) open spans, and once the
+# trace finishes every span is appended to the trace file as one JSON line.
+#
+# sampling is controlled by TRACE_SAMPLE_RATE (0 turns tracing off, 1 traces everything).
+# when a trace isn't sampled, span() is a no-op. run python utils/trace_viewer.py to turn a
+# trace file into a timeline or a chrome/perfetto flame chart.
+
+import contextlib
+import contextvars
+import json
+import random
+import time
+import uuid
+
+import config
+from utils import storage
+
+TRACE_FILE = config.TRACE_FILE
+TRACE_SAMPLE_RATE = config.TRACE_SAMPLE_RATE
+
+_current_span = contextvars.ContextVar("battleship_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "start", "start_wall", "duration", "token")
+
+    def __init__(self, trace, name, parent_id, attrs):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.start_wall = time.time()
+        self.duration = None
+        self.token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_record(self):
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start_wall, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attrs": self.attrs,
+        }
+
+
+class Trace:
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self.finished = False
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def set_sample_rate(rate):
+    global TRACE_SAMPLE_RATE
+    TRACE_SAMPLE_RATE = max(0.0, min(1.0, rate))
+
+
+def begin(name, **attrs):
+    """Opens a root span for a command, or returns None when this one isn't sampled."""
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        return None
+    root = Span(Trace(), name, None, attrs)
+    root.token = _current_span.set(root)
+    return root
+
+
+def finish(root, error=None):
+    """Closes a root span from begin() and writes the whole trace out."""
+    if root is None:
+        return
+    root.duration = time.perf_counter() - root.start
+    if error is not None:
+        root.set(error=type(error).__name__)
+    _current_span.reset(root.token)
+    root.trace.spans.append(root)
+    root.trace.finished = True
+    _write(root.trace)
+
+
+@contextlib.contextmanager
+def trace(name, **attrs):
+    """Context manager version of begin()/finish() for code outside of commands."""
+    root = begin(name, **attrs)
+    if root is None:
+        yield NOOP_SPAN
+        return
+    try:
+        yield root
+    except BaseException as e:
+        finish(root, e)
+        raise
+    finish(root)
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """Times one phase inside the current trace. Free when nothing is being traced."""
+    parent = _current_span.get()
+    if parent is None or parent.trace.finished:
+        yield NOOP_SPAN
+        return
+
+    current = Span(parent.trace, name, parent.span_id, attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current_span.reset(token)
+        parent.trace.spans.append(current)
+
+
+def annotate(**attrs):
+    """Adds attributes to the innermost open span (e.g. the team once it's resolved)."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def _write(finished_trace):
+    lines = "".join(json.dumps(s.to_record()) + "\n" for s in finished_trace.spans)
+    storage.append(TRACE_FILE, lines.encode())
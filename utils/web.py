@@ -0,0 +1,78 @@
+# the bot's local web server (aiohttp ships with discord.py): prometheus /metrics, the live
+# spectator dashboard and the JSON API (utils/api.py). / is a single page that follows the
+# match over server-sent events from /events; everything it shows comes from the in-memory
+# views in utils/live.py.
+
+import asyncio
+import os
+
+from utils import api, live, metrics
+
+# seconds between keep-alive comments on idle event streams, so proxies don't drop them
+HEARTBEAT = 15
+
+_DASHBOARD = os.path.join(os.path.dirname(__file__), "static", "dashboard.html")
+
+_runner = None
+
+
+def create_app():
+    from aiohttp import web  # type: ignore
+
+    # read once: the page never changes while the bot runs
+    with open(_DASHBOARD, "rb") as f:
+        dashboard = f.read()
+
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def handle_dashboard(request):
+        return web.Response(body=dashboard, content_type="text/html", charset="utf-8")
+
+    async def handle_events(request):
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+        await response.prepare(request)
+        queue = live.subscribe()
+        try:
+            await response.write(live.snapshot_message())
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT)
+                except asyncio.TimeoutError:
+                    message = b": keep-alive\n\n"
+                if message is None:
+                    break
+                await response.write(message)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            live.unsubscribe(queue)
+        return response
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/", handle_dashboard)
+    app.router.add_get("/events", handle_events)
+    api.add_routes(app)
+    return app
+
+
+async def start(host, port):
+    """Serves the app on a local port. Safe to call more than once (on_ready can fire again)."""
+    global _runner
+    if _runner or not port:
+        return None
+
+    from aiohttp import web  # type: ignore
+
+    runner = web.AppRunner(create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    _runner = runner
+    print(f"Live dashboard at http://{host}:{port}/ (metrics at /metrics)")
+    return runner